@@ -0,0 +1,96 @@
+"""编解码器基准测试
+
+比较各数据文件格式（storage.CODECS）保存与加载全部任务的耗时、
+吞吐量和文件大小，任务数据与 run.py 相同。
+
+用法:
+    python benchmarks/codecs.py                        # 10 万个任务，全部格式
+    python benchmarks/codecs.py --size 1000000 --codecs json,json-compact,marshal
+    python benchmarks/codecs.py --output codecs.json
+
+每项测量重复 --repeat 次取最小值。吞吐量按文件字节数计算：
+encode = 文件大小 / 保存耗时，decode = 文件大小 / 加载耗时。
+"""
+
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from run import make_todos  # noqa: E402
+from todo.storage import CODECS, open_store  # noqa: E402
+
+# 默认比较的格式：整体读写的文本与二进制格式
+DEFAULT_CODECS = "json,json-compact,jsonl,marshal,pickle,jdb"
+
+
+def bench_codec(codec: str, workdir: Path, todos: List, repeat: int) -> Dict:
+    """测量一种格式的保存/加载耗时与文件大小"""
+    path = workdir / f"todo.{codec}"
+    store = open_store(path, codec=codec)
+    save = load = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        store.save(todos)
+        save = min(save, time.perf_counter() - start)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loaded = store.load()
+        load = min(load, time.perf_counter() - start)
+    assert len(loaded) == len(todos)
+    size = path.stat().st_size
+    return {
+        "save": save,
+        "load": load,
+        "bytes": size,
+        "bytes_per_task": size / len(todos),
+        "encode_mb_s": size / save / 1e6,
+        "decode_mb_s": size / load / 1e6,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="数据文件格式基准测试")
+    parser.add_argument("--size", type=int, default=100_000, help="任务数")
+    parser.add_argument("--codecs", default=DEFAULT_CODECS, help="格式，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最小值")
+    parser.add_argument("--output", help="结果写入的 JSON 文件")
+    args = parser.parse_args()
+
+    codecs = [c for c in args.codecs.split(",") if c]
+    unknown = [c for c in codecs if c not in CODECS]
+    if unknown:
+        parser.error(f"未知的格式: {', '.join(unknown)}（可选 {', '.join(CODECS)}）")
+
+    todos = make_todos(args.size)
+    # 测试数据移出垃圾回收的跟踪范围，加载耗时与没有这些对象的 jd 进程相当
+    gc.freeze()
+    results = {}
+    print(f"{args.size} 个任务")
+    print(f"{'格式':<14}{'保存':>10}{'加载':>10}{'编码':>12}{'解码':>12}{'大小':>10}{'字节/任务':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec in codecs:
+            result = bench_codec(codec, Path(tmp), todos, args.repeat)
+            results[codec] = result
+            print(
+                f"{codec:<14}{result['save'] * 1000:>8.0f}ms{result['load'] * 1000:>8.0f}ms"
+                f"{result['encode_mb_s']:>8.1f}MB/s{result['decode_mb_s']:>8.1f}MB/s"
+                f"{result['bytes'] / 1e6:>8.2f}MB{result['bytes_per_task']:>10.1f}"
+            )
+
+    if args.output:
+        Path(args.output).write_text(
+            json.dumps({"size": args.size, "results": results}, indent=2), encoding="utf-8"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""性能基准测试
+
+生成不同规模的任务数据，测量 TodoManager 各操作与 jd 命令的耗时，
+结果输出为 JSON，可与之前的结果比较并在变慢超过阈值时返回非零退出码。
+
+用法:
+    python benchmarks/run.py                              # 1k/100k 任务，JSON 存储
+    python benchmarks/run.py --sizes 1000,100000,1000000 --formats json,jdlog,db
+    python benchmarks/run.py --formats json,json.gz,json.xz --only load,save
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --compare baseline.json --threshold 0.2
+
+每项测量重复 --repeat 次取最小值。修改类操作在每次重复前复制一份
+新的数据文件，复制不计入耗时。结果中的 sizes 记录各格式数据文件的字节数，
+便于比较压缩格式的体积与读写耗时。
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from todo.manager import TodoManager  # noqa: E402
+from todo.models import TodoItem  # noqa: E402
+from todo.storage import open_store  # noqa: E402
+
+PRIORITIES = ["high", "medium", "low"]
+
+
+def make_todos(count: int) -> List[TodoItem]:
+    """生成测试任务：优先级轮换，三分之一已完成"""
+    return [
+        TodoItem(
+            id=i,
+            text=f"基准测试任务 {i} benchmark task",
+            done=i % 3 == 0,
+            priority=PRIORITIES[i % 3],
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+class Context:
+    """一组基准测试共用的数据文件"""
+
+    def __init__(self, workdir: Path, size: int, fmt: str):
+        self.size = size
+        self.fmt = fmt
+        self.template = workdir / f"template-{size}.{fmt}"
+        self.path = workdir / f"todo-{size}.{fmt}"
+        open_store(self.template).save(make_todos(size))
+
+    def fresh(self) -> Path:
+        """复制一份新的数据文件（不计入耗时）"""
+        for suffix in ("", ".lock"):
+            stale = Path(str(self.path) + suffix)
+            if stale.exists():
+                stale.unlink()
+        shutil.copyfile(self.template, self.path)
+        return self.path
+
+    def manager(self, lazy: bool = False) -> TodoManager:
+        """在新的数据文件上创建管理器（不计入耗时）"""
+        return TodoManager(filepath=str(self.fresh()), lazy=lazy)
+
+
+def timed(func: Callable[[], object]) -> float:
+    """执行一次并返回耗时（秒）"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench_load(ctx: Context) -> float:
+    path = str(ctx.fresh())
+    return timed(lambda: TodoManager(filepath=path))
+
+
+def bench_save(ctx: Context) -> float:
+    manager = ctx.manager()
+    return timed(manager.save)
+
+
+def bench_add(ctx: Context) -> float:
+    manager = ctx.manager()
+    return timed(lambda: manager.add("新任务"))
+
+
+def bench_mark_done(ctx: Context) -> float:
+    manager = ctx.manager()
+    return timed(lambda: manager.mark_done(ctx.size // 2 or 1))
+
+
+def bench_delete(ctx: Context) -> float:
+    manager = ctx.manager()
+    return timed(lambda: manager.delete(ctx.size // 2 or 1))
+
+
+def bench_clear(ctx: Context) -> float:
+    manager = ctx.manager()
+    return timed(manager.clear)
+
+
+def bench_list_id(ctx: Context) -> float:
+    manager = ctx.manager()
+    return timed(lambda: manager.list(sort="i"))
+
+
+def bench_list_priority(ctx: Context) -> float:
+    manager = ctx.manager()
+    return timed(lambda: manager.list(sort="p"))
+
+
+def _run_cli(ctx: Context, *argv: str) -> float:
+    """以独立进程运行 jd 命令（HOME 指向临时目录），返回耗时"""
+    home = ctx.path.parent / "home"
+    data_dir = home / ".jd"
+    data_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(ctx.template, data_dir / "todo.json")
+    env = dict(os.environ, HOME=str(home))
+    env.pop("JD_SOCKET", None)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(Path(__file__).resolve().parent.parent / "src"), env.get("PYTHONPATH")])
+    )
+    cmd = [sys.executable, "-m", "todo.cli", *argv]
+    return timed(
+        lambda: subprocess.run(cmd, env=env, stdout=subprocess.DEVNULL, check=True)
+    )
+
+
+def bench_cli_add(ctx: Context) -> float:
+    return _run_cli(ctx, "add", "新任务")
+
+
+def bench_cli_list(ctx: Context) -> float:
+    return _run_cli(ctx, "list", "--head", "20")
+
+
+# 名称 -> 基准测试函数（每次调用返回一次测量的秒数）
+BENCHMARKS: Dict[str, Callable[[Context], float]] = {
+    "load": bench_load,
+    "save": bench_save,
+    "add": bench_add,
+    "mark_done": bench_mark_done,
+    "delete": bench_delete,
+    "clear": bench_clear,
+    "list_id": bench_list_id,
+    "list_priority": bench_list_priority,
+}
+
+# 端到端命令，只针对默认的 JSON 存储
+CLI_BENCHMARKS: Dict[str, Callable[[Context], float]] = {
+    "cli_add": bench_cli_add,
+    "cli_list": bench_cli_list,
+}
+
+
+def run(sizes: List[int], formats: List[str], repeat: int, names: Optional[List[str]]) -> Dict:
+    """运行基准测试
+
+    Returns:
+        {"meta": {...}, "results": {"json/1000/load": 秒, ...},
+         "sizes": {"json/1000": 字节数, ...}}
+    """
+    results: Dict[str, float] = {}
+    file_sizes: Dict[str, int] = {}
+    with tempfile.TemporaryDirectory(prefix="jd-bench-") as tmp:
+        for size in sizes:
+            for fmt in formats:
+                ctx = Context(Path(tmp), size, fmt)
+                key = f"{fmt}/{size}"
+                file_sizes[key] = ctx.template.stat().st_size
+                print(f"{key + '/file_size':<32} {file_sizes[key] / 1e6:10.2f} MB", file=sys.stderr)
+                benchmarks = dict(BENCHMARKS)
+                if fmt == "json":
+                    benchmarks.update(CLI_BENCHMARKS)
+                for name, bench in benchmarks.items():
+                    if names and name not in names:
+                        continue
+                    key = f"{fmt}/{size}/{name}"
+                    results[key] = min(bench(ctx) for _ in range(repeat))
+                    print(f"{key:<32} {results[key] * 1000:10.2f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+        "sizes": file_sizes,
+    }
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """与基准结果比较
+
+    Returns:
+        变慢超过阈值的测量项说明
+    """
+    regressions = []
+    for key, seconds in current["results"].items():
+        base = baseline["results"].get(key)
+        if base and seconds > base * (1 + threshold):
+            regressions.append(
+                f"{key}: {base * 1000:.2f} ms -> {seconds * 1000:.2f} ms "
+                f"(+{(seconds / base - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="TodoManager / jd 性能基准测试")
+    parser.add_argument("--sizes", default="1000,100000", help="任务数，逗号分隔")
+    parser.add_argument("--formats", default="json", help="存储格式（扩展名），逗号分隔")
+    parser.add_argument("--only", help="只运行这些测量项，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数，取最小值")
+    parser.add_argument("--output", help="结果写入的 JSON 文件")
+    parser.add_argument("--compare", help="作为基准的结果 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许变慢的比例")
+    args = parser.parse_args()
+
+    result = run(
+        sizes=[int(size) for size in args.sizes.split(",")],
+        formats=args.formats.split(","),
+        repeat=args.repeat,
+        names=args.only.split(",") if args.only else None,
+    )
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.threshold)
+        for line in regressions:
+            print(f"变慢: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,9 +3,27 @@
 一个简单的命令行待办事项工具
 """
 
-from .models import TodoItem
-from .manager import TodoManager
-from .cli import main
-
 __version__ = "1.0.0"
-__all__ = ["TodoItem", "TodoManager", "main"]
+__all__ = ["AsyncTodoManager", "TodoItem", "TodoManager", "main"]
+
+# 公开名称 -> 所在子模块。按需导入，jd 启动时只加载命令用到的模块
+_LAZY_ATTRS = {
+    "AsyncTodoManager": "aio",
+    "TodoItem": "models",
+    "TodoManager": "manager",
+    "main": "cli",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        from importlib import import_module
+
+        value = getattr(import_module(f".{_LAZY_ATTRS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
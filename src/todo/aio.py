@@ -0,0 +1,211 @@
+"""asyncio 接口
+
+AsyncTodoManager 把 TodoManager 包装为协程接口，供 asyncio 服务（如 aiohttp）
+嵌入使用：
+
+- 磁盘读写在专用的单线程执行器中进行，不阻塞事件循环；所有操作在
+  同一线程中按提交顺序执行，TodoManager 不会被并发访问
+- 写入合并：修改立即作用于内存中的任务，写入延后 flush_delay 秒，
+  这段时间内的所有修改通过 TodoManager.batch() 一次性提交
+- await flush() 立即写入暂存的修改；close()（或 async with 退出）
+  写入后关闭执行器
+
+示例:
+    async with AsyncTodoManager("todo.json") as todos:
+        todo = await todos.add("写周报", priority="high")
+        await todos.mark_done(todo.id)
+        print(await todos.list(sort="p"))
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional, TypeVar
+from .manager import TodoManager
+from .models import TodoItem
+
+T = TypeVar("T")
+
+
+class AsyncTodoManager:
+    """TodoManager 的 asyncio 包装"""
+
+    def __init__(self, filepath: Optional[str] = None, flush_delay: float = 0.05):
+        """初始化管理器（不读取文件，首次操作时在执行器中加载）
+
+        Args:
+            filepath: 数据文件路径，默认 ~/.jd/todo.json
+            flush_delay: 第一次修改之后延迟写入的秒数，期间的修改合并为一次写入
+        """
+        self.filepath = filepath
+        self.flush_delay = flush_delay
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jd-io")
+        # 以下状态只在执行器线程中访问
+        self._manager: Optional[TodoManager] = None
+        # 尚未退出的 TodoManager.batch()，暂存合并中的修改
+        self._batch = None
+        # 事件循环中等待延迟写入的任务
+        self._flush_task: Optional["asyncio.Task"] = None
+        # 延迟写入失败的异常，在下一次 flush/close 时抛出
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+    async def __aenter__(self) -> "AsyncTodoManager":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def add(self, text: str, priority: str = "medium") -> TodoItem:
+        """添加新任务（写入延迟合并）
+
+        Raises:
+            ValueError: 文本为空或优先级无效时
+        """
+        return await self._mutate(lambda manager: manager.add(text, priority=priority))
+
+    async def add_many(self, texts: Iterable[str], priority: str = "medium") -> List[TodoItem]:
+        """批量添加任务（写入延迟合并）
+
+        Raises:
+            ValueError: 任一文本为空或优先级无效时（此时不添加任何任务）
+        """
+        texts = list(texts)
+        return await self._mutate(lambda manager: manager.add_many(texts, priority=priority))
+
+    async def mark_done(self, todo_id: int) -> None:
+        """标记任务为完成（写入延迟合并）
+
+        Raises:
+            ValueError: 任务不存在时
+        """
+        await self._mutate(lambda manager: manager.mark_done(todo_id))
+
+    async def delete(self, todo_id: int) -> None:
+        """删除任务（写入延迟合并）
+
+        Raises:
+            ValueError: 任务不存在时
+        """
+        await self._mutate(lambda manager: manager.delete(todo_id))
+
+    async def clear(self) -> None:
+        """清除所有已完成的任务（写入延迟合并）"""
+        await self._mutate(lambda manager: manager.clear())
+
+    async def list(self, *args, **kwargs) -> List[TodoItem]:
+        """列出任务，参数同 TodoManager.list（包含尚未写入的修改）"""
+        return await self._call(lambda manager: manager.list(*args, **kwargs))
+
+    async def peek_next(self, limit: int = 1) -> List[TodoItem]:
+        """最重要的未完成任务，参数同 TodoManager.peek_next（包含尚未写入的修改）"""
+        return await self._call(lambda manager: manager.peek_next(limit=limit))
+
+    async def count(self, *args, **kwargs) -> int:
+        """统计任务数，参数同 TodoManager.count"""
+        return await self._call(lambda manager: manager.count(*args, **kwargs))
+
+    async def get(self, todo_id: int) -> TodoItem:
+        """按 ID 获取任务
+
+        Raises:
+            ValueError: 任务不存在时
+        """
+        return await self._call(lambda manager: manager.get(todo_id))
+
+    async def search(self, query: str, limit: Optional[int] = None) -> List[TodoItem]:
+        """全文搜索任务文本（先写入暂存的修改，索引随提交更新）"""
+        return await self._call(lambda manager: manager.search(query, limit=limit), flush=True)
+
+    async def flush(self) -> None:
+        """立即写入暂存的修改，写入完成后返回
+
+        Raises:
+            OSError: 写入失败时（包括之前的延迟写入失败）
+        """
+        task, self._flush_task = self._flush_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        await self._run(self._end_batch)
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    async def close(self) -> None:
+        """写入暂存的修改并关闭执行器；重复调用无效果"""
+        if self._closed:
+            return
+        try:
+            await self.flush()
+        finally:
+            self._closed = True
+            self._executor.shutdown(wait=True)
+
+    async def _call(self, func: Callable[[TodoManager], T], flush: bool = False) -> T:
+        """在执行器线程中对 TodoManager 执行操作
+
+        Args:
+            func: 接收 TodoManager 的函数
+            flush: 为 True 时先写入暂存的修改
+        """
+        def run() -> T:
+            if flush:
+                self._end_batch()
+            return func(self._get_manager())
+
+        return await self._run(run)
+
+    async def _mutate(self, func: Callable[[TodoManager], T]) -> T:
+        """在合并中的批量修改内执行修改，并安排延迟写入"""
+        def run() -> T:
+            manager = self._get_manager()
+            if self._batch is None:
+                self._batch = manager.batch()
+                self._batch.__enter__()
+            return func(manager)
+
+        result = await self._run(run)
+        if self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+        return result
+
+    async def _flush_later(self) -> None:
+        """等待 flush_delay 秒后写入；失败时保存异常，留待下次 flush 抛出"""
+        await asyncio.sleep(self.flush_delay)
+        self._flush_task = None
+        try:
+            await self._run(self._end_batch)
+        except Exception as e:
+            self._error = e
+
+    async def _run(self, func: Callable[[], T]) -> T:
+        """把阻塞的函数交给执行器线程执行
+
+        Raises:
+            ValueError: 管理器已关闭时
+        """
+        if self._closed:
+            raise ValueError("管理器已关闭")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func)
+
+    def _get_manager(self) -> TodoManager:
+        """创建并加载 TodoManager（执行器线程中调用）
+
+        全部任务预先加载到内存，合并中的修改对之后的读取和修改可见
+        （包括按需查询的后端，如 SQLite）。
+        """
+        if self._manager is None:
+            manager = TodoManager(filepath=self.filepath)
+            manager.todos  # 访问即加载
+            self._manager = manager
+        return self._manager
+
+    def _end_batch(self) -> None:
+        """退出合并中的批量修改，一次性提交暂存的修改（执行器线程中调用）
+
+        之前提交失败、留在 TodoManager 暂存中的修改在这里重试。
+        """
+        batch, self._batch = self._batch, None
+        if batch is not None:
+            batch.__exit__(None, None, None)
+        elif self._manager is not None:
+            self._manager.flush()
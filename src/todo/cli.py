@@ -1,30 +1,200 @@
 """CLI 命令行接口
 
 提供命令行参数解析和用户交互
+
+jd 每次调用都是一个新进程，启动开销直接体现在命令耗时上：
+argparse、TodoManager（连同存储后端）都在用到时才导入，
+解析参数时也只构建本次命令的子解析器。
 """
 
+import os
 import sys
-import argparse
-from .manager import TodoManager
+from typing import TYPE_CHECKING, Iterable, List, Optional, Union
 
+if TYPE_CHECKING:
+    import argparse
+    from .manager import TodoManager
 
-def main():
-    """主入口函数"""
-    parser = argparse.ArgumentParser(
-        description="Todo CLI - 命令行待办事项工具",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
+# 环境变量：1（或 true/yes/on）表示输出各阶段耗时，空值与 0（或 false/no/off）
+# 表示关闭，其他值同时作为 cProfile 数据文件（见 profiling.py）
+PROFILE_ENV = "JD_PROFILE"
+_PROFILE_ON = ("1", "true", "yes", "on")
+_PROFILE_OFF = ("", "0", "false", "no", "off")
+
+
+def __getattr__(name):
+    # TodoManager 按需导入；测试可照常替换 todo.cli.TodoManager
+    if name == "TodoManager":
+        from .manager import TodoManager
+
+        globals()[name] = TodoManager
+        return TodoManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# 一个 ID 范围最多包含的 ID 数
+MAX_ID_RANGE = 100_000
+
+
+def parse_id_arg(value: str) -> Union[str, List[int]]:
+    """解析任务 ID 参数
+
+    支持单个 ID（5）、闭区间（4-900），以及 "-"（从标准输入读取）。
+    闭区间最多包含 MAX_ID_RANGE 个 ID，避免笔误（如 4-9000000）展开出巨大的列表
+
+    Args:
+        value: 命令行参数
+
+    Returns:
+        ID 列表，或 "-"
+
+    Raises:
+        argparse.ArgumentTypeError: 参数格式无效时
+    """
+    import argparse
+
+    if value == "-":
+        return value
+    start, sep, end = value.partition("-")
+    try:
+        if not sep:
+            return [int(value)]
+        first, last = int(start), int(end)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的任务 ID: {value}")
+    if first > last:
+        raise argparse.ArgumentTypeError(f"无效的 ID 范围: {value}")
+    if last - first + 1 > MAX_ID_RANGE:
+        raise argparse.ArgumentTypeError(f"ID 范围过大: {value}（最多 {MAX_ID_RANGE} 个）")
+    return list(range(first, last + 1))
+
+
+def collect_ids(values: List[Union[str, List[int]]]) -> List[int]:
+    """展开 ID 参数，"-" 替换为从标准输入读取的 ID（空白分隔）
+
+    Raises:
+        ValueError: 标准输入中有无效 ID 时
+    """
+    import argparse
+
+    ids: List[int] = []
+    for value in values:
+        if value == "-":
+            for token in sys.stdin.read().split():
+                try:
+                    ids.extend(parse_id_arg(token))
+                except argparse.ArgumentTypeError as e:
+                    raise ValueError(str(e))
+        else:
+            ids.extend(value)
+    return ids
+
+
+def write_lines(lines: Iterable[str], batch_size: int = 1000) -> None:
+    """成批写出多行文本，减少写标准输出的次数
+
+    管道下游提前关闭（如 jd list | head）时安静退出。
+
+    Args:
+        lines: 不含换行符的文本行
+        batch_size: 每次写出的行数
+    """
+    batch: List[str] = []
+    try:
+        for line in lines:
+            batch.append(line)
+            if len(batch) >= batch_size:
+                sys.stdout.write("\n".join(batch) + "\n")
+                batch.clear()
+        if batch:
+            sys.stdout.write("\n".join(batch) + "\n")
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # 把剩余输出重定向到 /dev/null，避免解释器退出时再次报错
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
+
+def format_todo(todo) -> str:
+    """格式化单个任务的显示行"""
+    status = "✓" if todo.done else " "
+    return f"[{todo.id}] [{status}] {todo.priority_emoji} {todo.text}"
+
+
+def non_negative_int(value: str) -> int:
+    """argparse 类型：非负整数"""
+    import argparse
+
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"必须是非负整数: {value}")
+    return number
+
+
+def positive_int(value: str) -> int:
+    """argparse 类型：正整数"""
+    import argparse
+
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"必须是正整数: {value}")
+    return number
+
+
+def priority_list(value: str) -> List[str]:
+    """argparse 类型：逗号分隔的优先级，如 high,medium"""
+    import argparse
+
+    priorities = [p.strip() for p in value.split(",") if p.strip()]
+    invalid = [p for p in priorities if p not in ("high", "medium", "low")]
+    if not priorities or invalid:
+        raise argparse.ArgumentTypeError(f"无效的优先级: {value}（可选 high,medium,low）")
+    return priorities
+
+
+def list_name(value: str) -> str:
+    """argparse 类型：列表名（见 lists.check_list_name）"""
+    import argparse
+    from .lists import check_list_name
+
+    try:
+        return check_list_name(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _add_all_argument(parser: "argparse.ArgumentParser") -> None:
+    parser.add_argument(
+        "-a", "--all",
+        action="store_true",
+        help="包含所有列表（忽略 -L）"
+    )
+
+
+def _add_filter_arguments(parser: "argparse.ArgumentParser") -> None:
+    parser.add_argument(
+        "--status",
+        choices=["open", "done"],
+        help="只显示未完成（open）或已完成（done）的任务"
     )
     parser.add_argument(
-        "--version",
-        action="version",
-        version="%(prog)s 0.1.1"
+        "--priority",
+        type=priority_list,
+        metavar="P[,P...]",
+        help="只显示这些优先级的任务，如 high,medium"
     )
-    subparsers = parser.add_subparsers(dest="command", help="可用命令")
 
-    # add 命令
-    add_parser = subparsers.add_parser("add", help="添加新任务")
-    add_parser.add_argument("text", help="任务文本")
-    add_parser.add_argument(
+
+def _add_add_arguments(parser: "argparse.ArgumentParser") -> None:
+    parser.add_argument("text", help="任务文本")
+    parser.add_argument(
         "-l", "--level",
         type=int,
         choices=[1, 2, 3],
@@ -32,34 +202,224 @@ def main():
         help="优先级: 1=高, 2=中, 3=低 (默认 2)"
     )
 
-    # list 命令
-    list_parser = subparsers.add_parser("list", help="列出所有任务")
-    list_parser.add_argument(
+
+def _add_list_arguments(parser: "argparse.ArgumentParser") -> None:
+    parser.add_argument(
         "-s", "--sort",
         choices=["p", "i"],
         default="i",
         help="排序: p=优先级, i=ID (默认 i)"
     )
+    parser.add_argument(
+        "-n", "--limit",
+        type=non_negative_int,
+        help="最多显示的任务数"
+    )
+    parser.add_argument(
+        "--offset",
+        type=non_negative_int,
+        default=0,
+        help="跳过前 N 个任务（配合 --limit 分页）"
+    )
+    parser.add_argument(
+        "--head",
+        type=non_negative_int,
+        metavar="N",
+        help="只显示排序后的前 N 个任务（等同 --offset 0 --limit N）"
+    )
+    _add_filter_arguments(parser)
+    _add_all_argument(parser)
 
-    # done 命令
-    done_parser = subparsers.add_parser("done", help="标记任务为完成")
-    done_parser.add_argument("id", type=int, help="任务 ID")
 
-    # delete 命令
-    delete_parser = subparsers.add_parser("delete", help="删除任务")
-    delete_parser.add_argument("id", type=int, help="任务 ID")
+def _add_count_arguments(parser: "argparse.ArgumentParser") -> None:
+    _add_filter_arguments(parser)
+    _add_all_argument(parser)
 
-    # clear 命令
-    subparsers.add_parser("clear", help="清除所有已完成任务")
 
-    args = parser.parse_args()
+def _add_search_arguments(parser: "argparse.ArgumentParser") -> None:
+    parser.add_argument("terms", nargs="+", metavar="term", help="查询词，任务需包含全部查询词")
+    parser.add_argument(
+        "-n", "--limit",
+        type=non_negative_int,
+        help="最多显示的任务数"
+    )
 
-    if not args.command:
-        parser.print_help()
-        sys.exit(1)
 
-    manager = TodoManager()
+def _add_next_arguments(parser: "argparse.ArgumentParser") -> None:
+    parser.add_argument(
+        "-n", "--limit",
+        type=positive_int,
+        default=1,
+        help="显示的任务数，默认 1"
+    )
+
 
+def _add_ids_argument(parser: "argparse.ArgumentParser") -> None:
+    parser.add_argument(
+        "ids", nargs="+", type=parse_id_arg, metavar="id",
+        help="任务 ID，可以是多个、范围（4-900）或 -（从标准输入读取）；多个 ID 时跳过不存在的任务"
+    )
+
+
+def _add_export_arguments(parser: "argparse.ArgumentParser") -> None:
+    parser.add_argument("path", help="目标文件（按扩展名选择格式，如 .json、.jdb）")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="同时为当前文件和导出的文件建立同步状态（副本要在别处修改、再用 jd sync 同步回来时使用）"
+    )
+
+
+def _add_path_argument(help_text: str):
+    def add(parser: "argparse.ArgumentParser") -> None:
+        parser.add_argument("path", help=help_text)
+    return add
+
+
+# 命令前带参数值的选项（查找子命令名时跳过参数值）
+_VALUE_OPTIONS = ("-L", "--list", "-f", "--file")
+
+
+def command_name(argv: List[str]) -> Optional[str]:
+    """命令行中的子命令名（跳过子命令前的选项，如 -L NAME），没有时为 None"""
+    args = iter(argv)
+    for arg in args:
+        if arg in _VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+# 子命令 -> (帮助文本, 添加参数的函数)，按此顺序显示在帮助中
+COMMANDS = {
+    "add": ("添加新任务", _add_add_arguments),
+    "list": ("列出所有任务", _add_list_arguments),
+    "count": ("统计任务数（可按状态、优先级筛选）", _add_count_arguments),
+    "search": ("全文搜索任务", _add_search_arguments),
+    "next": ("显示最重要的未完成任务（优先级最高、最早添加）", _add_next_arguments),
+    "done": ("标记任务为完成", _add_ids_argument),
+    "delete": ("删除任务", _add_ids_argument),
+    "clear": ("清除所有已完成任务", None),
+    "compact": ("压缩操作日志为快照", None),
+    "check": ("完整验证数据文件（逐个验证任务，核对 ID 与计数）", None),
+    "export": ("导出任务到文件", _add_export_arguments),
+    "import": (
+        "从文件导入任务（替换现有任务）",
+        _add_path_argument("源文件（按扩展名选择格式，如 .json、.jdb）"),
+    ),
+    "sync": (
+        "与另一个数据文件双向同步（只交换上次同步以来的修改）",
+        _add_path_argument("对端数据文件（如共享目录中的 todo.json）"),
+    ),
+    "serve": ("启动常驻服务，后续命令经 Unix 套接字转发", None),
+}
+
+
+def build_parser(command: Optional[str] = None) -> "argparse.ArgumentParser":
+    """构建命令行参数解析器
+
+    Args:
+        command: 本次要执行的子命令。已知命令时只构建它的子解析器，
+            省去构建其他子命令的开销；None 或未知命令时构建全部（用于帮助和报错）
+
+    Returns:
+        参数解析器
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Todo CLI - 命令行待办事项工具",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--version",
+        action="version",
+        version="%(prog)s 0.1.1"
+    )
+    # 只用于帮助文本：main 在解析前已由 pop_profile_option 取出该选项
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="在标准错误输出各阶段耗时；--profile=FILE 同时把 cProfile 数据保存到 FILE"
+             "（也可设置环境变量 JD_PROFILE=1 或 JD_PROFILE=FILE）"
+    )
+    parser.add_argument(
+        "-L", "--list",
+        dest="list_name",
+        type=list_name,
+        metavar="NAME",
+        help="操作命名列表 NAME（每个列表单独存储，有各自的 ID），默认为 default 列表"
+    )
+    parser.add_argument(
+        "-f", "--file",
+        metavar="FILE",
+        help="直接操作数据文件 FILE，按内容或扩展名选择存储格式（如 todo.jdlog、"
+             "todo.db、todo.jdb），默认 ~/.jd/todo.json（也可设置环境变量 JD_FILE）"
+    )
+    subparsers = parser.add_subparsers(dest="command", help="可用命令")
+
+    names = [command] if command in COMMANDS else list(COMMANDS)
+    for name in names:
+        help_text, add_arguments = COMMANDS[name]
+        subparser = subparsers.add_parser(name, help=help_text)
+        if add_arguments is not None:
+            add_arguments(subparser)
+
+    return parser
+
+
+def apply_file_option(
+    parser: "argparse.ArgumentParser", args: "argparse.Namespace", env_file: Optional[str]
+) -> None:
+    """确定要操作的数据文件 args.file：--file 优先，没有 --file 与 -L 时取 JD_FILE
+
+    Args:
+        parser: 参数解析器，用于报告选项冲突
+        args: 解析结果
+        env_file: 环境变量 JD_FILE 的值（常驻服务中为客户端转发来的值）
+    """
+    if args.file is not None and args.list_name is not None:
+        parser.error("-L 与 --file 不能同时使用")
+    if args.file is None and args.list_name is None and env_file:
+        args.file = env_file
+
+
+def open_manager(args: "argparse.Namespace") -> "TodoManager":
+    """打开 --file 指定的数据文件或 -L 指定的列表的管理器
+
+    单次命令只在需要时才加载全部任务；常驻服务（serve）预先加载，
+    之后转发来的命令直接使用内存中的任务。
+    """
+    lazy = args.command != "serve"
+    if args.file is not None:
+        return getattr(sys.modules[__name__], "TodoManager")(filepath=args.file, lazy=lazy)
+    if args.list_name is None:
+        # 经模块属性取得 TodoManager，触发按需导入
+        return getattr(sys.modules[__name__], "TodoManager")(lazy=lazy)
+    from .lists import TodoLists
+
+    return TodoLists().manager(args.list_name, lazy=lazy)
+
+
+def _report_missing(missing: List[int]) -> int:
+    """报告批量操作中跳过的不存在的任务，返回退出码 1"""
+    from .manager import format_ids
+
+    print(f"错误: 任务不存在: ID {format_ids(missing)}（已跳过，其余任务已处理）", file=sys.stderr)
+    return 1
+
+
+def execute(args: "argparse.Namespace", manager: "TodoManager") -> int:
+    """执行已解析的命令
+
+    Args:
+        args: 命令行参数
+        manager: 任务管理器
+
+    Returns:
+        退出码，0 表示成功
+    """
     try:
         if args.command == "add":
             # CLI 层处理空格
@@ -71,37 +431,208 @@ def main():
             print(f"✓ 已添加任务 [{todo.id}] {emoji}: {todo.text}")
 
         elif args.command == "list":
-            todos = manager.list()
+            if args.head is not None:
+                limit, offset = args.head, 0
+            else:
+                limit, offset = args.limit, args.offset
+            if args.all:
+                from .lists import TodoLists
+
+                entries = TodoLists().list_all(
+                    sort=args.sort,
+                    limit=limit,
+                    offset=offset,
+                    status=args.status,
+                    priorities=args.priority,
+                )
+                if not entries:
+                    print("暂无任务")
+                else:
+                    write_lines(f"{name}:{format_todo(todo)}" for name, todo in entries)
+                return 0
+            # 筛选、排序与分页由 manager/存储后端完成
+            todos = manager.list(
+                sort=args.sort,
+                limit=limit,
+                offset=offset,
+                status=args.status,
+                priorities=args.priority,
+            )
             if not todos:
                 print("暂无任务")
             else:
-                # 按指定方式排序
-                if args.sort == "p":
-                    todos = sorted(todos, key=lambda t: (-t.priority_weight, t.id))
-                else:  # sort == "i"
-                    todos = sorted(todos, key=lambda t: t.id)
+                write_lines(format_todo(todo) for todo in todos)
+
+        elif args.command == "count":
+            if args.all:
+                from .lists import TodoLists
+
+                print(TodoLists().count_all(status=args.status, priorities=args.priority))
+            else:
+                print(manager.count(status=args.status, priorities=args.priority))
 
-                for todo in todos:
-                    status = "✓" if todo.done else " "
-                    emoji = todo.priority_emoji
-                    print(f"[{todo.id}] [{status}] {emoji} {todo.text}")
+        elif args.command == "next":
+            todos = manager.peek_next(limit=args.limit)
+            if not todos:
+                print("没有未完成的任务")
+            else:
+                write_lines(format_todo(todo) for todo in todos)
+
+        elif args.command == "search":
+            todos = manager.search(" ".join(args.terms), limit=args.limit)
+            if not todos:
+                print("没有匹配的任务")
+            else:
+                write_lines(format_todo(todo) for todo in todos)
 
         elif args.command == "done":
-            manager.mark_done(args.id)
-            print(f"✓ 任务 [{args.id}] 已标记为完成")
+            ids = collect_ids(args.ids)
+            if len(ids) == 1:
+                manager.mark_done(ids[0])
+                print(f"✓ 任务 [{ids[0]}] 已标记为完成")
+            else:
+                # 多个 ID 时跳过不存在的任务（如范围中已删除的 ID），其余照常处理
+                missing = manager.mark_done_many(ids, missing_ok=True)
+                print(f"✓ 已将 {len(set(ids)) - len(missing)} 个任务标记为完成")
+                if missing:
+                    return _report_missing(missing)
 
         elif args.command == "delete":
-            manager.delete(args.id)
-            print(f"✓ 任务 [{args.id}] 已删除")
+            ids = collect_ids(args.ids)
+            if len(ids) == 1:
+                manager.delete(ids[0])
+                print(f"✓ 任务 [{ids[0]}] 已删除")
+            else:
+                missing = manager.delete_many(ids, missing_ok=True)
+                print(f"✓ 已删除 {len(set(ids)) - len(missing)} 个任务")
+                if missing:
+                    return _report_missing(missing)
 
         elif args.command == "clear":
             manager.clear()
             print("✓ 已清除所有已完成任务")
 
+        elif args.command == "compact":
+            stats = manager.compact()
+            if stats is None:
+                print("当前存储格式无需压缩")
+            else:
+                print(
+                    f"✓ 已压缩 {stats.records_folded} 条记录，"
+                    f"回收 {stats.bytes_reclaimed} 字节，"
+                    f"耗时 {stats.elapsed * 1000:.1f} ms"
+                )
+
+        elif args.command == "check":
+            report = manager.check()
+            if not report.ok:
+                for problem in report.problems:
+                    print(f"错误: {problem}", file=sys.stderr)
+                return 1
+            print(f"✓ 数据文件完好：{report.items} 个任务")
+            if report.checksum is False:
+                print("提示: 文件没有校验和或已被其他程序修改，加载时逐个验证；下次写入后恢复快速加载")
+
+        elif args.command == "export":
+            manager.export_to(args.path, sync=args.sync)
+            print(f"✓ 已导出任务到 {args.path}")
+
+        elif args.command == "import":
+            count = manager.import_from(args.path)
+            print(f"✓ 已从 {args.path} 导入 {count} 个任务")
+
+        elif args.command == "sync":
+            stats = manager.sync_with(args.path)
+            print(
+                f"✓ 已与 {args.path} 同步：收到 {stats.received} 个修改，"
+                f"发出 {stats.sent} 个修改，耗时 {stats.elapsed * 1000:.1f} ms"
+            )
+            for path in stats.untracked:
+                print(
+                    f"警告: {path} 此前没有同步状态，复制以来在其中删除的任务可能已被对端重新加回；"
+                    "请用 jd export --sync 生成副本",
+                    file=sys.stderr,
+                )
+
+        elif args.command == "serve":
+            from .server import serve
+            serve(manager, list_name=args.list_name, filepath=args.file)
+
     except ValueError as e:
         print(f"错误: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def pop_profile_option(argv: List[str]) -> "tuple[List[str], Optional[str]]":
+    """取出子命令前的 --profile[=FILE] 选项，未指定时读取环境变量 JD_PROFILE
+
+    选项可以出现在子命令前的任意位置（如 jd -L ops --profile list），
+    子命令及之后的参数原样保留。
+
+    Returns:
+        (其余参数, 剖析选项)：未启用剖析时选项为 None，
+        只输出耗时时为 ""，否则为 cProfile 数据文件路径
+    """
+    profile = None
+    rest = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--profile" or arg.startswith("--profile="):
+            profile = arg[len("--profile="):]
+            continue
+        rest.append(arg)
+        if arg in _VALUE_OPTIONS:
+            value = next(args, None)
+            if value is not None:
+                rest.append(value)
+        elif not arg.startswith("-"):
+            rest.extend(args)
+    argv = rest
+    if profile is None:
+        value = os.environ.get(PROFILE_ENV, "").strip()
+        if value.lower() in _PROFILE_ON:
+            profile = ""
+        elif value.lower() not in _PROFILE_OFF:
+            profile = value
+    return argv, profile
+
+
+def main():
+    """主入口函数"""
+    argv, profile = pop_profile_option(sys.argv[1:])
+    if profile is not None:
+        from .profiling import run_profiled
+        code = run_profiled(argv, dump=profile or None)
+        if code:
+            sys.exit(code)
+        return
+
+    # 常驻服务在运行时直接转发，省去解析参数和加载数据
+    command = command_name(argv)
+    if command and command != "serve":
+        from .client import forward
+        code = forward(argv)
+        if code is not None:
+            if code:
+                sys.exit(code)
+            return
+
+    from .client import FILE_ENV
+
+    parser = build_parser(command)
+    args = parser.parse_args(argv)
+    apply_file_option(parser, args, os.environ.get(FILE_ENV))
+
+    if not args.command:
+        parser.print_help()
         sys.exit(1)
 
+    manager = open_manager(args)
+    code = execute(args, manager)
+    if code:
+        sys.exit(code)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,71 @@
+"""常驻服务客户端
+
+CLI 每次启动都会先调用 forward 检查常驻服务。本模块只依赖 os/sys
+（类型标注也不引入 typing），套接字不存在时不再导入其他模块，
+服务端实现见 server.py。
+"""
+
+import os
+import sys
+
+# 套接字路径可通过环境变量覆盖
+SOCKET_ENV = "JD_SOCKET"
+# 数据文件（同 jd --file），随请求转发给服务
+FILE_ENV = "JD_FILE"
+
+
+def socket_path() -> str:
+    """服务套接字路径，默认 ~/.jd/jd.sock"""
+    return os.environ.get(SOCKET_ENV) or os.path.join(
+        os.path.expanduser("~"), ".jd", "jd.sock"
+    )
+
+
+def forward(argv: list, path: "os.PathLike | str | None" = None) -> "int | None":
+    """把命令转发给常驻服务执行，并输出服务返回的结果
+
+    Args:
+        argv: 命令行参数（不含程序名）
+        path: 套接字路径，默认 socket_path()
+
+    Returns:
+        退出码；服务不可用（连接失败）时返回 None。请求发出后连接中断
+        时不回退为本地执行（服务可能已执行了命令），返回 1
+    """
+    path = os.fspath(path) if path is not None else socket_path()
+    if not os.path.exists(path):
+        return None
+
+    import io
+    import json
+    import socket
+
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+
+    # 服务端按客户端的工作目录解析相对路径（如 jd export backup.json）
+    request = {"argv": argv, "cwd": os.getcwd()}
+    if os.environ.get(FILE_ENV):
+        request["file"] = os.environ[FILE_ENV]
+    if "-" in argv:
+        request["stdin"] = sys.stdin.read()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            # 套接字残留但服务已退出，回退为直接访问文件
+            if "stdin" in request:
+                sys.stdin = io.StringIO(request["stdin"])
+            return None
+        try:
+            sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+            with sock.makefile("rb") as f:
+                response = json.loads(f.readline())
+        except (OSError, ValueError) as e:
+            sys.stderr.write(f"错误: 与常驻服务的连接中断，命令可能已执行: {e}\n")
+            return 1
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["code"]
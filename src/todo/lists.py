@@ -0,0 +1,180 @@
+"""命名列表（分片）
+
+任务可以分属多个命名列表（项目），如 jd -L ops add "重启服务"。
+每个列表是单独的数据文件（分片），有各自的 ID 空间，命令只读写
+所在列表的分片，修改的开销与该列表的大小成正比，与其他列表无关：
+
+- 默认列表 default 仍是 ~/.jd/todo.json
+- 命名列表保存在 ~/.jd/lists/<名称>.json
+- 清单 ~/.jd/lists.json 记录已有的命名列表及其数据文件，
+  跨列表查询（jd list --all）据此找到各个分片，不必扫描目录
+
+列表在第一次写入时登记到清单。jd list --all 让每个分片各自排序
+（有 --limit 时只取前 offset+limit 个），再按排序键做 k 路归并，
+只取出需要显示的任务。
+"""
+
+import heapq
+import json
+import re
+from itertools import chain, islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from .manager import SORT_KEYS, TodoManager
+from .models import TodoItem
+from .storage import atomic_write, file_lock
+
+# 默认列表的名称，对应 ~/.jd/todo.json
+DEFAULT_LIST = "default"
+
+# 列表名：字母、数字（含中文等）、下划线和连字符
+_NAME_RE = re.compile(r"[\w-]+")
+
+
+def check_list_name(name: str) -> str:
+    """检查列表名
+
+    Args:
+        name: 列表名
+
+    Returns:
+        列表名
+
+    Raises:
+        ValueError: 列表名为空或包含字母、数字、下划线、连字符以外的字符时
+    """
+    if not _NAME_RE.fullmatch(name):
+        raise ValueError(f"无效的列表名: {name!r}（只能包含字母、数字、下划线和连字符）")
+    return name
+
+
+class TodoLists:
+    """命名列表的集合：按名称打开分片，跨分片查询"""
+
+    def __init__(self, base_dir: Optional[str] = None):
+        """
+        Args:
+            base_dir: 数据目录，默认 ~/.jd
+        """
+        if base_dir is None:
+            base_dir = Path.home() / ".jd"
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_path = self.base_dir / "lists.json"
+
+    def names(self) -> List[str]:
+        """全部列表名：默认列表在前，其余按名称排序"""
+        return [DEFAULT_LIST] + sorted(self._read_manifest())
+
+    def path(self, name: str) -> Path:
+        """列表的数据文件路径
+
+        Raises:
+            ValueError: 列表名无效时
+        """
+        check_list_name(name)
+        if name == DEFAULT_LIST:
+            return self.base_dir / "todo.json"
+        filename = self._read_manifest().get(name, f"lists/{name}.json")
+        return self.base_dir / filename
+
+    def manager(self, name: str = DEFAULT_LIST, **kwargs) -> TodoManager:
+        """打开列表的 TodoManager；新列表在第一次写入后登记到清单
+
+        Args:
+            name: 列表名
+            **kwargs: 传给 TodoManager 的其他参数（如 lazy=True）
+
+        Raises:
+            ValueError: 列表名无效时
+        """
+        filepath = self.path(name)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        manager = TodoManager(filepath=str(filepath), **kwargs)
+        if name != DEFAULT_LIST and name not in self._read_manifest():
+            def register(event: str, info: Dict) -> None:
+                if event in ("commit", "save"):
+                    unsubscribe()
+                    self._register(name, filepath)
+
+            unsubscribe = manager.subscribe(register)
+        return manager
+
+    def list_all(
+        self,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        status: Optional[str] = None,
+        priorities: Optional[List[str]] = None,
+    ) -> List[Tuple[str, TodoItem]]:
+        """列出所有列表中的任务
+
+        每个分片按 sort 取前 offset+limit 个任务，再 k 路归并；排序键
+        相同时（如不同列表中 ID 相同的任务）按列表顺序排列。
+
+        Args:
+            sort: 排序方式，p=优先级，i=ID；默认按列表顺序、列表内按存储顺序
+            limit: 最多返回的任务数，默认不限
+            offset: 跳过前 offset 个任务
+            status: 状态筛选，open=未完成，done=已完成
+            priorities: 只保留这些优先级的任务
+
+        Returns:
+            (列表名, 任务) 列表
+
+        Raises:
+            ValueError: 参数无效时
+        """
+        end = None if limit is None else offset + limit
+        shards = [
+            self._iter_shard(name, sort, end, status, priorities) for name in self.names()
+        ]
+        if sort is None:
+            merged = chain.from_iterable(shards)
+        else:
+            key = SORT_KEYS[sort]
+            merged = heapq.merge(*shards, key=lambda entry: key(entry[1]))
+        return list(islice(merged, offset, end))
+
+    def count_all(
+        self, status: Optional[str] = None, priorities: Optional[List[str]] = None
+    ) -> int:
+        """统计所有列表中的任务数，参数同 TodoManager.count"""
+        return sum(
+            self.manager(name, lazy=True).count(status=status, priorities=priorities)
+            for name in self.names()
+        )
+
+    def _iter_shard(
+        self,
+        name: str,
+        sort: Optional[str],
+        limit: Optional[int],
+        status: Optional[str],
+        priorities: Optional[List[str]],
+    ) -> Iterator[Tuple[str, TodoItem]]:
+        """按需打开分片，逐个产出 (列表名, 任务)"""
+        todos = self.manager(name, lazy=True).list(
+            sort=sort, limit=limit, status=status, priorities=priorities
+        )
+        for todo in todos:
+            yield name, todo
+
+    def _read_manifest(self) -> Dict[str, str]:
+        """读取清单：列表名 -> 数据文件（相对数据目录）"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)["lists"]
+        except FileNotFoundError:
+            return {}
+
+    def _register(self, name: str, filepath: Path) -> None:
+        """把列表登记到清单（持有清单的文件锁，避免并发登记互相覆盖）"""
+        with file_lock(self.manifest_path):
+            lists = self._read_manifest()
+            if name in lists:
+                return
+            lists[name] = filepath.relative_to(self.base_dir).as_posix()
+            data = json.dumps({"lists": lists}, ensure_ascii=False, indent=2)
+            atomic_write(self.manifest_path, lambda f: f.write(data))
@@ -3,22 +3,116 @@
 管理待办事项的增删改查和持久化
 """
 
-import json
+import heapq
 import os
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import List, Optional
-from .models import TodoItem
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from .models import PRIORITY_WEIGHT, VALID_PRIORITIES, TodoItem, TodoTable
+from .storage import CompactionStats, open_store
+
+if TYPE_CHECKING:
+    from .sync import SyncStats
+
+# 排序方式 -> 排序键：p=优先级（高在前，同级按 ID），i=ID
+SORT_KEYS = {
+    "p": lambda t: (-t.priority_weight, t.id),
+    "i": lambda t: t.id,
+}
+
+# 状态筛选 -> 任务的 done 值
+STATUSES = {"open": False, "done": True}
+
+# 优先级从高到低
+PRIORITY_ORDER = sorted(PRIORITY_WEIGHT, key=PRIORITY_WEIGHT.get, reverse=True)
+
+# 二级索引的分组键：(是否完成, 优先级)
+Bucket = Tuple[bool, str]
+
+# 事件订阅者：callback(事件名, 信息)，见 TodoManager.subscribe
+Hook = Callable[[str, Dict], None]
+
+# 组提交模式下有暂存修改的管理器；解释器退出前写入（见 TodoManager.flush）
+_UNFLUSHED: Set["TodoManager"] = set()
+
+
+@dataclass
+class CheckReport:
+    """一次完整验证（TodoManager.check）的结果"""
+
+    # 读入的任务数
+    items: int = 0
+    # 发现的问题，为空表示数据文件完好
+    problems: List[str] = field(default_factory=list)
+    # 校验和是否一致；后端没有校验和时为 None
+    checksum: Optional[bool] = None
+
+    @property
+    def ok(self) -> bool:
+        """数据文件是否完好"""
+        return not self.problems
+
+
+def format_ids(todo_ids: List[int], limit: int = 10) -> str:
+    """把任务 ID 列表格式化为错误信息中的文本，最多列出 limit 个
+
+    示例:
+        format_ids([3, 5]) -> "3, 5"
+    """
+    shown = ", ".join(str(todo_id) for todo_id in todo_ids[:limit])
+    if len(todo_ids) > limit:
+        shown += f" 等 {len(todo_ids)} 个"
+    return shown
+
+
+def _flush_at_exit() -> None:
+    """解释器退出前写入所有组提交暂存的修改"""
+    for manager in list(_UNFLUSHED):
+        manager.flush()
 
 
 class TodoManager:
     """待办事项管理器"""
 
-    def __init__(self, filepath: str | None = None):
+    def __init__(
+        self,
+        filepath: str | None = None,
+        store=None,
+        lazy: bool = False,
+        flush_every: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        durable: bool = True,
+        codec: Optional[str] = None,
+    ):
         """初始化管理器
 
+        指定 flush_every 或 flush_interval 时启用组提交：修改立即作用于
+        内存中的任务，写入暂存起来，累计 flush_every 个修改、或第一个修改
+        之后 flush_interval 秒（由后台线程）一次性写入；也可以调用 flush()
+        立即写入，解释器正常退出前会自动写入。组提交模式预先加载全部任务。
+
         Args:
             filepath: 数据文件路径，默认 ~/.jd/todo.json
+            store: 存储后端，默认按 filepath 扩展名选择（见 storage.open_store）
+            lazy: 为 True 时不预先加载全部任务，首次需要时才加载；
+                只追加的后端（如 .jdlog）添加任务时只读取最大 ID
+            flush_every: 组提交：暂存的修改达到该数量时写入
+            flush_interval: 组提交：暂存修改后最多等待的秒数
+            durable: 为 False 时写入后不调用 fsync，吞吐量更高，但断电或
+                系统崩溃时可能丢失最近写入的修改
+            codec: 新数据文件的格式（storage.CODECS 的键，如 "json-compact"、
+                "marshal"），默认按扩展名选择；已存在的文件按其记录的格式读写
+
+        Raises:
+            ValueError: flush_every 或 flush_interval 不是正数，或 codec 未知时
         """
+        if flush_every is not None and flush_every < 1:
+            raise ValueError("flush_every 必须为正整数")
+        if flush_interval is not None and flush_interval <= 0:
+            raise ValueError("flush_interval 必须为正数")
         if filepath is None:
             # 使用用户主目录下的 .jd 目录
             config_dir = Path.home() / ".jd"
@@ -26,20 +120,98 @@ class TodoManager:
             filepath = str(config_dir / "todo.json")
 
         self.filepath = Path(filepath)
-        self.todos: List[TodoItem] = []
-        self._next_id: int = 1
-        self._load()
+        self._store = store if store is not None else open_store(self.filepath, codec=codec)
+        self._store.durable = durable
+        # ID -> 任务，保持插入顺序；尚未加载时为 None。
+        # 支持按需查询的后端（如 SQLite）不预先加载全部任务
+        self._items: Optional[Dict[int, TodoItem]] = None
+        # 二级索引：(是否完成, 优先级) -> 任务 ID 集合，与 _items 一起维护，
+        # 按状态/优先级筛选和计数时只访问相关的分组
+        self._buckets: Dict[Bucket, Set[int]] = {}
+        # 优先级队列：优先级 -> 未完成任务 ID 的最小堆，与 _items 一起维护，
+        # peek_next 取堆顶即可；完成或删除的 ID 留在堆中，取堆顶时才清除
+        self._queues: Dict[str, List[int]] = {}
+        self._next_id: Optional[int] = None
+        # 尚未提交的修改操作：batch() 期间暂存、退出时一次性提交；
+        # 提交失败时放回，下次提交或 flush() 时重试
+        self._pending: List[tuple] = []
+        # batch() 的嵌套层数
+        self._batch_depth = 0
+        # 最近一次读写时数据文件的版本戳，用于发现其他进程的修改
+        self._stamp = None
+        # 全文搜索索引，首次使用时创建（见 search.SearchIndex）
+        self._search = None
+        # 同步状态，首次使用时创建（见 sync.SyncState）
+        self._sync = None
+        # 组提交：暂存的修改、触发写入的条件、后台写入定时器
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer: Optional[List[tuple]] = None
+        self._timer = None
+        self._mutex = None
+        # 事件订阅者（见 subscribe）
+        self._hooks: List[Hook] = []
+        if flush_every is not None or flush_interval is not None:
+            import atexit
+            import threading
+
+            self._buffer = []
+            self._mutex = threading.RLock()
+            atexit.unregister(_flush_at_exit)
+            atexit.register(_flush_at_exit)
+            # 暂存的修改要对之后的读取可见，按需查询的后端也预先加载
+            self._load()
+        elif not (lazy or self._store.lazy):
+            self._load()
+        else:
+            # 按需模式记下当前版本戳，文件未被修改时第一次写入不必重新读取
+            self._stamp = self._store.stamp()
+
+    @property
+    def todos(self) -> List[TodoItem]:
+        """全部任务（首次访问时加载）"""
+        if self._items is None:
+            self._load()
+        return list(self._items.values())
+
+    @todos.setter
+    def todos(self, todos: List[TodoItem]) -> None:
+        self._items = {}
+        self._buckets = {(done, p): set() for done in (False, True) for p in PRIORITY_ORDER}
+        self._queues = {p: [] for p in PRIORITY_ORDER}
+        for todo in todos:
+            self._insert(todo)
 
     def _load(self) -> None:
         """从文件加载数据"""
-        if self.filepath.exists():
-            with open(self.filepath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.todos = [TodoItem.from_dict(item) for item in data.get("todos", [])]
+        start = time.perf_counter()
+        self._stamp = self._store.stamp()
+        self.todos = self._store.load()
+
+        # 更新 next_id 为最大 ID + 1
+        self._next_id = max(self._items, default=0) + 1
+        self._emit("load", start, items=len(self._items), bytes=self._file_size())
+
+    def subscribe(self, callback: Hook) -> Callable[[], None]:
+        """订阅存储事件，用于导出指标或诊断性能
+
+        callback(event, info) 在事件完成后同步调用（组提交的后台写入
+        在后台线程中调用）。info["elapsed"] 为耗时（秒），其余字段随事件而定：
 
-            # 更新 next_id 为最大 ID + 1
-            if self.todos:
-                self._next_id = max(todo.id for todo in self.todos) + 1
+        - load    : items（加载的任务数）、bytes（数据文件字节数）
+        - commit  : ops（提交的修改数）、bytes（提交后的文件字节数）
+        - save    : items、bytes
+        - compact : records（折叠的记录数）、bytes
+        - search  : results（返回的任务数）
+
+        Args:
+            callback: 事件回调
+
+        Returns:
+            取消订阅的函数
+        """
+        self._hooks.append(callback)
+        return lambda: self._hooks.remove(callback)
 
     def add(self, text: str, priority: str = "medium") -> TodoItem:
         """添加新任务
@@ -57,40 +229,247 @@ class TodoManager:
         if not text or not text.strip():
             raise ValueError("文本不能为空")
 
-        todo = TodoItem(
-            id=self._next_id,
-            text=text.strip(),
-            done=False,
-            priority=priority,
-        )
-        self.todos.append(todo)
-        self._next_id += 1
-        self.save()
+        with self._guard():
+            self._require_items()
+            if self._next_id is None:
+                self._next_id = self._store.max_id() + 1
+
+            todo = TodoItem(
+                id=self._next_id,
+                text=text.strip(),
+                done=False,
+                priority=priority,
+            )
+            if self._items is not None:
+                self._insert(todo)
+            self._next_id += 1
+            self._commit(("add", todo))
         return todo
 
-    def list(self) -> List[TodoItem]:
-        """列出所有任务
+    def add_many(self, texts: Iterable[str], priority: str = "medium") -> List[TodoItem]:
+        """批量添加任务，只写入一次
+
+        Args:
+            texts: 任务文本
+            priority: 优先级 (low/medium/high)，默认 medium
+
+        Returns:
+            新创建的 TodoItem 列表
+
+        Raises:
+            ValueError: 任一文本为空或优先级无效时（此时不添加任何任务）
+        """
+        texts = list(texts)
+        if any(not text or not text.strip() for text in texts):
+            raise ValueError("文本不能为空")
+        if priority not in VALID_PRIORITIES:
+            raise ValueError(f"优先级必须是 {VALID_PRIORITIES} 之一")
+
+        with self.batch():
+            return [self.add(text, priority=priority) for text in texts]
+
+    def list(
+        self,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        status: Optional[str] = None,
+        priorities: Optional[Iterable[str]] = None,
+    ) -> List[TodoItem]:
+        """列出任务
+
+        指定 limit 时只保留前 offset + limit 个任务：不排序时读到即停，
+        排序时用堆选出前 k 个（heapq.nsmallest），不对全部任务排序。
+
+        按状态或优先级筛选时，已加载的任务只取二级索引中相关的分组，
+        耗时与结果数量成正比；未加载时逐个读取并过滤。
+
+        Args:
+            sort: 排序方式，p=优先级，i=ID；默认保持存储顺序
+            limit: 最多返回的任务数，默认不限
+            offset: 跳过的任务数
+            status: 只列出 open（未完成）或 done（已完成）的任务，默认不限
+            priorities: 只列出这些优先级的任务，默认不限
 
         Returns:
             TodoItem 列表
+
+        Raises:
+            ValueError: 状态或优先级无效时
         """
-        return self.todos.copy()
+        filtered = status is not None or priorities is not None
+        buckets = self._bucket_keys(status, priorities)
+        self._refresh()
+        if self._items is None and self._store.lazy:
+            # 筛选、排序与分页交给后端的索引完成
+            return self._store.query(
+                sort=sort,
+                limit=limit,
+                offset=offset,
+                done=None if status is None else STATUSES[status],
+                priorities=None if priorities is None else {p for _, p in buckets},
+            )
+        if filtered and self._items is not None:
+            return self._list_buckets(buckets, sort, limit, offset)
 
-    def mark_done(self, todo_id: int) -> None:
-        """标记任务为完成
+        todos = self.iter_todos()
+        if filtered:
+            wanted = set(buckets)
+            todos = (todo for todo in todos if (todo.done, todo.priority) in wanted)
+        if limit is None:
+            if sort is not None:
+                todos = iter(sorted(todos, key=SORT_KEYS[sort]))
+            return list(islice(todos, offset, None))
+        if sort is None:
+            return list(islice(todos, offset, offset + limit))
+        return heapq.nsmallest(offset + limit, todos, key=SORT_KEYS[sort])[offset:]
+
+    def count(
+        self,
+        status: Optional[str] = None,
+        priorities: Optional[Iterable[str]] = None,
+    ) -> int:
+        """统计任务数，不创建任务对象
+
+        已加载时读取二级索引各分组的大小，否则读取存储后端的计数
+        （如 JSON 文件头、SQLite 计数表）。
+
+        Args:
+            status: 只统计 open（未完成）或 done（已完成）的任务，默认不限
+            priorities: 只统计这些优先级的任务，默认不限
+
+        Returns:
+            任务数
+
+        Raises:
+            ValueError: 状态或优先级无效时
+        """
+        buckets = self._bucket_keys(status, priorities)
+        self._refresh()
+        if self._items is not None:
+            return sum(len(self._buckets[bucket]) for bucket in buckets)
+        counts = self._store.counts()
+        return sum(counts.get(bucket, 0) for bucket in buckets)
+
+    def peek_next(self, limit: int = 1) -> List[TodoItem]:
+        """最重要的未完成任务：优先级最高、同一优先级中 ID 最小的在前
+
+        已加载时从各优先级的未完成任务堆中取出，耗时为 O(limit · log N)，
+        与任务总数无关；按需查询的后端（如 SQLite）未加载时由后端的
+        索引完成。
+
+        Args:
+            limit: 最多返回的任务数，默认 1
+
+        Returns:
+            TodoItem 列表（没有未完成任务时为空）
+        """
+        self._refresh()
+        if limit < 1:
+            return []
+        if self._items is None:
+            if self._store.lazy:
+                return self._store.query(sort="p", limit=limit, done=False)
+            self._load()
+        ids: List[int] = []
+        for priority in PRIORITY_ORDER:
+            ids.extend(self._queue_head(priority, limit - len(ids)))
+            if len(ids) >= limit:
+                break
+        return [self._items[todo_id] for todo_id in ids]
+
+    def iter_todos(self) -> Iterator[TodoItem]:
+        """逐个产生全部任务（存储顺序）
+
+        尚未加载时由存储后端增量读取，不建立内存索引。
+        """
+        if self._items is None:
+            return self._store.iter_todos()
+        return iter(list(self._items.values()))
+
+    def table(self) -> TodoTable:
+        """把全部任务转换为列式表，适合对大量任务做排序与筛选
+
+        Returns:
+            TodoTable（按 ID 升序）
+        """
+        return TodoTable.from_items(self.iter_todos())
+
+    def get(self, todo_id: int) -> TodoItem:
+        """按 ID 获取任务
 
         Args:
             todo_id: 任务 ID
 
+        Returns:
+            对应的 TodoItem
+
         Raises:
             ValueError: 任务不存在时
         """
+        self._refresh()
         todo = self._find_todo(todo_id)
         if todo is None:
             raise ValueError(f"任务不存在: ID {todo_id}")
+        return todo
 
-        todo.done = True
-        self.save()
+    def search(self, query: str, limit: Optional[int] = None) -> List[TodoItem]:
+        """全文搜索任务文本
+
+        使用数据文件旁的倒排索引（<数据文件>.idx）：第一次搜索时建立，
+        之后随每次修改增量更新；发现索引过期时先重建。
+
+        Args:
+            query: 查询词，空白分隔，任务需包含全部查询词（不区分大小写）
+            limit: 最多返回的任务数，默认不限
+
+        Returns:
+            匹配的 TodoItem 列表（按 ID 升序）
+        """
+        start = time.perf_counter()
+        index = self._search_index()
+        with self._guard(), self._store.lock():
+            self._refresh()
+            if not index.is_fresh(self._stamp):
+                index.rebuild(self.iter_todos(), self._stamp)
+        results = index.search(query, limit=limit)
+        self._emit("search", start, results=len(results))
+        return results
+
+    def mark_done(self, todo_id: int) -> None:
+        """标记任务为完成
+
+        Args:
+            todo_id: 任务 ID
+
+        Raises:
+            ValueError: 任务不存在时
+        """
+        with self._guard():
+            todo = self.get(todo_id)
+            if self._items is not None:
+                self._set_done(todo)
+            todo.done = True
+            self._commit(("done", todo_id))
+
+    def mark_done_many(self, todo_ids: Iterable[int], missing_ok: bool = False) -> List[int]:
+        """批量标记任务为完成，只写入一次
+
+        Args:
+            todo_ids: 任务 ID
+            missing_ok: 为 True 时跳过不存在的任务，其余照常标记
+
+        Returns:
+            跳过的不存在的任务 ID（missing_ok 为 False 时总是为空）
+
+        Raises:
+            ValueError: missing_ok 为 False 且有任务不存在时（此时不修改任何任务）
+        """
+        todo_ids, missing = self._check_ids(todo_ids, missing_ok)
+        with self.batch():
+            for todo_id in todo_ids:
+                self.mark_done(todo_id)
+        return missing
 
     def delete(self, todo_id: int) -> None:
         """删除任务
@@ -101,25 +480,543 @@ class TodoManager:
         Raises:
             ValueError: 任务不存在时
         """
-        todo = self._find_todo(todo_id)
-        if todo is None:
-            raise ValueError(f"任务不存在: ID {todo_id}")
+        with self._guard():
+            self.get(todo_id)
+            if self._items is not None:
+                self._remove(todo_id)
+            self._commit(("delete", todo_id))
 
-        self.todos.remove(todo)
-        self.save()
+    def delete_many(self, todo_ids: Iterable[int], missing_ok: bool = False) -> List[int]:
+        """批量删除任务，只写入一次
+
+        Args:
+            todo_ids: 任务 ID
+            missing_ok: 为 True 时跳过不存在的任务，其余照常删除
+
+        Returns:
+            跳过的不存在的任务 ID（missing_ok 为 False 时总是为空）
+
+        Raises:
+            ValueError: missing_ok 为 False 且有任务不存在时（此时不删除任何任务）
+        """
+        todo_ids, missing = self._check_ids(todo_ids, missing_ok)
+        with self.batch():
+            for todo_id in todo_ids:
+                self.delete(todo_id)
+        return missing
+
+    @contextmanager
+    def batch(self) -> Iterator["TodoManager"]:
+        """批量修改：期间的所有修改在退出时一次性提交给存储后端
+
+        可以嵌套，只在最外层退出时提交。提交失败时修改留在暂存中
+        （内存中的任务已经修改），下次提交或调用 flush() 时重试。
+
+        示例:
+            with manager.batch():
+                for text in texts:
+                    manager.add(text)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._submit_pending()
 
     def clear(self) -> None:
         """清除所有已完成的任务"""
-        self.todos = [todo for todo in self.todos if not todo.done]
-        self.save()
+        with self._guard():
+            self._require_items()
+            if self._items is not None:
+                self._clear_done()
+            self._commit(("clear",))
+
+    def flush(self) -> None:
+        """立即写入暂存的修改（组提交暂存的，以及之前提交失败的）；没有时无操作
+
+        写入失败时暂存的修改保留，并重新安排后台写入（指定了 flush_interval 时），
+        不必等到下一次修改或解释器退出。
+        """
+        if not self._batch_depth:
+            self._submit_pending()
+        if self._buffer is None:
+            return
+        with self._mutex:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            ops, self._buffer = self._buffer, []
+            if not ops:
+                return
+            try:
+                self._write(ops)
+            except BaseException:
+                self._buffer[:0] = ops
+                self._schedule_flush()
+                raise
+            _UNFLUSHED.discard(self)
 
     def save(self) -> None:
-        """保存数据到文件"""
-        data = {
-            "todos": [todo.to_dict() for todo in self.todos]
-        }
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        """保存数据到文件（整体重写）"""
+        start = time.perf_counter()
+        with self._guard(), self._store.lock():
+            if self._items is None:
+                self._load()
+            self._store.save(self._values())
+            self._stamp = self._store.stamp()
+        self._emit("save", start, items=len(self._items), bytes=self._file_size())
+
+    def compact(self) -> Optional[CompactionStats]:
+        """压缩存储（把操作日志折叠为快照）
+
+        Returns:
+            压缩统计信息；后端无需压缩时返回 None
+        """
+        start = time.perf_counter()
+        with self._guard(), self._store.lock():
+            self._refresh()
+            before = self._stamp
+            stats = self._store.compact(self._values())
+            self._stamp = self._store.stamp()
+            # 压缩不改变任务，只需更新索引记录的版本戳
+            self._update_search_index([], before)
+            self._update_sync_state([], before)
+        self._emit(
+            "compact", start,
+            records=0 if stats is None else stats.records_folded, bytes=self._file_size(),
+        )
+        return stats
+
+    def check(self) -> CheckReport:
+        """完整验证数据文件（jd check）
+
+        平时加载本程序写入的文件时跳过逐个验证（见 Store.strict）；
+        这里逐个验证全部任务，并核对 ID 是否重复、文件头中记录的
+        最大 ID 与各状态、优先级的任务数是否与实际一致。
+        先写入组提交暂存的修改。
+
+        Returns:
+            验证结果
+        """
+        self.flush()
+        report = CheckReport()
+        store = self._store
+        with store.lock():
+            store.strict = True
+            try:
+                todos = store.load()
+            except (ValueError, KeyError, TypeError) as e:
+                report.problems.append(f"无法读取任务: {e}")
+                return report
+            finally:
+                store.strict = False
+            report.items = len(todos)
+            checksum_ok = getattr(store, "checksum_ok", None)
+            if checksum_ok is not None:
+                report.checksum = checksum_ok()
+            irregular_lines = getattr(store, "irregular_lines", None)
+            if irregular_lines is not None:
+                for number in irregular_lines():
+                    report.problems.append(f"第 {number} 行不是规范格式（下次写入时整体重写）")
+
+            counts: Dict[Bucket, int] = {}
+            seen: Set[int] = set()
+            for todo in todos:
+                if todo.id in seen:
+                    report.problems.append(f"任务 ID {todo.id} 重复")
+                seen.add(todo.id)
+                key = (todo.done, todo.priority)
+                counts[key] = counts.get(key, 0) + 1
+            if store.max_id() < max(seen, default=0):
+                report.problems.append("记录的最大 ID 小于实际的最大 ID，新任务的 ID 会重复")
+            recorded_counts = getattr(store, "recorded_counts", store.counts)
+            recorded = {key: count for key, count in recorded_counts().items() if count}
+            if recorded != counts:
+                report.problems.append("记录的任务数与实际不符")
+        return report
+
+    def sync_with(self, filepath: str) -> "SyncStats":
+        """与另一个数据文件同步，双方交换上次同步以来的修改
+
+        合并规则见 sync 模块：任务状态只会前进（未完成 -> 已完成 -> 已删除），
+        对端新增的任务按本地的 ID 序列分配 ID。
+
+        Args:
+            filepath: 对端数据文件路径，格式按其内容或扩展名决定
+
+        Returns:
+            同步统计信息（sync.SyncStats）
+
+        Raises:
+            ValueError: 对端文件不存在或与本地是同一个文件时
+        """
+        from .sync import sync
+
+        if not Path(filepath).exists():
+            raise ValueError(f"文件不存在: {filepath}")
+        self.flush()
+        return sync(self, TodoManager(filepath=filepath, lazy=True))
+
+    def export_to(self, filepath: str, sync: bool = False) -> None:
+        """导出全部任务到另一个文件
+
+        Args:
+            filepath: 目标文件路径，格式按扩展名决定（如 .json）
+            sync: 为 True 时同时为双方建立同步状态（见 sync 模块），
+                之后双方删除的任务在同步时不会被加回；建立后每次提交都要
+                更新同步状态，因此只在副本要在别处修改、再同步回来时使用
+        """
+        open_store(Path(filepath)).save(self.todos)
+        if sync:
+            from .sync import track
+
+            self.flush()
+            track(self)
+            track(TodoManager(filepath=filepath, lazy=True))
+
+    def import_from(self, filepath: str) -> int:
+        """从另一个文件导入任务，替换当前全部任务
+
+        Args:
+            filepath: 源文件路径，格式按扩展名决定（如 .json）
+
+        Returns:
+            导入的任务数
+
+        Raises:
+            ValueError: 源文件不存在时
+        """
+        source = Path(filepath)
+        if not source.exists():
+            raise ValueError(f"文件不存在: {filepath}")
+
+        self.todos = open_store(source).load()
+        self._next_id = max(self._items, default=0) + 1
+        self.save()
+        return len(self._items)
+
+    def _commit(self, op: tuple) -> None:
+        """把一次修改提交给存储后端
+
+        Args:
+            op: 修改操作，如 ("done", 3)
+        """
+        self._pending.append(op)
+        if not self._batch_depth:
+            self._submit_pending()
+
+    def _submit_pending(self) -> None:
+        """提交暂存的修改；失败时放回暂存，留待下次重试"""
+        ops, self._pending = self._pending, []
+        if not ops:
+            return
+        try:
+            self._submit(ops)
+        except BaseException:
+            # 组提交模式下修改已进入 _buffer，由 flush() 负责保留
+            if self._buffer is None:
+                self._pending[:0] = ops
+            raise
+
+    def _submit(self, ops: List[tuple]) -> None:
+        """写入一组修改；组提交模式下暂存，达到条件时再写入"""
+        if self._buffer is None:
+            self._write(ops)
+            return
+        with self._mutex:
+            self._buffer.extend(ops)
+            _UNFLUSHED.add(self)
+            if self.flush_every is not None and len(self._buffer) >= self.flush_every:
+                self.flush()
+            else:
+                self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """指定了 flush_interval 且尚未安排时，安排后台线程在 flush_interval 秒后写入"""
+        if self.flush_interval is None or self._timer is not None:
+            return
+        import threading
+
+        self._timer = threading.Timer(self.flush_interval, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _guard(self):
+        """组提交模式下的互斥锁，否则为空上下文
+
+        修改内存中的任务与写入（可能在后台线程中）都持有它，写入时
+        不会遇到正在修改的任务表。顺序总是先持有它、再持有文件锁。
+        """
+        return self._mutex if self._mutex is not None else nullcontext()
+
+    def _write(self, ops: List[tuple]) -> None:
+        """持有文件锁写入修改
+
+        如果数据文件在上次读写之后被其他进程修改过，先重新加载，
+        再把本次修改重放到最新数据上，避免覆盖其他进程的写入。
+        """
+        start = time.perf_counter()
+        with self._guard(), self._store.lock():
+            if self._store.stamp() != self._stamp:
+                self._merge(ops)
+            before = self._stamp
+            self._store.commit(ops, self._values())
+            self._stamp = self._store.stamp()
+            self._update_search_index(ops, before)
+            self._update_sync_state(ops, before)
+        self._emit("commit", start, ops=len(ops), bytes=self._file_size())
+
+    def _emit(self, event: str, start: float, **info) -> None:
+        """通知事件订阅者
+
+        Args:
+            event: 事件名
+            start: 事件开始时的 time.perf_counter()
+            **info: 事件信息
+        """
+        if not self._hooks:
+            return
+        info["elapsed"] = time.perf_counter() - start
+        for callback in list(self._hooks):
+            callback(event, info)
+
+    def _file_size(self) -> int:
+        """最近一次读写时数据文件的字节数（取自版本戳，不存在时为 0）"""
+        return self._stamp[1] if self._stamp else 0
+
+    def _refresh(self) -> None:
+        """数据文件被其他进程修改过时重新加载
+
+        尚未写入的修改（batch() 或组提交暂存的）重放到重新加载的数据上，
+        不会因重新加载而丢失。
+        """
+        if self._store.stamp() == self._stamp:
+            return
+        with self._guard():
+            if self._items is not None:
+                self._load()
+            else:
+                self._next_id = None
+                self._stamp = self._store.stamp()
+            self._replay((self._buffer or []) + self._pending)
+
+    def _merge(self, ops: List[tuple]) -> None:
+        """重新加载最新数据，并把已在内存中执行的修改重放上去"""
+        self._stamp = None
+        self._refresh()
+        self._replay(ops)
+
+    def _replay(self, ops: List[tuple]) -> None:
+        """把已在内存中执行的修改重放到重新加载的数据上
+
+        新增任务的 ID 如果已被其他进程占用，改为分配新的 ID。
+        """
+        for op in ops:
+            kind = op[0]
+            if kind == "add":
+                todo = op[1]
+                if self._next_id is None:
+                    self._next_id = self._store.max_id() + 1
+                if todo.id < self._next_id:
+                    todo.id = self._next_id
+                self._next_id = todo.id + 1
+                if self._items is not None:
+                    self._insert(todo)
+            elif self._items is None:
+                # 未加载全部任务时，修改由后端直接作用在最新数据上
+                continue
+            elif kind == "done":
+                if op[1] in self._items:
+                    self._set_done(self._items[op[1]])
+            elif kind == "delete":
+                if op[1] in self._items:
+                    self._remove(op[1])
+            elif kind == "clear":
+                self._clear_done()
+
+    def _search_index(self):
+        """全文搜索索引（按需导入 search 模块）"""
+        if self._search is None:
+            from .search import SearchIndex
+
+            self._search = SearchIndex(self._sidecar(".idx"))
+        return self._search
+
+    def _sidecar(self, suffix: str) -> Path:
+        """数据文件旁的辅助文件路径（如 todo.json.idx）"""
+        filepath = self._store.filepath
+        return filepath.with_name(filepath.name + suffix)
+
+    def _update_search_index(self, ops: List[tuple], before) -> None:
+        """已建立搜索索引时，把本次提交的修改同步到索引
+
+        Args:
+            ops: 已提交的修改操作
+            before: 提交前数据文件的版本戳
+        """
+        # 先检查索引文件，没有时不导入 search 模块（拖慢每次提交）
+        if self._search is None and not os.path.exists(self._sidecar(".idx")):
+            return
+        index = self._search_index()
+        if index.exists():
+            index.apply(ops, before, self._stamp)
+
+    def _sync_state(self):
+        """同步状态（按需导入 sync 模块）"""
+        if self._sync is None:
+            from .sync import SyncState
+
+            self._sync = SyncState(self._sidecar(".sync"))
+        return self._sync
+
+    def _update_sync_state(self, ops: List[tuple], before) -> None:
+        """同步过的数据文件，把本次提交的修改记入同步状态
+
+        Args:
+            ops: 已提交的修改操作
+            before: 提交前数据文件的版本戳
+        """
+        # 从未同步过时没有同步状态文件，不导入 sync 模块
+        if self._sync is None and not os.path.exists(self._sidecar(".sync")):
+            return
+        state = self._sync_state()
+        if state.exists():
+            state.apply(ops, before, self._stamp)
+
+    def _insert(self, todo: TodoItem) -> None:
+        """把任务加入 ID 索引与二级索引"""
+        self._items[todo.id] = todo
+        self._buckets[(todo.done, todo.priority)].add(todo.id)
+        if not todo.done:
+            heapq.heappush(self._queues[todo.priority], todo.id)
+
+    def _set_done(self, todo: TodoItem) -> None:
+        """标记已加载的任务为完成，并移到对应的分组"""
+        if not todo.done:
+            self._buckets[(False, todo.priority)].discard(todo.id)
+            self._buckets[(True, todo.priority)].add(todo.id)
+            todo.done = True
+
+    def _remove(self, todo_id: int) -> None:
+        """从 ID 索引与二级索引中删除任务"""
+        todo = self._items.pop(todo_id)
+        self._buckets[(todo.done, todo.priority)].discard(todo_id)
+
+    def _clear_done(self) -> None:
+        """删除已加载的全部已完成任务（只访问已完成分组）"""
+        for priority in PRIORITY_ORDER:
+            done = self._buckets[(True, priority)]
+            for todo_id in done:
+                del self._items[todo_id]
+            done.clear()
+
+    def _queue_head(self, priority: str, limit: int) -> List[int]:
+        """某优先级未完成任务中 ID 最小的 limit 个（ID 升序）
+
+        堆中已完成或已删除的 ID 在位于堆顶时弹出；这类 ID 多于未完成
+        任务时重建堆，堆的大小与未完成任务数保持同一量级。
+        不弹出有效的 ID，按堆的层次向下取前 limit 个。
+        """
+        heap = self._queues[priority]
+        live = self._buckets[(False, priority)]
+        if len(heap) > 2 * len(live) + 64:
+            heap[:] = live
+            heapq.heapify(heap)
+        while heap and heap[0] not in live:
+            heapq.heappop(heap)
+        ids: List[int] = []
+        # 删除后复用的 ID 可能在堆中出现两次
+        seen: Set[int] = set()
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier and len(ids) < limit:
+            todo_id, i = heapq.heappop(frontier)
+            if todo_id in live and todo_id not in seen:
+                seen.add(todo_id)
+                ids.append(todo_id)
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+        return ids
+
+    def _bucket_keys(
+        self, status: Optional[str], priorities: Optional[Iterable[str]]
+    ) -> List[Bucket]:
+        """把筛选条件转换为二级索引的分组键（优先级从高到低）
+
+        Raises:
+            ValueError: 状态或优先级无效时
+        """
+        if status is None:
+            dones = [False, True]
+        elif status in STATUSES:
+            dones = [STATUSES[status]]
+        else:
+            raise ValueError(f"状态必须是 {set(STATUSES)} 之一")
+        if priorities is None:
+            wanted = PRIORITY_ORDER
+        else:
+            wanted = set(priorities)
+            if not wanted <= VALID_PRIORITIES:
+                raise ValueError(f"优先级必须是 {VALID_PRIORITIES} 之一")
+        return [(done, p) for p in PRIORITY_ORDER if p in wanted for done in dones]
+
+    def _list_buckets(
+        self,
+        buckets: List[Bucket],
+        sort: Optional[str],
+        limit: Optional[int],
+        offset: int,
+    ) -> List[TodoItem]:
+        """从二级索引中取出筛选结果（只排序结果本身）"""
+        if sort == "p":
+            ids: List[int] = []
+            for priority in PRIORITY_ORDER:
+                ids.extend(sorted(
+                    todo_id
+                    for done, p in buckets if p == priority
+                    for todo_id in self._buckets[(done, p)]
+                ))
+        else:
+            ids = sorted(todo_id for bucket in buckets for todo_id in self._buckets[bucket])
+        end = None if limit is None else offset + limit
+        return [self._items[todo_id] for todo_id in ids[offset:end]]
+
+    def _require_items(self) -> None:
+        """提交修改需要全部任务的后端（如 JSON），在修改前加载"""
+        if self._items is None and self._store.needs_items:
+            self._load()
+
+    def _values(self):
+        """当前全部任务的只读视图，未加载时为 None（不复制列表）"""
+        return None if self._items is None else self._items.values()
+
+    def _check_ids(
+        self, todo_ids: Iterable[int], missing_ok: bool = False
+    ) -> Tuple[List[int], List[int]]:
+        """去重并检查任务是否存在
+
+        Args:
+            todo_ids: 任务 ID
+            missing_ok: 为 False 时有任务不存在即报错
+
+        Returns:
+            (存在的任务 ID, 不存在的任务 ID)，均去重并保持原顺序
+
+        Raises:
+            ValueError: missing_ok 为 False 且有任务不存在时
+        """
+        found, missing = [], []
+        self._refresh()
+        for todo_id in dict.fromkeys(todo_ids):
+            if self._find_todo(todo_id) is None:
+                missing.append(todo_id)
+            else:
+                found.append(todo_id)
+        if missing and not missing_ok:
+            raise ValueError(f"任务不存在: ID {format_ids(missing)}")
+        return found, missing
 
     def _find_todo(self, todo_id: int) -> Optional[TodoItem]:
         """查找任务
@@ -130,7 +1027,8 @@ class TodoManager:
         Returns:
             找到的 TodoItem 或 None
         """
-        for todo in self.todos:
-            if todo.id == todo_id:
-                return todo
-        return None
+        if self._items is None:
+            if self._store.lazy:
+                return self._store.get(todo_id)
+            self._load()
+        return self._items.get(todo_id)
@@ -1,10 +1,15 @@
 """数据模型定义
 
-TodoItem - 单个待办事项数据模型
+TodoItem  - 单个待办事项数据模型
+TodoTable - 列式任务表，用于大量任务的排序与筛选
 """
 
-from dataclasses import dataclass, field
-from typing import Dict
+import sys
+from array import array
+from dataclasses import dataclass
+from enum import IntEnum
+from itertools import compress
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 # 有效的优先级值
 VALID_PRIORITIES = {"low", "medium", "high"}
@@ -16,15 +21,34 @@ PRIORITY_EMOJI = {
     "high": "🔴",
 }
 
+
+class Priority(IntEnum):
+    """优先级，值即排序权重"""
+
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+    @property
+    def label(self) -> str:
+        """优先级名称，如 "high" """
+        return self.name.lower()
+
+
 # 优先级排序权重
-PRIORITY_WEIGHT = {
-    "low": 1,
-    "medium": 2,
-    "high": 3,
-}
+PRIORITY_WEIGHT = {priority.label: priority for priority in Priority}
+
+# 优先级名称的唯一实例：从文件读入的字符串替换为它，所有任务共用同一对象
+_PRIORITY_NAMES = {name: name for name in PRIORITY_WEIGHT}
+
+# Python 3.10+ 使用 __slots__，去掉每个实例的 __dict__
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
+# 不经 __init__ 创建实例（见 trusted_item）
+_new_item = object.__new__
 
-@dataclass
+
+@dataclass(**_DATACLASS_OPTIONS)
 class TodoItem:
     """待办事项数据模型"""
 
@@ -41,6 +65,7 @@ class TodoItem:
             raise ValueError("文本不能为空")
         if self.priority not in VALID_PRIORITIES:
             raise ValueError(f"优先级必须是 {VALID_PRIORITIES} 之一")
+        self.priority = _PRIORITY_NAMES[self.priority]
 
     def to_dict(self) -> Dict:
         """转换为字典格式
@@ -89,3 +114,171 @@ class TodoItem:
             优先级权重，用于排序
         """
         return PRIORITY_WEIGHT.get(self.priority, 0)
+
+
+def trusted_item(todo_id: int, text: str, done: bool, priority: str) -> TodoItem:
+    """创建任务，跳过 __post_init__ 的验证
+
+    只用于本程序写入、且已通过校验和或格式版本确认的数据。
+    priority 必须是有效的优先级名称。
+    """
+    todo = _new_item(TodoItem)
+    todo.id = todo_id
+    todo.text = text
+    todo.done = done
+    todo.priority = _PRIORITY_NAMES[priority]
+    return todo
+
+
+def trusted_items(records: Iterable[Dict]) -> List[TodoItem]:
+    """由可信的字典记录批量创建任务，跳过逐个验证（见 trusted_item）
+
+    记录必须包含 id、text、done、priority 四个字段（本程序写入的格式）。
+    约为 TodoItem.from_dict 耗时的一半。
+    """
+    new, cls, names = _new_item, TodoItem, _PRIORITY_NAMES
+    todos = []
+    append = todos.append
+    for record in records:
+        todo = new(cls)
+        todo.id = record["id"]
+        todo.text = record["text"]
+        todo.done = record["done"]
+        todo.priority = names[record["priority"]]
+        append(todo)
+    return todos
+
+
+def trusted_rows(rows: Iterable[Tuple[int, str, bool, str]]) -> List[TodoItem]:
+    """由可信的 (id, text, done, priority) 元组批量创建任务，跳过逐个验证（见 trusted_item）"""
+    new, cls, names = _new_item, TodoItem, _PRIORITY_NAMES
+    todos = []
+    append = todos.append
+    for todo_id, text, done, priority in rows:
+        todo = new(cls)
+        todo.id = todo_id
+        todo.text = text
+        todo.done = done
+        todo.priority = names[priority]
+        append(todo)
+    return todos
+
+
+class TodoTable:
+    """列式任务表
+
+    用平行数组保存任务：ids（int64 数组）、done（每个任务一字节）、
+    priorities（每个任务一字节的权重）和 texts。相比 TodoItem 列表，
+    每个任务省去对象头和属性引用，排序与筛选在字节数组上完成。
+
+    表内任务按 ID 升序排列。
+    """
+
+    __slots__ = ("ids", "done", "priorities", "texts")
+
+    # 字节值 -> 是否选中 的转换表，配合 bytes.translate 与 itertools.compress 使用
+    _MASKS = {
+        value: bytes(1 if b == value else 0 for b in range(256)) for value in range(4)
+    }
+
+    def __init__(self):
+        self.ids = array("q")
+        self.done = bytearray()
+        self.priorities = bytearray()
+        self.texts: List[str] = []
+
+    @classmethod
+    def from_items(cls, todos: Iterable[TodoItem]) -> "TodoTable":
+        """由任务创建列式表（按 ID 排序）"""
+        table = cls()
+        for todo in sorted(todos, key=lambda t: t.id):
+            table.append(todo)
+        return table
+
+    def append(self, todo: TodoItem) -> None:
+        """追加任务，ID 必须大于表内已有的 ID
+
+        Raises:
+            ValueError: ID 不是递增时
+        """
+        if self.ids and todo.id <= self.ids[-1]:
+            raise ValueError(f"ID 必须递增: {todo.id}")
+        self.ids.append(todo.id)
+        self.done.append(1 if todo.done else 0)
+        self.priorities.append(PRIORITY_WEIGHT[todo.priority])
+        self.texts.append(todo.text)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[TodoItem]:
+        return (self.row(i) for i in range(len(self.ids)))
+
+    def row(self, index: int) -> TodoItem:
+        """按行号取出任务"""
+        return TodoItem(
+            id=self.ids[index],
+            text=self.texts[index],
+            done=bool(self.done[index]),
+            priority=Priority(self.priorities[index]).label,
+        )
+
+    def select(
+        self,
+        done: Optional[bool] = None,
+        priorities: Optional[Iterable[str]] = None,
+    ) -> List[int]:
+        """筛选行号（按 ID 升序）
+
+        Args:
+            done: 只选已完成（True）或未完成（False）的任务，默认不限
+            priorities: 只选这些优先级的任务，默认不限
+
+        Returns:
+            行号列表
+        """
+        masks = []
+        if done is not None:
+            masks.append(self.done.translate(self._MASKS[int(done)]))
+        if priorities is not None:
+            weights = {PRIORITY_WEIGHT[p] for p in priorities}
+            table = bytes(1 if b in weights else 0 for b in range(256))
+            masks.append(self.priorities.translate(table))
+        if not masks:
+            return list(range(len(self.ids)))
+
+        # 多个条件的掩码按位与（借助大整数一次完成）
+        mask = masks[0]
+        for other in masks[1:]:
+            combined = int.from_bytes(mask, "little") & int.from_bytes(other, "little")
+            mask = combined.to_bytes(len(self.ids), "little")
+        return list(compress(range(len(self.ids)), mask))
+
+    def order(self, sort: str = "i", rows: Optional[List[int]] = None) -> List[int]:
+        """排序行号
+
+        表内已按 ID 升序，按优先级排序只需按权重分桶（计数排序），
+        不做比较排序。
+
+        Args:
+            sort: p=优先级（高在前，同级按 ID），i=ID
+            rows: 参与排序的行号（升序），默认全部
+
+        Returns:
+            排序后的行号
+        """
+        if rows is None:
+            rows = list(range(len(self.ids)))
+        if sort == "i":
+            return rows
+        if len(rows) == len(self.ids):
+            result: List[int] = []
+            for priority in sorted(Priority, reverse=True):
+                result.extend(
+                    compress(rows, self.priorities.translate(self._MASKS[priority]))
+                )
+            return result
+        buckets: Dict[int, List[int]] = {priority: [] for priority in Priority}
+        for i in rows:
+            buckets[self.priorities[i]].append(i)
+        return [i for priority in sorted(Priority, reverse=True) for i in buckets[priority]]
@@ -0,0 +1,217 @@
+"""性能剖析
+
+jd --profile（或环境变量 JD_PROFILE，见 cli.PROFILE_ENV）时，本模块代替 cli.main 执行命令，
+在标准错误输出本次命令各阶段的耗时：
+
+- import  : 导入 TodoManager 与存储后端、argparse
+- parse   : 构建解析器并解析参数
+- load    : 加载全部任务（TodoManager 的 load 事件）
+- command : 执行命令本身（不含 load/save/output）
+- save    : 写入修改（commit/save/compact 事件）
+- output  : 写标准输出
+
+以及加载与写入的任务数、数据文件大小，和进程实际读写的字节数
+（Linux 上取自 /proc/self/io）。--profile=FILE（或 JD_PROFILE=FILE）
+同时用 cProfile 剖析，统计数据保存到 FILE，可用 python -m pstats 查看。
+
+本模块只在剖析时导入，不影响 jd 的正常启动。
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+# 报告中各阶段的顺序
+PHASES = ["import", "parse", "load", "command", "save", "output"]
+
+# TodoManager 事件 -> 报告中的阶段
+EVENT_PHASES = {"load": "load", "commit": "save", "save": "save", "compact": "save"}
+
+
+def _proc_io() -> Optional[Dict[str, int]]:
+    """读取进程累计读写的字节数（rchar/wchar），不支持时为 None"""
+    try:
+        with open("/proc/self/io", "r", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return None
+    return {key: int(fields[key]) for key in ("rchar", "wchar") if key in fields}
+
+
+def _format_bytes(count: int) -> str:
+    """字节数 -> 便于阅读的文本"""
+    if count < 1024:
+        return f"{count} B"
+    if count < 1024 * 1024:
+        return f"{count / 1024:.1f} KB"
+    return f"{count / (1024 * 1024):.1f} MB"
+
+
+class _TimedStream:
+    """统计写入耗时与字节数的输出流包装"""
+
+    def __init__(self, stream: IO[str], profiler: "Profiler"):
+        self._stream = stream
+        self._profiler = profiler
+
+    def write(self, text: str) -> int:
+        start = time.perf_counter()
+        result = self._stream.write(text)
+        self._profiler.add("output", time.perf_counter() - start)
+        self._profiler.output_bytes += len(text.encode("utf-8", "replace"))
+        self._profiler.output_lines += text.count("\n")
+        return result
+
+    def flush(self) -> None:
+        start = time.perf_counter()
+        self._stream.flush()
+        self._profiler.add("output", time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class Profiler:
+    """收集一次命令各阶段的耗时"""
+
+    def __init__(self, dump: Optional[str] = None):
+        """
+        Args:
+            dump: cProfile 数据文件路径，默认不使用 cProfile
+        """
+        self.dump = dump
+        self.started = time.perf_counter()
+        # 阶段 -> 累计秒数
+        self.phases: Dict[str, float] = {}
+        # 阶段 -> 说明（任务数、文件大小等）
+        self.details: Dict[str, List[str]] = {}
+        # TodoManager 事件 (事件名, 信息)
+        self.events: List[Tuple[str, Dict]] = []
+        self.output_bytes = 0
+        self.output_lines = 0
+        self._io_start = _proc_io()
+        self._cprofile = None
+        if dump:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def add(self, phase: str, seconds: float) -> None:
+        """累计阶段耗时"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """统计代码块的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def capture_output(self) -> Iterator[None]:
+        """统计代码块中写标准输出的耗时与字节数"""
+        saved, sys.stdout = sys.stdout, _TimedStream(sys.stdout, self)
+        try:
+            yield
+        finally:
+            sys.stdout = saved
+
+    def record(self, event: str, info: Dict) -> None:
+        """TodoManager 事件回调（见 TodoManager.subscribe）"""
+        self.events.append((event, dict(info)))
+        phase = EVENT_PHASES.get(event)
+        if phase is None:
+            return
+        self.add(phase, info["elapsed"])
+        if event == "load":
+            note = f"{info['items']} 个任务，文件 {_format_bytes(info['bytes'])}"
+        elif event == "compact":
+            note = f"折叠 {info['records']} 条记录，文件 {_format_bytes(info['bytes'])}"
+        elif event == "save":
+            note = f"{info['items']} 个任务，文件 {_format_bytes(info['bytes'])}"
+        else:
+            note = f"{info['ops']} 个修改，文件 {_format_bytes(info['bytes'])}"
+        self.details.setdefault(phase, []).append(note)
+
+    def report(self, stream: Optional[IO[str]] = None) -> None:
+        """停止剖析，输出各阶段耗时；指定了 dump 时保存 cProfile 数据
+
+        command 阶段只计命令本身：execute 的耗时减去其中的 load/save/output。
+        """
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        total = time.perf_counter() - self.started
+        io_end = _proc_io()
+        stream = stream if stream is not None else sys.stderr
+        phases = dict(self.phases)
+        if "command" in phases:
+            nested = sum(phases.get(name, 0.0) for name in ("load", "save", "output"))
+            phases["command"] = max(phases["command"] - nested, 0.0)
+        if self.output_bytes:
+            self.details["output"] = [
+                f"{self.output_lines} 行，{_format_bytes(self.output_bytes)}"
+            ]
+
+        lines = ["── jd 性能剖析 ──"]
+        for name in PHASES:
+            if name not in phases:
+                continue
+            line = f"{name:<8} {phases[name] * 1000:9.2f} ms"
+            if name in self.details:
+                line += "  " + "；".join(self.details[name])
+            lines.append(line)
+        lines.append(f"{'total':<8} {total * 1000:9.2f} ms")
+
+        if self._io_start and io_end:
+            read = io_end["rchar"] - self._io_start["rchar"]
+            written = io_end["wchar"] - self._io_start["wchar"]
+            lines.append(f"I/O: 读取 {_format_bytes(read)}，写入 {_format_bytes(written)}")
+        if self._cprofile is not None:
+            self._cprofile.dump_stats(self.dump)
+            lines.append(f"cProfile 数据已保存到 {self.dump}（python -m pstats {self.dump}）")
+        stream.write("\n".join(lines) + "\n")
+
+
+def run_profiled(argv: List[str], dump: Optional[str] = None) -> int:
+    """剖析并执行一条 jd 命令（不经常驻服务转发，直接读写数据文件）
+
+    Args:
+        argv: 命令行参数（不含程序名与 --profile）
+        dump: cProfile 数据文件路径，默认不使用 cProfile
+
+    Returns:
+        退出码
+    """
+    from . import cli
+    from .client import FILE_ENV
+
+    profiler = Profiler(dump)
+    with profiler.phase("import"):
+        import argparse  # noqa: F401
+
+        manager_class = getattr(cli, "TodoManager")
+    with profiler.phase("parse"):
+        parser = cli.build_parser(cli.command_name(argv))
+        args = parser.parse_args(argv)
+        cli.apply_file_option(parser, args, os.environ.get(FILE_ENV))
+    if not args.command:
+        parser.print_help()
+        return 1
+
+    if args.list_name is None and args.file is None:
+        manager = manager_class(lazy=True)
+    else:
+        manager = cli.open_manager(args)
+    manager.subscribe(profiler.record)
+    try:
+        with profiler.capture_output(), profiler.phase("command"):
+            code = cli.execute(args, manager)
+    finally:
+        sys.stdout.flush()
+        profiler.report()
+    return code
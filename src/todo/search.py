@@ -0,0 +1,277 @@
+"""全文搜索
+
+在任务文本上建立倒排索引，保存在数据文件旁的 <数据文件>.idx（SQLite）。
+
+分词（tokenize）：
+- 中日韩文字按二元组切分（"学习计划" -> 学习 / 习计 / 计划），并补上
+  末尾单字，使单字查询也能命中
+- 其他文字按单词切分，统一小写
+
+查询时任务需包含全部词元（单字按前缀匹配），再核对每个查询词确实是
+任务文本的子串（排除二元组都出现但不相邻的情况）。单词只按完整单词
+匹配。
+
+索引记录建立时数据文件的版本戳。TodoManager 提交修改后增量更新
+已存在的索引；版本戳不一致（如文件被其他程序修改）时搜索前重建。
+索引在第一次搜索时才创建，不搜索就没有额外的写入开销。
+"""
+
+import json
+import os
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, List, Optional
+from .models import TodoItem
+
+if TYPE_CHECKING:
+    import sqlite3
+
+# 中日韩文字：汉字（含扩展 A、兼容汉字）、假名、谚文
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af"
+_TOKEN_RE = re.compile(rf"([{_CJK}]+)|([^\W{_CJK}]+)")
+
+# 前缀匹配的上界：词元 + 最大码位
+_PREFIX_END = "\U0010ffff"
+
+# SQLite 单条语句的参数个数上限（保守值）
+_MAX_PARAMS = 900
+
+
+def tokenize(text: str, query: bool = False) -> List[str]:
+    """把文本切分为词元（去重，保持出现顺序）
+
+    Args:
+        text: 任务文本或查询词
+        query: 为 True 时按查询切分：连续的中日韩文字只取二元组，
+            单个字才作为单字词元（单字按前缀匹配即可覆盖所在的二元组）
+
+    Returns:
+        词元列表
+    """
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(text.lower()):
+        if word:
+            tokens.append(word)
+            continue
+        tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+        if len(cjk) == 1 or not query:
+            tokens.append(cjk[-1])
+    return list(dict.fromkeys(tokens))
+
+
+def _is_prefix(token: str) -> bool:
+    """查询词元是否为单个中日韩文字（按前缀匹配）"""
+    return len(token) == 1 and _TOKEN_RE.match(token).group(1) is not None
+
+
+class SearchIndex:
+    """持久化的倒排索引
+
+    docs 表保存任务的副本（文本、状态、优先级），搜索结果直接由索引
+    给出，不必读取数据文件；postings 表保存 (词元, 任务 ID)；vocab 表
+    保存出现过的词元，用于把单字查询展开为具体的词元。
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS docs (
+            id INTEGER PRIMARY KEY,
+            text TEXT NOT NULL,
+            done INTEGER NOT NULL,
+            priority TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS postings (
+            token TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            PRIMARY KEY (token, id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS vocab (
+            token TEXT PRIMARY KEY
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, filepath: Path):
+        self.filepath = Path(filepath)
+        self._conn: Optional["sqlite3.Connection"] = None
+
+    @property
+    def conn(self) -> "sqlite3.Connection":
+        """数据库连接（首次使用时打开并建表）"""
+        if self._conn is None:
+            import sqlite3
+
+            self._conn = sqlite3.connect(str(self.filepath))
+            self._conn.executescript(self._SCHEMA)
+        return self._conn
+
+    def exists(self) -> bool:
+        """索引文件是否已建立"""
+        return os.path.exists(self.filepath)
+
+    def is_fresh(self, stamp) -> bool:
+        """索引是否对应版本戳为 stamp 的数据文件"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'stamp'").fetchone()
+        return row is not None and row[0] == self._encode_stamp(stamp)
+
+    def rebuild(self, todos: Iterable[TodoItem], stamp) -> None:
+        """用全部任务重建索引
+
+        Args:
+            todos: 全部任务
+            stamp: 数据文件当前的版本戳
+        """
+        with self.conn:
+            self.conn.execute("DELETE FROM docs")
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM vocab")
+            for todo in todos:
+                self._insert(todo)
+            self._set_stamp(stamp)
+
+    def apply(self, ops: List[tuple], before, after) -> None:
+        """把一次提交的修改增量应用到索引
+
+        索引与提交前的数据文件不一致时（已经过期）不做修改，
+        留待下次搜索时重建。
+
+        Args:
+            ops: 修改操作，格式同 Store.commit
+            before: 提交前数据文件的版本戳
+            after: 提交后数据文件的版本戳
+        """
+        if not self.is_fresh(before):
+            return
+        with self.conn:
+            for op in ops:
+                kind = op[0]
+                if kind == "add":
+                    self._insert(op[1])
+                elif kind == "done":
+                    self.conn.execute("UPDATE docs SET done = 1 WHERE id = ?", (op[1],))
+                elif kind == "delete":
+                    self._remove([op[1]])
+                elif kind == "clear":
+                    rows = self.conn.execute("SELECT id FROM docs WHERE done = 1")
+                    self._remove([row[0] for row in rows.fetchall()])
+            self._set_stamp(after)
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[TodoItem]:
+        """搜索包含全部查询词的任务
+
+        以最长的词元驱动：按 ID 顺序遍历它的倒排列表（主键有序，无需排序），
+        其余词元用 EXISTS 逐个核对，凑够 limit 个结果即停止，不会取出
+        全部候选。单字先经 vocab 表展开为以它开头的词元。
+
+        Args:
+            query: 查询词，空白分隔，不区分大小写
+            limit: 最多返回的任务数，默认不限
+
+        Returns:
+            匹配的任务（按 ID 升序）
+        """
+        terms = query.lower().split()
+        tokens = tokenize(query, query=True)
+        if not tokens:
+            return []
+
+        # 每组词元中任务至少要包含一个
+        groups: List[List[str]] = []
+        for token in sorted(tokens, key=len, reverse=True):
+            if _is_prefix(token):
+                rows = self.conn.execute(
+                    "SELECT token FROM vocab WHERE token >= ? AND token < ?",
+                    (token, token + _PREFIX_END),
+                )
+                group = [row[0] for row in rows]
+                if not group:
+                    return []
+                groups.append(group)
+            else:
+                groups.append([token])
+
+        params: List[str] = []
+        if len(groups[0]) == 1:
+            sql = (
+                "SELECT d.id, d.text, d.done, d.priority FROM postings p "
+                "JOIN docs d ON d.id = p.id WHERE p.token = ?"
+            )
+            params.extend(groups.pop(0))
+            order = "p.id"
+        else:
+            sql = "SELECT d.id, d.text, d.done, d.priority FROM docs d WHERE 1"
+            order = "d.id"
+        for group in groups:
+            sql += (
+                " AND EXISTS (SELECT 1 FROM postings q WHERE q.token IN "
+                f"({','.join('?' * len(group))}) AND q.id = d.id)"
+            )
+            params.extend(group)
+        sql += f" ORDER BY {order}"
+
+        results = []
+        for row in self.conn.execute(sql, params):
+            text = row[1].lower()
+            if all(term in text for term in terms):
+                results.append(
+                    TodoItem(id=row[0], text=row[1], done=bool(row[2]), priority=row[3])
+                )
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _insert(self, todo: TodoItem) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO docs (id, text, done, priority) VALUES (?, ?, ?, ?)",
+            (todo.id, todo.text, int(todo.done), todo.priority),
+        )
+        tokens = tokenize(todo.text)
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO postings (token, id) VALUES (?, ?)",
+            [(token, todo.id) for token in tokens],
+        )
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO vocab (token) VALUES (?)", [(token,) for token in tokens]
+        )
+
+    def _remove(self, todo_ids: List[int]) -> None:
+        for todo in self._fetch(todo_ids):
+            self.conn.executemany(
+                "DELETE FROM postings WHERE token = ? AND id = ?",
+                [(token, todo.id) for token in tokenize(todo.text)],
+            )
+        self.conn.executemany("DELETE FROM docs WHERE id = ?", [(i,) for i in todo_ids])
+
+    def _fetch(self, todo_ids: List[int]) -> List[TodoItem]:
+        """按 ID 读取索引中保存的任务"""
+        todos = []
+        for start in range(0, len(todo_ids), _MAX_PARAMS):
+            chunk = todo_ids[start:start + _MAX_PARAMS]
+            rows = self.conn.execute(
+                "SELECT id, text, done, priority FROM docs "
+                f"WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY id",
+                chunk,
+            )
+            todos.extend(
+                TodoItem(id=row[0], text=row[1], done=bool(row[2]), priority=row[3])
+                for row in rows
+            )
+        return todos
+
+    def _set_stamp(self, stamp) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('stamp', ?)",
+            (self._encode_stamp(stamp),),
+        )
+
+    @staticmethod
+    def _encode_stamp(stamp) -> str:
+        return json.dumps(stamp)
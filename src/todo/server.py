@@ -0,0 +1,172 @@
+"""常驻服务
+
+jd serve 启动后常驻内存持有 TodoManager（每个用到的列表一个），监听 Unix 域套接字；
+CLI 发现套接字存在时把命令转发给服务执行，省去每次启动时的参数解析
+和数据加载。服务不可用时 CLI 回退为直接读写文件。客户端（forward）
+在 client.py 中，CLI 启动时不必导入本模块。
+
+协议：每个连接发送一行 JSON 请求
+{"argv": [...], "cwd": "...", "stdin": "...", "file": "..."}（file 为客户端的
+JD_FILE，可省略），服务返回一行 JSON 响应 {"code": 0, "stdout": "...", "stderr": "..."}。
+命令中的相对路径（--file 以及 export/import/sync 的 path）按请求中客户端的
+工作目录 cwd 解析，而不是服务的工作目录。常驻的 TodoManager 按数据文件区分：
+没有 --file 与 -L 的命令总是作用于默认列表，与启动服务时的选项无关，
+结果与没有服务时直接执行相同。
+"""
+
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Optional
+from .client import SOCKET_ENV, forward, socket_path  # noqa: F401
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """处理单个转发请求"""
+
+    def handle(self) -> None:
+        request = json.loads(self.rfile.readline())
+        response = self.server.execute(
+            request["argv"], request.get("stdin", ""), request.get("cwd"), request.get("file")
+        )
+        self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+
+    class TodoServer(socketserver.UnixStreamServer):
+        """常驻 TodoManager 的 Unix 套接字服务（逐个处理请求）"""
+
+        def __init__(
+            self,
+            path: Path,
+            manager,
+            list_name: Optional[str] = None,
+            filepath: Optional[str] = None,
+        ):
+            """
+            Args:
+                path: 套接字路径
+                manager: 启动时打开的 TodoManager
+                list_name: manager 对应的列表名，默认为默认列表
+                filepath: manager 对应的数据文件（jd --file FILE serve），
+                    指定时 list_name 无效
+            """
+            self.manager = manager
+            # 列表名或数据文件的绝对路径 -> 常驻的 TodoManager（其他的首次使用时打开）
+            self.managers: Dict[str, object] = {self._key(list_name, filepath): manager}
+            super().__init__(str(path), _RequestHandler)
+
+        def execute(
+            self,
+            argv: List[str],
+            stdin: str = "",
+            cwd: Optional[str] = None,
+            file: Optional[str] = None,
+        ) -> Dict:
+            """在常驻的 TodoManager 上执行一条命令
+
+            Args:
+                argv: 命令行参数（不含程序名）
+                stdin: 转发来的标准输入内容
+                cwd: 客户端的工作目录，命令中的相对路径据此解析；
+                    为 None 时按服务的工作目录解析
+                file: 客户端的环境变量 JD_FILE
+
+            Returns:
+                包含 code/stdout/stderr 的响应
+            """
+            from .cli import apply_file_option, build_parser, command_name, execute
+
+            stdout, stderr = io.StringIO(), io.StringIO()
+            saved_stdin, sys.stdin = sys.stdin, io.StringIO(stdin)
+            try:
+                with redirect_stdout(stdout), redirect_stderr(stderr):
+                    try:
+                        parser = build_parser(command_name(argv))
+                        args = parser.parse_args(argv)
+                        apply_file_option(parser, args, file)
+                        if cwd is not None:
+                            for name in ("path", "file"):
+                                if getattr(args, name, None):
+                                    setattr(args, name, os.path.join(cwd, getattr(args, name)))
+                        if not args.command or args.command == "serve":
+                            code = 1
+                        else:
+                            code = execute(args, self._manager_for(args.list_name, args.file))
+                    except SystemExit as e:
+                        # argparse 的 --help / 参数错误
+                        code = e.code if isinstance(e.code, int) else 1
+            finally:
+                sys.stdin = saved_stdin
+            return {"code": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+        def _manager_for(self, name: Optional[str], filepath: Optional[str]):
+            """--file 指定的数据文件或 -L 指定的列表的常驻 TodoManager，都未指定时为默认列表"""
+            key = self._key(name, filepath)
+            if key not in self.managers:
+                if filepath is not None:
+                    from .manager import TodoManager
+
+                    self.managers[key] = TodoManager(filepath=key)
+                else:
+                    from .lists import TodoLists
+
+                    self.managers[key] = TodoLists().manager(key)
+            return self.managers[key]
+
+        @staticmethod
+        def _key(name: Optional[str], filepath: Optional[str]) -> str:
+            """常驻 TodoManager 的键：数据文件的绝对路径，或列表名（不含 /，不会冲突）"""
+            if filepath is not None:
+                return os.path.abspath(filepath)
+            from .lists import DEFAULT_LIST
+
+            return name or DEFAULT_LIST
+
+
+def serve(
+    manager,
+    path: Optional[Path] = None,
+    list_name: Optional[str] = None,
+    filepath: Optional[str] = None,
+) -> None:
+    """启动常驻服务，直到被中断
+
+    Args:
+        manager: 常驻内存的 TodoManager
+        path: 套接字路径，默认 socket_path()
+        list_name: manager 对应的列表名（jd -L NAME serve），默认为默认列表
+        filepath: manager 对应的数据文件（jd --file FILE serve）
+
+    Raises:
+        ValueError: 平台不支持 Unix 域套接字或已有服务在运行时
+    """
+    if not hasattr(socketserver, "UnixStreamServer"):
+        raise ValueError("当前平台不支持 Unix 域套接字")
+
+    path = Path(path if path is not None else socket_path())
+    if path.exists():
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(str(path))
+        except OSError:
+            # 上次服务异常退出留下的套接字文件
+            path.unlink()
+        else:
+            raise ValueError(f"服务已在运行: {path}")
+
+    server = TodoServer(path, manager, list_name, filepath)
+    print(f"✓ 服务已启动: {path}（Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
@@ -0,0 +1,1890 @@
+"""存储后端
+
+负责待办事项的持久化。TodoManager 通过 open_store 按文件扩展名选择后端：
+
+- .json  : JsonStore，整文件读写（默认）
+- .jdlog : JournalStore，追加式操作日志，每次修改只追加一条记录，
+          日志过长时自动压缩为快照
+- .jsonl : RecordStore，每行一个任务，修改原地改写对应的记录
+- .jdb   : SnapshotStore，紧凑的二进制快照，通过 mmap 按需读取
+- .db    : SqliteStore，SQLite 数据库，按行更新，查询走索引
+- .marshal / .pickle : MarshalStore / PickleStore，整体序列化的二进制
+          文件，读写最快，作为本机私有的缓存使用
+
+格式也可以用编解码器名指定（见 CODECS，如紧凑的 json-compact）。
+已存在的文件按开头的魔数识别格式（见 sniff_codec），与扩展名无关。
+
+JSON 文件可以压缩存储，在扩展名后再加压缩格式（见 COMPRESSIONS）：
+todo.json.gz / todo.json.xz / todo.json.bz2 / todo.json.zst。
+
+修改以操作（op）的形式提交给后端：
+    ("add", TodoItem) / ("done", id) / ("delete", id) / ("clear",)
+
+多个进程共用同一数据文件时，写入前通过 Store.lock() 获取文件锁
+（<数据文件>.lock，fcntl 建议锁），并用 Store.stamp() 判断文件是否
+已被其他进程修改。整文件写入均为先写临时文件再原子替换。
+"""
+
+import io
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING, Callable, Collection, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+)
+from .models import PRIORITY_WEIGHT, TodoItem, trusted_item, trusted_items, trusted_rows
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，退化为不加锁
+    fcntl = None
+
+if TYPE_CHECKING:
+    # sqlite3、mmap 只在打开对应格式的文件时导入，不拖慢其他格式的启动
+    import mmap
+    import sqlite3
+
+# 单个修改操作
+Op = Tuple
+
+
+@dataclass
+class CompactionStats:
+    """一次日志压缩的统计信息"""
+
+    records_folded: int
+    bytes_before: int
+    bytes_after: int
+    elapsed: float
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        """压缩回收的字节数"""
+        return self.bytes_before - self.bytes_after
+
+
+def atomic_write(
+    filepath: Path, write: Callable[[IO], None], binary: bool = False, fsync: bool = True
+) -> None:
+    """先写同目录下的临时文件，再原子替换目标文件
+
+    写入过程中崩溃或被中断时，原文件保持不变。
+
+    Args:
+        filepath: 目标文件
+        write: 向文件对象写入内容的函数
+        binary: 为 True 时以二进制方式打开临时文件，默认为 UTF-8 文本
+        fsync: 为 True 时替换前把临时文件刷到磁盘（断电后不会留下空文件）
+    """
+    tmp_path = filepath.with_name(f".{filepath.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") if binary else open(tmp_path, "w", encoding="utf-8") as f:
+            write(f)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+@contextmanager
+def file_lock(filepath: Path) -> Iterator[None]:
+    """持有文件的排他锁（<文件>.lock，fcntl 建议锁；不可重入）
+
+    没有 fcntl 的平台上不加锁。
+    """
+    if fcntl is None:
+        yield
+        return
+    lock_path = filepath.with_name(filepath.name + ".lock")
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+class Store:
+    """存储后端基类
+
+    子类实现 load/save，按需覆盖 commit（增量写入）和 compact。
+    """
+
+    # 为 True 时后端支持按需查询（get/query），TodoManager 不预先加载
+    lazy = False
+    # 为 True 时提交修改需要全部任务（整体重写的格式）
+    needs_items = True
+    # 为 False 时写入后不调用 fsync：吞吐量更高，但断电或系统崩溃时
+    # 可能丢失最近写入的修改（TodoManager 的 durable 参数）
+    durable = True
+    # 为 True 时读入的每个任务都经过验证（jd check）；否则本程序写入、
+    # 已通过校验和或格式版本确认的文件跳过逐个验证
+    strict = False
+
+    def __init__(self, filepath: Path):
+        self.filepath = Path(filepath)
+        # lock() 的线程锁与重入深度：深度只由持有线程锁的线程读写，
+        # 同一线程可重入，其他线程（如组提交的后台写入）等待
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+
+    def _decode(self, records: Iterable[Dict], trusted: bool = False) -> List[TodoItem]:
+        """字典记录 -> 任务
+
+        可信且非 strict 时跳过逐个验证；strict 时指出第几个任务无效。
+
+        Raises:
+            ValueError: 记录无效时（strict 模式）
+        """
+        if trusted and not self.strict:
+            return trusted_items(records)
+        if not self.strict:
+            return [TodoItem.from_dict(record) for record in records]
+        todos = []
+        for index, record in enumerate(records, 1):
+            try:
+                todos.append(TodoItem.from_dict(record))
+            except (KeyError, TypeError, AttributeError, ValueError) as e:
+                detail = f"缺少字段 {e}" if isinstance(e, KeyError) else str(e)
+                raise ValueError(f"第 {index} 个任务无效（{record!r}）: {detail}")
+        return todos
+
+    def load(self) -> List[TodoItem]:
+        """读取全部任务"""
+        raise NotImplementedError
+
+    def iter_todos(self) -> Iterator[TodoItem]:
+        """逐个读取任务，默认读取全部后再迭代"""
+        return iter(self.load())
+
+    def max_id(self) -> int:
+        """当前最大 ID，没有任务时为 0（默认读取全部任务）"""
+        return max((todo.id for todo in self.iter_todos()), default=0)
+
+    def counts(self) -> Dict[Tuple[bool, str], int]:
+        """按 (是否完成, 优先级) 统计任务数，没有任务的分组不出现
+
+        默认逐个读取任务统计；有计数信息的后端直接读取计数。
+        """
+        counts: Dict[Tuple[bool, str], int] = {}
+        for todo in self.iter_todos():
+            key = (todo.done, todo.priority)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def save(self, todos: Collection[TodoItem]) -> None:
+        """整体写入全部任务"""
+        raise NotImplementedError
+
+    def commit(self, ops: List[Op], todos: Optional[Collection[TodoItem]]) -> None:
+        """提交修改操作，默认整体重写"""
+        self.save(todos)
+
+    def compact(self, todos: Optional[Collection[TodoItem]]) -> Optional[CompactionStats]:
+        """压缩存储，默认无需压缩"""
+        return None
+
+    def stamp(self) -> Optional[Tuple[int, int, int]]:
+        """数据文件的版本戳 (inode, 大小, 修改时间)，文件不存在时为 None
+
+        与加载时记录的版本戳不同，说明文件已被其他进程修改。
+        """
+        try:
+            st = os.stat(self.filepath)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    @contextmanager
+    def lock(self) -> Iterator[None]:
+        """持有数据文件的排他锁（同一线程可重入，线程之间互斥）"""
+        with self._thread_lock:
+            if self._lock_depth:
+                self._lock_depth += 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+
+            with file_lock(self.filepath):
+                self._lock_depth = 1
+                try:
+                    yield
+                finally:
+                    self._lock_depth = 0
+
+
+class JsonStore(Store):
+    """JSON 文件存储
+
+    每次提交都重写整个文件，格式为
+    {"next_id": N, "counts": {"open": {...}, "done": {...}}, "todos": [...], "checksum": C}。
+    next_id 与各状态、优先级的任务数写在文件开头，只需新 ID 或计数时
+    读取文件头即可；iter_todos 增量解析 todos 数组，不必一次读入整个文件。
+
+    checksum 是它之前全部内容的 CRC32（未压缩的字节）。加载时校验和
+    一致说明文件由本程序写入后未被改动，任务不再逐个验证；没有校验和
+    （旧格式）或不一致（如手工编辑过）时照常逐个验证。
+
+    默认缩进两格，方便阅读和手工编辑；indent 为 None 时写入紧凑格式
+    （不缩进也不加空格），文件更小，并且整体由 C 编码器一次序列化，
+    保存快得多。读取时两者相同。
+
+    指定 compression 时文件整体压缩：写入时每 encode_batch 个任务用 C 编码器
+    序列化一次，边序列化边压缩；读取时边解压边解析。压缩文件不缩进：
+    缩进只为方便阅读，压缩后已无法直接阅读，反而拖慢序列化。
+    """
+
+    # 读取文件头 / 增量解析时每次读取的字符数
+    chunk_size = 64 * 1024
+    # 压缩写入时每次序列化的任务数
+    encode_batch = 1000
+
+    def __init__(
+        self, filepath: Path, compression: Optional[str] = None, indent: Optional[int] = 2
+    ):
+        """
+        Args:
+            filepath: 数据文件路径
+            compression: 压缩格式（COMPRESSIONS 的键，如 ".gz"），默认不压缩
+            indent: 缩进的空格数，None 表示紧凑格式（压缩文件总是紧凑格式）
+
+        Raises:
+            ValueError: 压缩格式未知或当前环境不支持时
+        """
+        super().__init__(filepath)
+        self.compression = compression
+        self.indent = indent
+        self._codec = None if compression is None else compression_module(compression)
+
+    _HEADER_RE = re.compile(r'\A\s*\{\s*"next_id"\s*:\s*(\d+)')
+    _COUNTS_RE = re.compile(r'\A\s*\{\s*"next_id"\s*:\s*\d+\s*,\s*"counts"\s*:\s*')
+    _CHECKSUM_RE = re.compile(r',\s*"checksum"\s*:\s*(\d+)\s*\}\s*\Z')
+
+    def load(self) -> List[TodoItem]:
+        """读取全部任务"""
+        if not self.filepath.exists():
+            return []
+        with self._open() as f:
+            text = f.read()
+        data = json.loads(text)
+        if not isinstance(data, dict) or not ("todos" in data or "next_id" in data):
+            raise ValueError(f"不是 jd 的 JSON 数据文件（缺少 todos）: {self.filepath}")
+        return self._decode(data.get("todos", []), trusted=self._checksum_ok(text))
+
+    def checksum_ok(self) -> Optional[bool]:
+        """文件的校验和是否一致；文件不存在时为 None"""
+        if not self.filepath.exists():
+            return None
+        with self._open() as f:
+            return self._checksum_ok(f.read())
+
+    def iter_todos(self) -> Iterator[TodoItem]:
+        """增量解析文件，逐个产生任务"""
+        if not self.filepath.exists():
+            return
+        with self._open() as f:
+            for item in iter_json_array(f, "todos", self.chunk_size):
+                yield TodoItem.from_dict(item)
+
+    def max_id(self) -> int:
+        """从文件头读取 next_id；旧格式文件没有文件头时回退为逐个扫描"""
+        if not self.filepath.exists():
+            return 0
+        with self._open() as f:
+            match = self._HEADER_RE.match(f.read(256))
+        if match:
+            return int(match.group(1)) - 1
+        return super().max_id()
+
+    def counts(self) -> Dict[Tuple[bool, str], int]:
+        """从文件头读取计数
+
+        与加载时验证任务的规则相同，只在校验和一致时信任文件头；旧格式
+        文件没有计数、或文件被改动过（如手工删除了任务）时回退为逐个统计。
+        """
+        if not self.filepath.exists():
+            return {}
+        with self._open() as f:
+            text = f.read()
+        counts = self._header_counts(text) if self._checksum_ok(text) else None
+        return super().counts() if counts is None else counts
+
+    def recorded_counts(self) -> Dict[Tuple[bool, str], int]:
+        """文件头记录的计数，不核对校验和（jd check 用来发现过期的文件头）"""
+        if not self.filepath.exists():
+            return {}
+        with self._open() as f:
+            counts = self._header_counts(f.read(1024))
+        return super().counts() if counts is None else counts
+
+    def _header_counts(self, text: str) -> Optional[Dict[Tuple[bool, str], int]]:
+        """解析文件开头的计数，没有计数（旧格式）时为 None"""
+        head = text[:1024]
+        match = self._COUNTS_RE.match(head)
+        if not match:
+            return None
+        try:
+            data, _ = json.JSONDecoder().raw_decode(head, match.end())
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        return {
+            (status == "done", priority): count
+            for status, group in data.items()
+            for priority, count in group.items()
+            if count
+        }
+
+    def save(self, todos: Collection[TodoItem]) -> None:
+        """整体写入全部任务"""
+        items = [todo.to_dict() for todo in todos]
+        counts = {
+            status: {priority: 0 for priority in PRIORITY_WEIGHT}
+            for status in ("open", "done")
+        }
+        for item in items:
+            counts["done" if item["done"] else "open"][item["priority"]] += 1
+        data = {
+            "next_id": max((item["id"] for item in items), default=0) + 1,
+            "counts": counts,
+            "todos": items,
+        }
+        import zlib
+
+        if self._codec is None:
+            # 去掉结尾的 "}"（缩进时为 "\n}"），在末尾补上校验和
+            if self.indent is None:
+                body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))[:-1]
+            else:
+                body = json.dumps(data, ensure_ascii=False, indent=self.indent)[:-2]
+            body = body.encode("utf-8")
+            crc = zlib.crc32(body)
+            if self.indent is None:
+                tail = f',"checksum":{crc}}}'.encode("ascii")
+            else:
+                tail = f',\n{" " * self.indent}"checksum": {crc}\n}}\n'.encode("ascii")
+            atomic_write(
+                self.filepath, lambda f: f.writelines((body, tail)), binary=True, fsync=self.durable
+            )
+            return
+
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+        head = encode({"next_id": data["next_id"], "counts": counts, "todos": []})
+
+        def write(f: IO[bytes]) -> None:
+            module, options = self._codec
+            crc = 0
+
+            def emit(text: str) -> None:
+                nonlocal crc
+                chunk = text.encode("utf-8")
+                crc = zlib.crc32(chunk, crc)
+                out.write(chunk)
+
+            # 压缩流包装已打开的临时文件，关闭时不会关闭临时文件本身
+            with module.open(f, "wb", **options) as out:
+                emit(head[:-2])
+                for start in range(0, len(items), self.encode_batch):
+                    if start:
+                        emit(",")
+                    emit(encode(items[start:start + self.encode_batch])[1:-1])
+                emit("]")
+                out.write(f',"checksum":{crc}}}'.encode("ascii"))
+
+        atomic_write(self.filepath, write, binary=True, fsync=self.durable)
+
+    def _open(self) -> IO[str]:
+        """以文本方式打开数据文件读取（压缩文件边读边解压）"""
+        if self._codec is None:
+            return open(self.filepath, "r", encoding="utf-8")
+        return self._codec[0].open(self.filepath, "rt", encoding="utf-8")
+
+    def _checksum_ok(self, text: str) -> bool:
+        """文件末尾的校验和与之前的内容是否一致"""
+        import zlib
+
+        match = self._CHECKSUM_RE.search(text, max(len(text) - 64, 0))
+        if match is None:
+            return False
+        return zlib.crc32(text[:match.start()].encode("utf-8")) == int(match.group(1))
+
+
+class JournalStore(Store):
+    """追加式操作日志存储
+
+    文件每行一条 JSON 记录，加载时按顺序重放。每次修改只追加一行，
+    写入代价与任务总数无关。
+
+    日志首行可以是一条 snapshot 记录（压缩后的全部任务），之后是增量记录。
+    快照记录开头依次是 next_id 和整行的字节数 bytes（右对齐的定宽字段），
+    只需最大 ID 时读取开头一小段，再跳过整个快照读取之后的增量记录。
+    当增量记录数超过 compact_min_records，且超过存活任务数的 compact_ratio
+    倍时，提交后自动压缩。
+    """
+
+    needs_items = False
+
+    _SNAPSHOT_PREFIX = '{"op": "snapshot"'
+    _SNAPSHOT_RE = re.compile(r'\{"op": "snapshot", "next_id": (\d+)')
+    _SNAPSHOT_HEAD_RE = re.compile(rb'\{"op": "snapshot", "next_id": (\d+), "bytes": +(\d+), ')
+    # 快照记录中 bytes 字段的宽度（JSON 允许数字前有空格）
+    _SIZE_WIDTH = 12
+
+    def __init__(
+        self,
+        filepath: Path,
+        compact_min_records: int = 1000,
+        compact_ratio: float = 2.0,
+    ):
+        super().__init__(filepath)
+        self.compact_min_records = compact_min_records
+        self.compact_ratio = compact_ratio
+        # 快照之后的增量记录数
+        self._tail_records = 0
+
+    def load(self) -> List[TodoItem]:
+        """读取快照并重放之后的增量记录"""
+        self._tail_records = 0
+        if not self.filepath.exists():
+            return []
+        todos: Dict[int, TodoItem] = {}
+        with open(self.filepath, "r", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 写入中途崩溃留下的半行：追加前会截掉，旧版本写入的
+                    # 日志中可能位于中间，跳过它继续重放之后的记录
+                    if self.strict:
+                        raise ValueError(f"日志第 {number} 行已损坏: {line[:60]!r}")
+                    continue
+                self._replay(todos, record)
+                if record["op"] == "snapshot":
+                    self._tail_records = 0
+                else:
+                    self._tail_records += 1
+        return list(todos.values())
+
+    def max_id(self) -> int:
+        """已分配过的最大 ID
+
+        快照记录只读取开头的 next_id 与字节数，跳过整个快照（不读入内存）；
+        之后只解析较短的增量记录。旧版本写入的快照没有字节数，逐行读取。
+        未加载全部任务时无法得知最新的任务是否已被删除，因此被删除的
+        最大 ID 不会被复用。
+        """
+        if not self.filepath.exists():
+            return 0
+        max_id = 0
+        with open(self.filepath, "rb") as raw:
+            match = self._SNAPSHOT_HEAD_RE.match(raw.read(128))
+            if match:
+                max_id = int(match.group(1)) - 1
+                raw.seek(int(match.group(2)))
+            else:
+                raw.seek(0)
+            f = io.TextIOWrapper(raw, encoding="utf-8")
+            for line in f:
+                if line.startswith(self._SNAPSHOT_PREFIX):
+                    match = self._SNAPSHOT_RE.match(line)
+                    if match:
+                        max_id = max(max_id, int(match.group(1)) - 1)
+                        continue
+                elif '"op": "add"' not in line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record["op"] == "add":
+                    max_id = max(max_id, record["todo"]["id"])
+                else:
+                    max_id = max((item["id"] for item in record["todos"]), default=max_id)
+        return max_id
+
+    def save(self, todos: Collection[TodoItem]) -> None:
+        """用当前任务重写日志（单条快照记录）"""
+        self._write_snapshot(todos)
+
+    def commit(self, ops: List[Op], todos: Optional[Collection[TodoItem]]) -> None:
+        """追加修改记录，必要时自动压缩
+
+        未加载全部任务时（todos 为 None）只追加，不自动压缩。
+        调用方持有文件锁；追加前先截掉上次写入中途崩溃留下的半行，
+        新记录不会接在残缺的行后面。
+        """
+        with open(self.filepath, "a+b") as f:
+            self._trim_torn_tail(f)
+            f.write("".join(self._encode(op) for op in ops).encode("utf-8"))
+            f.flush()
+            if self.durable:
+                os.fsync(f.fileno())
+        self._tail_records += len(ops)
+
+        if todos is not None and self._should_compact(len(todos)):
+            self.compact(todos)
+
+    def compact(self, todos: Optional[Collection[TodoItem]]) -> Optional[CompactionStats]:
+        """把日志折叠为一条快照记录
+
+        先写临时文件再原子替换，压缩过程中崩溃不会损坏原日志。
+
+        Args:
+            todos: 当前全部任务（即日志重放结果）；为 None 时（按需加载的
+                管理器尚未加载任务）重放日志得到
+
+        Returns:
+            压缩统计信息
+        """
+        start = time.perf_counter()
+        bytes_before = self.filepath.stat().st_size if self.filepath.exists() else 0
+        if todos is None:
+            todos = self.load()
+        records_folded = self._count_records()
+        self._write_snapshot(todos)
+        return CompactionStats(
+            records_folded=records_folded,
+            bytes_before=bytes_before,
+            bytes_after=self.filepath.stat().st_size,
+            elapsed=time.perf_counter() - start,
+        )
+
+    @staticmethod
+    def _trim_torn_tail(f: IO[bytes], chunk_size: int = 4096) -> None:
+        """截掉文件末尾不完整的行（最后一个换行符之后的内容）"""
+        end = f.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - chunk_size)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos < end:
+            f.truncate(pos)
+
+    def _should_compact(self, live: int) -> bool:
+        """增量记录是否已经足够多，值得压缩"""
+        return (
+            self._tail_records >= self.compact_min_records
+            and self._tail_records > live * self.compact_ratio
+        )
+
+    def _count_records(self) -> int:
+        """统计日志中的记录数"""
+        if not self.filepath.exists():
+            return 0
+        with open(self.filepath, "r", encoding="utf-8") as f:
+            return sum(1 for line in f if line.strip())
+
+    def _write_snapshot(self, todos: Collection[TodoItem]) -> None:
+        """写入只含一条快照记录的新日志，再原子替换旧文件"""
+        items = [todo.to_dict() for todo in todos]
+        next_id = max((item["id"] for item in items), default=0) + 1
+        head = f'{{"op": "snapshot", "next_id": {next_id}, "bytes": '.encode("utf-8")
+        body = f', "todos": {json.dumps(items, ensure_ascii=False)}}}\n'.encode("utf-8")
+        size = f"{len(head) + self._SIZE_WIDTH + len(body):>{self._SIZE_WIDTH}}".encode("ascii")
+        atomic_write(
+            self.filepath,
+            lambda f: f.writelines([head, size, body]),
+            binary=True,
+            fsync=self.durable,
+        )
+        self._tail_records = 0
+
+    @staticmethod
+    def _encode(op: Op) -> str:
+        """把操作编码为一行 JSON"""
+        kind = op[0]
+        if kind == "add":
+            record = {"op": kind, "todo": op[1].to_dict()}
+        elif kind in ("done", "delete"):
+            record = {"op": kind, "id": op[1]}
+        else:
+            record = {"op": kind}
+        return json.dumps(record, ensure_ascii=False) + "\n"
+
+    @staticmethod
+    def _replay(todos: Dict[int, TodoItem], record: Dict) -> None:
+        """把一条日志记录应用到任务表"""
+        kind = record["op"]
+        if kind == "snapshot":
+            todos.clear()
+            for item in record["todos"]:
+                todo = TodoItem.from_dict(item)
+                todos[todo.id] = todo
+        elif kind == "add":
+            todo = TodoItem.from_dict(record["todo"])
+            todos[todo.id] = todo
+        elif kind == "done":
+            if record["id"] in todos:
+                todos[record["id"]].done = True
+        elif kind == "delete":
+            todos.pop(record["id"], None)
+        elif kind == "clear":
+            for todo_id in [t.id for t in todos.values() if t.done]:
+                del todos[todo_id]
+        else:
+            raise ValueError(f"未知的日志记录: {kind}")
+
+
+class RecordStore(Store):
+    """按记录原地修改的 JSON Lines 存储
+
+    首行是格式标记 {"format": "jd-jsonl", "version": 1}（识别格式只看这一行，
+    与任务内容无关），之后每行一个任务，字段顺序固定：
+        {"id": 1, "done": false, "priority": "medium", "text": "..."}
+
+    修改只改写相关的记录，不重写整个文件：
+
+    - add    : 在文件末尾追加一行
+    - done   : 把该行的 false 原地改为 "true "（字节数不变）
+    - delete : 用空格覆盖该行（保留换行符），加载时跳过空白行
+    - clear  : 整体重写，同时去掉已删除记录留下的空白行
+
+    每条记录的行首偏移在加载或扫描文件时建立索引，文件被其他进程修改后
+    重新扫描（只匹配行首，不解析 JSON）。空白行数超过 compact_min_records，
+    且超过存活记录数的 compact_ratio 倍时，提交后自动压缩。
+
+    只有末尾没有换行符的最后一行视为追加中途崩溃留下的半行。行首不是
+    上述格式、但内容是合法任务的行（如手工编辑过）照常读取，下次写入前
+    整体重写为规范格式；其他无法解析的行报错，不会被截掉。
+    """
+
+    needs_items = False
+
+    # 首行的格式标记；没有标记的旧文件在第一次写入时整体重写补上
+    MAGIC = b'{"format": "jd-jsonl"'
+    _HEADER = MAGIC + b', "version": 1}\n'
+
+    # 行首：记录 ID 与 done 字段的位置
+    _RECORD_RE = re.compile(rb'\{"id": (\d+), "done": ')
+    # 行首：ID、完成状态与优先级（规范格式的记录），用于只扫描行首的索引与计数
+    _HEAD_RE = re.compile(rb'\{"id": (\d+), "done": (true|false) ?, "priority": "(\w+)"')
+
+    def __init__(
+        self,
+        filepath: Path,
+        compact_min_records: int = 1000,
+        compact_ratio: float = 1.0,
+    ):
+        super().__init__(filepath)
+        self.compact_min_records = compact_min_records
+        self.compact_ratio = compact_ratio
+        # ID -> 行首偏移，仅在文件版本戳等于 _index_stamp 时有效
+        self._offsets: Dict[int, int] = {}
+        self._index_stamp = None
+        # 最后一条完整记录之后的偏移（追加位置）
+        self._end = 0
+        # 已删除记录留下的空白行数
+        self._dead_records = 0
+        # 文件是否以格式标记开头
+        self._has_header = False
+        # 不是规范格式的记录数（写入前整体重写）
+        self._irregular = 0
+
+    def load(self) -> List[TodoItem]:
+        """读取全部任务，同时建立记录索引
+
+        先逐行定位记录，再把全部记录拼成一个 JSON 数组一次解析，
+        比逐行调用 json.loads 快。
+        """
+        stamp = self.stamp()
+        records: List[bytes] = []
+        # records 中的位置 -> 已解析的非规范格式记录
+        irregular: Dict[int, dict] = {}
+        offsets: Dict[int, int] = {}
+        dead = 0
+        end = 0
+        for _, pos, line, todo_id, record in self._entries():
+            if todo_id is not None:
+                offsets[todo_id] = pos
+                if record is not None:
+                    irregular[len(records)] = record
+                    line = b"null"
+                records.append(line)
+            elif not line.strip():
+                dead += 1
+            end = pos + len(line)
+        self._set_index(offsets, end, dead, stamp, len(irregular))
+        items = json.loads(b"[" + b",".join(records) + b"]") if records else []
+        for i, record in irregular.items():
+            items[i] = record
+        return self._decode(items)
+
+    def iter_todos(self) -> Iterator[TodoItem]:
+        """逐行读取任务"""
+        for _, _, line, todo_id, record in self._entries():
+            if todo_id is not None:
+                yield TodoItem.from_dict(json.loads(line) if record is None else record)
+
+    def max_id(self) -> int:
+        """当前最大 ID，只扫描行首，不解析记录"""
+        self._ensure_index()
+        return max(self._offsets, default=0)
+
+    def counts(self) -> Dict[Tuple[bool, str], int]:
+        """只扫描行首统计任务数，不解析记录"""
+        counts: Dict[Tuple[bool, str], int] = {}
+        for _, _, line, todo_id, record in self._entries():
+            if todo_id is None:
+                continue
+            if record is None:
+                match = self._HEAD_RE.match(line)
+                key = (match.group(2) == b"true", match.group(3).decode("ascii"))
+            else:
+                key = (bool(record.get("done")), record.get("priority", "medium"))
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def irregular_lines(self) -> List[int]:
+        """不是规范格式的记录所在的行号（从 1 开始），供 jd check 报告"""
+        return [
+            number for number, _, _, todo_id, record in self._entries()
+            if todo_id is not None and record is not None
+        ]
+
+    def save(self, todos: Collection[TodoItem]) -> None:
+        """整体写入全部任务"""
+        atomic_write(
+            self.filepath,
+            lambda f: f.writelines([self._HEADER, *(self._encode(todo) for todo in todos)]),
+            binary=True,
+            fsync=self.durable,
+        )
+        self._index_stamp = None
+
+    def commit(self, ops: List[Op], todos: Optional[Collection[TodoItem]]) -> None:
+        """原地改写修改涉及的记录；clear 整体重写，必要时自动压缩"""
+        start = 0
+        for i, op in enumerate(ops):
+            if op[0] == "clear":
+                self._patch(ops[start:i])
+                self._rewrite(drop_done=True)
+                start = i + 1
+        self._patch(ops[start:])
+
+        self._ensure_index()
+        if (
+            self._dead_records >= self.compact_min_records
+            and self._dead_records > len(self._offsets) * self.compact_ratio
+        ):
+            self._rewrite(drop_done=False)
+
+    def compact(self, todos: Optional[Collection[TodoItem]]) -> Optional[CompactionStats]:
+        """重写文件，去掉已删除记录留下的空白行
+
+        Returns:
+            压缩统计信息，records_folded 为去掉的空白行数
+        """
+        start = time.perf_counter()
+        self._ensure_index()
+        bytes_before = self.filepath.stat().st_size if self.filepath.exists() else 0
+        records_folded = self._dead_records
+        self._rewrite(drop_done=False)
+        return CompactionStats(
+            records_folded=records_folded,
+            bytes_before=bytes_before,
+            bytes_after=self.filepath.stat().st_size,
+            elapsed=time.perf_counter() - start,
+        )
+
+    def _patch(self, ops: List[Op]) -> None:
+        """在原文件上追加、改写或抹去记录"""
+        if not ops:
+            return
+        self._ensure_index()
+        if not self._has_header or self._irregular:
+            # 新文件、旧格式或有手工编辑过的记录：先整体重写为规范格式
+            self._rewrite(drop_done=False)
+            self._ensure_index()
+        with open(self.filepath, "r+b") as f:
+            # 去掉上次写入中途崩溃留下的半行（_end 之后只可能是没有换行符的最后一行）
+            f.truncate(self._end)
+            for op in ops:
+                kind = op[0]
+                if kind == "add":
+                    line = self._encode(op[1])
+                    f.seek(self._end)
+                    f.write(line)
+                    self._offsets[op[1].id] = self._end
+                    self._end += len(line)
+                elif kind in ("done", "delete"):
+                    located = self._locate(f, op[1])
+                    if located is None:
+                        # 已被其他进程删除
+                        continue
+                    offset, line, match = located
+                    if kind == "done":
+                        if line.startswith(b"false", match.end()):
+                            f.seek(offset + match.end())
+                            f.write(b"true ")
+                    else:
+                        f.seek(offset)
+                        f.write(b" " * (len(line) - 1))
+                        del self._offsets[op[1]]
+                        self._dead_records += 1
+            f.flush()
+            if self.durable:
+                os.fsync(f.fileno())
+        self._index_stamp = self.stamp()
+
+    def _locate(self, f: IO[bytes], todo_id: int) -> Optional[Tuple[int, bytes, "re.Match"]]:
+        """读取任务所在的行
+
+        索引可能已经过期（其他进程的修改没有改变文件大小，且发生在同一个
+        修改时间刻度内），因此先核对行首的 ID，不一致时重新扫描一次。
+
+        Returns:
+            (行首偏移, 整行内容, 行首匹配)；任务不存在时为 None
+        """
+        for attempt in range(2):
+            offset = self._offsets.get(todo_id)
+            if offset is not None:
+                f.seek(offset)
+                line = f.readline()
+                match = self._RECORD_RE.match(line)
+                if match and int(match.group(1)) == todo_id:
+                    return offset, line, match
+            if attempt == 0:
+                f.flush()
+                self._scan()
+        return None
+
+    def _rewrite(self, drop_done: bool) -> None:
+        """整体重写文件，去掉空白行；drop_done 为 True 时同时去掉已完成的任务"""
+        kept = []
+        for _, _, line, todo_id, record in self._entries():
+            if todo_id is None:
+                continue
+            if record is None:
+                if drop_done and self._HEAD_RE.match(line).group(2) == b"true":
+                    continue
+            else:
+                todo = TodoItem.from_dict(record)
+                if drop_done and todo.done:
+                    continue
+                line = self._encode(todo)
+            kept.append(line)
+        atomic_write(
+            self.filepath,
+            lambda f: f.writelines([self._HEADER, *kept]),
+            binary=True,
+            fsync=self.durable,
+        )
+        self._index_stamp = None
+
+    def _ensure_index(self) -> None:
+        """文件在建立索引之后被修改过时重新扫描"""
+        if self._index_stamp is None or self.stamp() != self._index_stamp:
+            self._scan()
+
+    def _scan(self) -> None:
+        """扫描行首，重建记录索引"""
+        stamp = self.stamp()
+        offsets: Dict[int, int] = {}
+        dead = irregular = 0
+        end = 0
+        for _, pos, line, todo_id, record in self._entries():
+            if todo_id is not None:
+                offsets[todo_id] = pos
+                irregular += record is not None
+            elif not line.strip():
+                dead += 1
+            end = pos + len(line)
+        self._set_index(offsets, end, dead, stamp, irregular)
+
+    def _set_index(
+        self, offsets: Dict[int, int], end: int, dead: int, stamp, irregular: int
+    ) -> None:
+        self._has_header = end > 0 and self._head().startswith(self.MAGIC)
+        self._offsets = offsets
+        self._end = end
+        self._dead_records = dead
+        self._index_stamp = stamp
+        self._irregular = irregular
+
+    def _entries(self) -> Iterator[Tuple[int, int, bytes, Optional[int], Optional[dict]]]:
+        """逐行识别文件内容
+
+        规范格式的记录只匹配行首，不解析；其他格式的行（如手工编辑过、
+        字段顺序不同）解析整行，是合法的任务记录时照常产出。
+
+        Yields:
+            (行号, 行首偏移, 整行内容, 任务 ID, 解析结果)：规范格式的记录
+            解析结果为 None；空白行与格式标记的任务 ID 为 None。
+            末尾没有换行符的最后一行是追加中途崩溃留下的半行，不产出
+
+        Raises:
+            ValueError: 某一行既不是任务记录也不是空白行时
+        """
+        pos = 0
+        for number, line in enumerate(self._lines(), 1):
+            if not line.endswith(b"\n"):
+                return
+            match = self._HEAD_RE.match(line)
+            if match:
+                yield number, pos, line, int(match.group(1)), None
+            elif not line.strip() or (number == 1 and line.startswith(self.MAGIC)):
+                yield number, pos, line, None, None
+            else:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None
+                if not (isinstance(record, dict) and type(record.get("id")) is int
+                        and isinstance(record.get("text"), str)):
+                    raise ValueError(f"第 {number} 行已损坏: {line[:60]!r}")
+                yield number, pos, line, record["id"], record
+            pos += len(line)
+
+    def _head(self) -> bytes:
+        """文件开头格式标记长度的字节"""
+        with open(self.filepath, "rb") as f:
+            return f.read(len(self.MAGIC))
+
+    def _lines(self) -> Iterator[bytes]:
+        """逐行读取文件（二进制，保留换行符），文件不存在时为空"""
+        if not self.filepath.exists():
+            return
+        with open(self.filepath, "rb") as f:
+            yield from f
+
+    @staticmethod
+    def _encode(todo: TodoItem) -> bytes:
+        """把任务编码为一行记录"""
+        record = {
+            "id": todo.id,
+            "done": todo.done,
+            "priority": todo.priority,
+            "text": todo.text,
+        }
+        return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class SnapshotStore(Store):
+    """二进制快照存储
+
+    文件由四部分组成（整数均为小端）：
+
+    - 文件头：魔数 b"JDB1"、格式版本、记录数、最大 ID、文本区偏移，
+      以及各 (是否完成, 优先级) 分组的任务数
+    - 记录区：每个任务一条 24 字节的定长记录，按 ID 升序排列：
+      ID、标志位（已完成 / 已删除）、优先级、文本在文本区中的偏移与字节数
+    - 优先级序：记录下标按（优先级从高到低, ID）排列，每个 4 字节
+    - 文本区：任务文本的 UTF-8 编码首尾相接
+
+    读取时把文件 mmap 到内存，只解码用到的记录：按 ID 查找用二分查找；
+    list --head N 只访问前 N 条记录（按优先级排序时先查优先级序）及其
+    文本所在的页，不随文件大小变慢；计数直接读取文件头。
+
+    done 与 delete 原地改写记录的标志位和文件头的计数；add 与 clear
+    整体重写文件（复制原有记录与文本的字节，不解码），适合读多写少的
+    大量任务。
+    """
+
+    # 支持按需查询，TodoManager 不预先加载全部任务
+    lazy = True
+    needs_items = False
+
+    MAGIC = b"JDB1"
+    VERSION = 1
+
+    # 魔数、版本、保留、记录数、最大 ID、文本区偏移、6 个分组计数
+    _HEADER = "<4sHHQQQ6I"
+    _HEADER_SIZE = 56
+    _COUNTS_OFFSET = 32
+    # ID、标志位、优先级权重、保留、文本偏移、文本字节数
+    _RECORD = "<QBBHQI"
+    _RECORD_SIZE = 24
+
+    # 标志位
+    _DONE = 1
+    _DELETED = 2
+
+    # 优先级权重 -> 名称
+    _LABELS = {int(weight): label for label, weight in PRIORITY_WEIGHT.items()}
+
+    def load(self) -> List[TodoItem]:
+        """读取全部任务（一次解包整个记录区）"""
+        import struct
+
+        with self._mapped() as view:
+            if view is None:
+                return []
+            mm, header = view
+            records = mm[self._HEADER_SIZE:self._HEADER_SIZE + header[3] * self._RECORD_SIZE]
+            texts = mm[header[5]:]
+        labels = self._LABELS
+        # 记录区由本程序按固定格式写入（文件头校验过魔数与版本），不再逐个验证
+        make = TodoItem if self.strict else trusted_item
+        return [
+            make(
+                todo_id,
+                texts[start:start + length].decode("utf-8"),
+                bool(flags & self._DONE),
+                labels[weight],
+            )
+            for todo_id, flags, weight, _, start, length in struct.iter_unpack(self._RECORD, records)
+            if not flags & self._DELETED
+        ]
+
+    def query(
+        self,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        done: Optional[bool] = None,
+        priorities: Optional[Collection[str]] = None,
+    ) -> List[TodoItem]:
+        """按指定方式筛选、排序、分页查询任务
+
+        按记录区（ID 升序）或优先级序逐条读取，凑够 offset + limit 个
+        即停止，只解码返回的任务的文本。
+
+        Args:
+            sort: 排序方式，p=优先级，i=ID
+            limit: 最多返回的任务数，默认不限
+            offset: 跳过的任务数
+            done: 只查询已完成（True）或未完成（False）的任务，默认不限
+            priorities: 只查询这些优先级的任务，默认不限
+
+        Returns:
+            TodoItem 列表
+        """
+        import struct
+
+        todos: List[TodoItem] = []
+        with self._mapped() as view:
+            if view is None:
+                return todos
+            mm, header = view
+            count = header[3]
+            if sort == "p":
+                start = self._HEADER_SIZE + count * self._RECORD_SIZE
+                order = (struct.unpack_from("<I", mm, start + 4 * k)[0] for k in range(count))
+            else:
+                order = range(count)
+            for i in order:
+                if limit is not None and len(todos) >= limit:
+                    break
+                todo = self._read(mm, header, i)
+                if todo is None:
+                    continue
+                if done is not None and todo.done != done:
+                    continue
+                if priorities is not None and todo.priority not in priorities:
+                    continue
+                if offset:
+                    offset -= 1
+                    continue
+                todos.append(todo)
+        return todos
+
+    def iter_todos(self) -> Iterator[TodoItem]:
+        """按 ID 顺序逐个读取任务"""
+        with self._mapped() as view:
+            if view is None:
+                return
+            mm, header = view
+            for i in range(header[3]):
+                todo = self._read(mm, header, i)
+                if todo is not None:
+                    yield todo
+
+    def get(self, todo_id: int) -> Optional[TodoItem]:
+        """按 ID 查询单个任务（二分查找）"""
+        with self._mapped() as view:
+            if view is None:
+                return None
+            mm, header = view
+            i = self._find(lambda pos, size: mm[pos:pos + size], header[3], todo_id)
+            return None if i is None else self._read(mm, header, i)
+
+    def max_id(self) -> int:
+        """从文件头读取最大 ID"""
+        with self._mapped() as view:
+            return 0 if view is None else view[1][4]
+
+    def counts(self) -> Dict[Tuple[bool, str], int]:
+        """从文件头读取各分组的任务数"""
+        with self._mapped() as view:
+            if view is None:
+                return {}
+            return {
+                self._group_key(group): n
+                for group, n in enumerate(view[1][6:12])
+                if n
+            }
+
+    def save(self, todos: Collection[TodoItem]) -> None:
+        """整体写入全部任务"""
+        self._write([
+            (todo.id, self._DONE if todo.done else 0, int(PRIORITY_WEIGHT[todo.priority]),
+             todo.text.encode("utf-8"))
+            for todo in todos
+        ])
+
+    def commit(self, ops: List[Op], todos: Optional[Collection[TodoItem]]) -> None:
+        """done/delete 原地改写标志位；含 add 或 clear 时整体重写"""
+        if all(op[0] in ("done", "delete") for op in ops):
+            self._patch(ops)
+        elif todos is not None:
+            self.save(todos)
+        else:
+            self._rewrite(ops)
+
+    def compact(self, todos: Optional[Collection[TodoItem]]) -> Optional[CompactionStats]:
+        """重写文件，去掉已删除的记录及其文本
+
+        Returns:
+            压缩统计信息，records_folded 为去掉的记录数
+        """
+        start = time.perf_counter()
+        with self._mapped() as view:
+            header = None if view is None else view[1]
+        if header is None:
+            return None
+        bytes_before = self.filepath.stat().st_size
+        self._rewrite([])
+        return CompactionStats(
+            records_folded=header[3] - sum(header[6:12]),
+            bytes_before=bytes_before,
+            bytes_after=self.filepath.stat().st_size,
+            elapsed=time.perf_counter() - start,
+        )
+
+    @contextmanager
+    def _mapped(self) -> Iterator[Optional[Tuple["mmap.mmap", Tuple]]]:
+        """把文件只读映射到内存
+
+        产生 (映射, 文件头字段)；文件不存在或为空时产生 None。
+
+        Raises:
+            ValueError: 文件不是有效的快照或版本不受支持时
+        """
+        import mmap
+        import struct
+
+        try:
+            f = open(self.filepath, "rb")
+        except FileNotFoundError:
+            yield None
+            return
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield None
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if len(mm) < self._HEADER_SIZE or mm[:4] != self.MAGIC:
+                    raise ValueError(f"不是有效的快照文件: {self.filepath}")
+                header = struct.unpack_from(self._HEADER, mm)
+                if header[1] != self.VERSION:
+                    raise ValueError(f"不支持的快照格式版本: {header[1]}")
+                yield mm, header
+
+    def _read(self, mm: "mmap.mmap", header: Tuple, i: int) -> Optional[TodoItem]:
+        """解码第 i 条记录，已删除时为 None"""
+        import struct
+
+        todo_id, flags, weight, _, start, length = struct.unpack_from(
+            self._RECORD, mm, self._HEADER_SIZE + i * self._RECORD_SIZE
+        )
+        if flags & self._DELETED:
+            return None
+        start += header[5]
+        return TodoItem(
+            id=todo_id,
+            text=mm[start:start + length].decode("utf-8"),
+            done=bool(flags & self._DONE),
+            priority=self._LABELS[weight],
+        )
+
+    def _find(self, read: Callable[[int, int], bytes], count: int, todo_id: int) -> Optional[int]:
+        """在按 ID 升序的记录区中二分查找，返回记录下标
+
+        Args:
+            read: 按 (偏移, 字节数) 读取文件内容的函数
+            count: 记录数
+            todo_id: 任务 ID
+        """
+        import struct
+
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (mid_id,) = struct.unpack("<Q", read(self._HEADER_SIZE + mid * self._RECORD_SIZE, 8))
+            if mid_id < todo_id:
+                lo = mid + 1
+            elif mid_id > todo_id:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _patch(self, ops: List[Op]) -> None:
+        """原地改写记录的标志位与文件头的分组计数"""
+        import struct
+
+        if not ops or not self.filepath.exists():
+            return
+        with open(self.filepath, "r+b") as f:
+            def read(pos: int, size: int) -> bytes:
+                f.seek(pos)
+                return f.read(size)
+
+            header = list(struct.unpack(self._HEADER, read(0, self._HEADER_SIZE)))
+            for kind, todo_id in ops:
+                i = self._find(read, header[3], todo_id)
+                if i is None:
+                    # 已被其他进程删除
+                    continue
+                pos = self._HEADER_SIZE + i * self._RECORD_SIZE + 8
+                flags, weight = read(pos, 2)
+                if flags & self._DELETED:
+                    continue
+                new_flags = flags | (self._DONE if kind == "done" else self._DELETED)
+                if new_flags == flags:
+                    continue
+                header[6 + self._group(flags & self._DONE, weight)] -= 1
+                if kind == "done":
+                    header[6 + self._group(self._DONE, weight)] += 1
+                f.seek(pos)
+                f.write(bytes([new_flags]))
+            f.seek(self._COUNTS_OFFSET)
+            f.write(struct.pack("<6I", *header[6:12]))
+            f.flush()
+            if self.durable:
+                os.fsync(f.fileno())
+
+    def _rewrite(self, ops: List[Op]) -> None:
+        """把修改应用到现有记录上，整体重写文件（文本只复制字节，不解码）"""
+        import struct
+
+        entries: Dict[int, Tuple[int, int, int, bytes]] = {}
+        with self._mapped() as view:
+            if view is not None:
+                mm, header = view
+                records = mm[self._HEADER_SIZE:self._HEADER_SIZE + header[3] * self._RECORD_SIZE]
+                texts = mm[header[5]:]
+                for todo_id, flags, weight, _, start, length in struct.iter_unpack(
+                    self._RECORD, records
+                ):
+                    if not flags & self._DELETED:
+                        entries[todo_id] = (todo_id, flags, weight, texts[start:start + length])
+
+        for op in ops:
+            kind = op[0]
+            if kind == "add":
+                todo = op[1]
+                entries[todo.id] = (
+                    todo.id, self._DONE if todo.done else 0,
+                    int(PRIORITY_WEIGHT[todo.priority]), todo.text.encode("utf-8"),
+                )
+            elif kind == "done":
+                if op[1] in entries:
+                    todo_id, flags, weight, text = entries[op[1]]
+                    entries[todo_id] = (todo_id, flags | self._DONE, weight, text)
+            elif kind == "delete":
+                entries.pop(op[1], None)
+            elif kind == "clear":
+                entries = {
+                    todo_id: entry for todo_id, entry in entries.items()
+                    if not entry[1] & self._DONE
+                }
+        self._write(list(entries.values()))
+
+    def _write(self, entries: List[Tuple[int, int, int, bytes]]) -> None:
+        """把 (ID, 标志位, 优先级权重, 文本字节) 列表写为快照文件"""
+        import struct
+
+        entries.sort(key=lambda entry: entry[0])
+        count = len(entries)
+        counts = [0] * 6
+        records = bytearray(count * self._RECORD_SIZE)
+        start = 0
+        for i, (todo_id, flags, weight, text) in enumerate(entries):
+            struct.pack_into(
+                self._RECORD, records, i * self._RECORD_SIZE,
+                todo_id, flags, weight, 0, start, len(text),
+            )
+            start += len(text)
+            counts[self._group(flags & self._DONE, weight)] += 1
+
+        # 记录已按 ID 排序，按权重稳定排序即得（优先级从高到低, ID）
+        order = sorted(range(count), key=lambda i: -entries[i][2])
+        order_bytes = struct.pack(f"<{count}I", *order)
+        header = struct.pack(
+            self._HEADER, self.MAGIC, self.VERSION, 0, count,
+            entries[-1][0] if entries else 0,
+            self._HEADER_SIZE + len(records) + len(order_bytes),
+            *counts,
+        )
+
+        def write(f: IO[bytes]) -> None:
+            f.write(header)
+            f.write(records)
+            f.write(order_bytes)
+            f.writelines(entry[3] for entry in entries)
+
+        atomic_write(self.filepath, write, binary=True, fsync=self.durable)
+
+    def _group(self, done: int, weight: int) -> int:
+        """分组计数在文件头中的下标"""
+        return (3 if done else 0) + weight - 1
+
+    def _group_key(self, group: int) -> Tuple[bool, str]:
+        """文件头分组计数下标 -> (是否完成, 优先级)"""
+        return group >= 3, self._LABELS[group % 3 + 1]
+
+
+class SqliteStore(Store):
+    """SQLite 存储
+
+    每个任务一行，id 为主键，done 与优先级权重建有索引。修改只更新
+    单行；排序查询直接走索引，TodoManager 无需预先加载全部任务。
+    counts 表由触发器维护各 (done, 优先级) 分组的任务数，计数不必扫描全表。
+    按状态筛选、按优先级排序的查询（如 jd next）走 (done, 权重, id) 索引，
+    只读取索引开头几项，不必排序。
+    """
+
+    # 支持按需查询，TodoManager 不预先加载全部任务
+    lazy = True
+    needs_items = False
+
+    # 建表与计数表初始化在同一个事务内完成，避免多个进程同时初始化
+    _SCHEMA = """
+        BEGIN IMMEDIATE;
+        CREATE TABLE IF NOT EXISTS todos (
+            id INTEGER PRIMARY KEY,
+            text TEXT NOT NULL,
+            done INTEGER NOT NULL DEFAULT 0,
+            priority TEXT NOT NULL,
+            weight INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_todos_done ON todos (done);
+        CREATE INDEX IF NOT EXISTS idx_todos_priority ON todos (weight DESC, id);
+        CREATE INDEX IF NOT EXISTS idx_todos_queue ON todos (done, weight DESC, id);
+        CREATE TABLE IF NOT EXISTS counts (
+            done INTEGER NOT NULL,
+            priority TEXT NOT NULL,
+            n INTEGER NOT NULL,
+            PRIMARY KEY (done, priority)
+        );
+        CREATE TRIGGER IF NOT EXISTS todos_count_insert AFTER INSERT ON todos BEGIN
+            INSERT OR IGNORE INTO counts (done, priority, n) VALUES (NEW.done, NEW.priority, 0);
+            UPDATE counts SET n = n + 1 WHERE done = NEW.done AND priority = NEW.priority;
+        END;
+        CREATE TRIGGER IF NOT EXISTS todos_count_delete AFTER DELETE ON todos BEGIN
+            UPDATE counts SET n = n - 1 WHERE done = OLD.done AND priority = OLD.priority;
+        END;
+        CREATE TRIGGER IF NOT EXISTS todos_count_update AFTER UPDATE OF done, priority ON todos
+        BEGIN
+            UPDATE counts SET n = n - 1 WHERE done = OLD.done AND priority = OLD.priority;
+            INSERT OR IGNORE INTO counts (done, priority, n) VALUES (NEW.done, NEW.priority, 0);
+            UPDATE counts SET n = n + 1 WHERE done = NEW.done AND priority = NEW.priority;
+        END;
+        -- 旧数据库没有计数表时按现有数据初始化（有任务时计数表不会为空）
+        INSERT INTO counts (done, priority, n)
+            SELECT done, priority, COUNT(*) FROM todos
+            WHERE NOT EXISTS (SELECT 1 FROM counts)
+            GROUP BY done, priority;
+        COMMIT;
+    """
+
+    # 排序方式 -> ORDER BY 子句
+    _ORDER_BY = {
+        None: "id",
+        "i": "id",
+        "p": "weight DESC, id",
+    }
+
+    def __init__(self, filepath: Path):
+        super().__init__(filepath)
+        self._conn: Optional["sqlite3.Connection"] = None
+
+    @property
+    def conn(self) -> "sqlite3.Connection":
+        """数据库连接（首次使用时打开并建表）"""
+        if self._conn is None:
+            import sqlite3
+
+            self._conn = sqlite3.connect(str(self.filepath))
+            self._conn.executescript(self._SCHEMA)
+        return self._conn
+
+    def load(self) -> List[TodoItem]:
+        """读取全部任务"""
+        return self.query()
+
+    def stamp(self) -> Optional[Tuple[int, int, int]]:
+        """数据文件的版本戳
+
+        先打开连接：首次打开时建表会修改文件，不应被当作其他进程的修改。
+        """
+        self.conn
+        return super().stamp()
+
+    def query(
+        self,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        done: Optional[bool] = None,
+        priorities: Optional[Collection[str]] = None,
+    ) -> List[TodoItem]:
+        """按指定方式筛选、排序、分页查询任务
+
+        Args:
+            sort: 排序方式，p=优先级，i=ID
+            limit: 最多返回的任务数，默认不限
+            offset: 跳过的任务数
+            done: 只查询已完成（True）或未完成（False）的任务，默认不限
+            priorities: 只查询这些优先级的任务，默认不限
+
+        Returns:
+            TodoItem 列表
+        """
+        conditions = []
+        params: List = []
+        if done is not None:
+            conditions.append("done = ?")
+            params.append(int(done))
+        if priorities is not None:
+            priorities = list(priorities)
+            conditions.append(f"priority IN ({','.join('?' * len(priorities))})")
+            params.extend(priorities)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self.conn.execute(
+            f"SELECT id, text, done, priority FROM todos {where}"
+            f"ORDER BY {self._ORDER_BY[sort]} LIMIT ? OFFSET ?",
+            (*params, -1 if limit is None else limit, offset),
+        )
+        return [self._to_todo(row) for row in rows]
+
+    def iter_todos(self) -> Iterator[TodoItem]:
+        """按 ID 顺序逐行读取任务"""
+        rows = self.conn.execute("SELECT id, text, done, priority FROM todos ORDER BY id")
+        return (self._to_todo(row) for row in rows)
+
+    def get(self, todo_id: int) -> Optional[TodoItem]:
+        """按 ID 查询单个任务"""
+        row = self.conn.execute(
+            "SELECT id, text, done, priority FROM todos WHERE id = ?", (todo_id,)
+        ).fetchone()
+        return self._to_todo(row) if row else None
+
+    def max_id(self) -> int:
+        """当前最大 ID，空表为 0"""
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM todos").fetchone()[0]
+
+    def counts(self) -> Dict[Tuple[bool, str], int]:
+        """读取触发器维护的计数表"""
+        rows = self.conn.execute("SELECT done, priority, n FROM counts WHERE n > 0")
+        return {(bool(done), priority): n for done, priority, n in rows}
+
+    def save(self, todos: Collection[TodoItem]) -> None:
+        """整体替换全部任务"""
+        self._set_synchronous()
+        with self.conn:
+            self.conn.execute("DELETE FROM todos")
+            self.conn.executemany(
+                "INSERT INTO todos (id, text, done, priority, weight) VALUES (?, ?, ?, ?, ?)",
+                [self._to_row(todo) for todo in todos],
+            )
+
+    def commit(self, ops: List[Op], todos: Optional[Collection[TodoItem]]) -> None:
+        """在一个事务内逐条执行修改"""
+        self._set_synchronous()
+        with self.conn:
+            for op in ops:
+                kind = op[0]
+                if kind == "add":
+                    self.conn.execute(
+                        "INSERT INTO todos (id, text, done, priority, weight) VALUES (?, ?, ?, ?, ?)",
+                        self._to_row(op[1]),
+                    )
+                elif kind == "done":
+                    self.conn.execute("UPDATE todos SET done = 1 WHERE id = ?", (op[1],))
+                elif kind == "delete":
+                    self.conn.execute("DELETE FROM todos WHERE id = ?", (op[1],))
+                elif kind == "clear":
+                    self.conn.execute("DELETE FROM todos WHERE done = 1")
+
+    def compact(self, todos: Optional[Collection[TodoItem]]) -> Optional[CompactionStats]:
+        """VACUUM 回收已删除行占用的空间"""
+        start = time.perf_counter()
+        self.conn.commit()
+        bytes_before = self.filepath.stat().st_size
+        self.conn.execute("VACUUM")
+        return CompactionStats(
+            records_folded=0,
+            bytes_before=bytes_before,
+            bytes_after=self.filepath.stat().st_size,
+            elapsed=time.perf_counter() - start,
+        )
+
+    def _set_synchronous(self) -> None:
+        """按 durable 设置提交时是否等待数据落盘（须在事务之外设置）"""
+        self.conn.execute(f"PRAGMA synchronous = {'FULL' if self.durable else 'OFF'}")
+
+    @staticmethod
+    def _to_row(todo: TodoItem) -> Tuple:
+        """TodoItem -> 数据库行"""
+        return (todo.id, todo.text, int(todo.done), todo.priority, PRIORITY_WEIGHT[todo.priority])
+
+    @staticmethod
+    def _to_todo(row: Tuple) -> TodoItem:
+        """数据库行 -> TodoItem"""
+        return TodoItem(id=row[0], text=row[1], done=bool(row[2]), priority=row[3])
+
+
+def iter_json_array(f: IO[str], key: str, chunk_size: int = 64 * 1024) -> Iterator[Dict]:
+    """增量解析 JSON 文件中顶层对象某个键对应的数组，逐个产生元素
+
+    每次只读取 chunk_size 个字符，内存占用与单个元素大小相关，
+    与文件大小无关。
+
+    Args:
+        f: 文本文件对象
+        key: 数组所在的键名（该键需出现在其他含同名字符串的内容之前）
+        chunk_size: 每次读取的字符数
+
+    Raises:
+        ValueError: 文件格式无效时
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        """读取下一块，返回是否读到了新内容"""
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    # 定位数组起点
+    pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+    while True:
+        match = pattern.search(buf, pos)
+        if match:
+            pos = match.end()
+            break
+        # 保留末尾一小段，防止键名被分块截断
+        pos = max(pos, len(buf) - len(key) - 16)
+        if not fill():
+            return
+
+    while True:
+        # 跳过空白和逗号
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buf):
+            if not fill():
+                raise ValueError(f"JSON 数组未结束: {key}")
+            continue
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # 元素被分块截断，读取更多内容后重试
+            if eof or not fill():
+                raise ValueError(f"JSON 数组格式无效: {key}")
+            continue
+        pos = end
+        yield item
+
+
+# 压缩扩展名 -> (提供 open(文件, 模式, encoding=...) 的模块（依次尝试），写入参数)。
+# 压缩级别按读写耗时选择：gzip 默认的 9 级与 xz 默认的 6 级写入慢数倍，
+# 文件却只小一点。zstd 需要 Python 3.14+ 的 compression.zstd 或第三方 zstandard 包
+COMPRESSIONS = {
+    ".gz": (("gzip",), {"compresslevel": 6}),
+    ".xz": (("lzma",), {"preset": 1}),
+    ".bz2": (("bz2",), {}),
+    ".zst": (("compression.zstd", "zstandard"), {}),
+}
+
+
+def compression_module(suffix: str) -> Tuple[object, Dict]:
+    """导入压缩扩展名对应的模块
+
+    Args:
+        suffix: 压缩扩展名，如 ".gz"
+
+    Returns:
+        (提供 open 函数的模块, 写入时传给 open 的参数)
+
+    Raises:
+        ValueError: 压缩格式未知或当前环境不支持时
+    """
+    from importlib import import_module
+
+    if suffix not in COMPRESSIONS:
+        raise ValueError(f"不支持的压缩格式: {suffix}")
+    names, options = COMPRESSIONS[suffix]
+    for name in names:
+        try:
+            return import_module(name), options
+        except ImportError:
+            continue
+    raise ValueError(f"当前环境不支持 {suffix} 压缩（需要 {' 或 '.join(names)}）")
+
+
+class CodecStore(Store):
+    """整体序列化的二进制存储，子类提供编解码器（marshal / pickle）
+
+    文件由文件头和载荷组成：
+
+    - 文件头：魔数（区分编解码器）、格式版本、最大 ID，以及各
+      (是否完成, 优先级) 分组的任务数；只需新 ID 或计数时只读文件头
+    - 载荷：任务元组 (id, text, done, priority) 列表的序列化结果
+
+    元组比字典少了重复的键，编解码都在 C 中完成，是读写最快的格式；
+    但文件不可读，也不保证跨 Python 版本兼容，适合作为本机私有的缓存。
+    与 .jdb 一样由魔数与格式版本确认，加载时不逐个验证。
+    """
+
+    # 编解码器名与魔数（子类定义）
+    CODEC = ""
+    MAGIC = b""
+    VERSION = 1
+
+    # 魔数、格式版本、最大 ID、6 个分组计数
+    _HEADER = "<4sHQ6I"
+    _HEADER_SIZE = 38
+    # 文件头中计数的分组顺序
+    _GROUPS = [(done, priority) for done in (False, True) for priority in PRIORITY_WEIGHT]
+
+    def load(self) -> List[TodoItem]:
+        """读取全部任务"""
+        if not self.filepath.exists():
+            return []
+        with open(self.filepath, "rb") as f:
+            self._header(f.read(self._HEADER_SIZE))
+            rows = self._loads(f.read())
+        if self.strict:
+            return [TodoItem(*row) for row in rows]
+        return trusted_rows(rows)
+
+    def max_id(self) -> int:
+        """从文件头读取最大 ID"""
+        header = self._read_header()
+        return 0 if header is None else header[2]
+
+    def counts(self) -> Dict[Tuple[bool, str], int]:
+        """从文件头读取各分组的任务数"""
+        header = self._read_header()
+        if header is None:
+            return {}
+        return {key: n for key, n in zip(self._GROUPS, header[3:]) if n}
+
+    def save(self, todos: Collection[TodoItem]) -> None:
+        """整体写入全部任务"""
+        import struct
+
+        rows = [(todo.id, todo.text, todo.done, todo.priority) for todo in todos]
+        counts = dict.fromkeys(self._GROUPS, 0)
+        for row in rows:
+            counts[(row[2], row[3])] += 1
+        header = struct.pack(
+            self._HEADER, self.MAGIC, self.VERSION,
+            max((row[0] for row in rows), default=0), *counts.values(),
+        )
+        payload = self._dumps(rows)
+        atomic_write(
+            self.filepath, lambda f: f.writelines((header, payload)),
+            binary=True, fsync=self.durable,
+        )
+
+    def _read_header(self) -> Optional[Tuple]:
+        """读取文件头，文件不存在时为 None"""
+        try:
+            with open(self.filepath, "rb") as f:
+                return self._header(f.read(self._HEADER_SIZE))
+        except FileNotFoundError:
+            return None
+
+    def _header(self, data: bytes) -> Tuple:
+        """解析文件头
+
+        Raises:
+            ValueError: 魔数不符或版本不受支持时
+        """
+        import struct
+
+        if len(data) < self._HEADER_SIZE or data[:4] != self.MAGIC:
+            raise ValueError(f"不是有效的 {self.CODEC} 数据文件: {self.filepath}")
+        header = struct.unpack(self._HEADER, data)
+        if header[1] != self.VERSION:
+            raise ValueError(f"不支持的 {self.CODEC} 格式版本: {header[1]}")
+        return header
+
+    def _dumps(self, rows: List[Tuple]) -> bytes:
+        raise NotImplementedError
+
+    def _loads(self, payload: bytes) -> List[Tuple]:
+        raise NotImplementedError
+
+
+class MarshalStore(CodecStore):
+    """marshal 序列化的存储（见 CodecStore）"""
+
+    CODEC = "marshal"
+    MAGIC = b"JDM1"
+
+    def _dumps(self, rows: List[Tuple]) -> bytes:
+        import marshal
+
+        return marshal.dumps(rows)
+
+    def _loads(self, payload: bytes) -> List[Tuple]:
+        import marshal
+
+        return marshal.loads(payload)
+
+
+class PickleStore(CodecStore):
+    """pickle 序列化的存储（见 CodecStore）
+
+    载荷只含基本类型，读取时禁止加载任何类或函数：来历不明的文件
+    （如 jd import 别人给的 .pickle）不能借此执行代码。
+    """
+
+    CODEC = "pickle"
+    MAGIC = b"JDP1"
+
+    def _dumps(self, rows: List[Tuple]) -> bytes:
+        import pickle
+
+        return pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _loads(self, payload: bytes) -> List[Tuple]:
+        import pickle
+
+        class Unpickler(pickle.Unpickler):
+            def find_class(self, module: str, name: str):
+                raise ValueError(f"pickle 数据文件中不允许出现对象: {module}.{name}")
+
+        return Unpickler(io.BytesIO(payload)).load()
+
+
+# 扩展名 -> 存储后端
+STORES = {
+    ".json": JsonStore,
+    ".jdlog": JournalStore,
+    ".jsonl": RecordStore,
+    ".jdb": SnapshotStore,
+    ".db": SqliteStore,
+    ".sqlite": SqliteStore,
+    ".marshal": MarshalStore,
+    ".pickle": PickleStore,
+    ".pkl": PickleStore,
+}
+
+# 编解码器名 -> 创建存储后端的函数（TodoManager / open_store 的 codec 参数）
+CODECS: Dict[str, Callable[[Path], Store]] = {
+    "json": JsonStore,
+    "json-compact": lambda filepath: JsonStore(filepath, indent=None),
+    "jsonl": RecordStore,
+    "jdlog": JournalStore,
+    "jdb": SnapshotStore,
+    "sqlite": SqliteStore,
+    "marshal": MarshalStore,
+    "pickle": PickleStore,
+}
+
+# 文件开头的魔数 -> 编解码器名；旧的 JSON 文件（如 {"todos": ...}）不在其中，按扩展名处理
+MAGICS = [
+    (b"JDM1", "marshal"),
+    (b"JDP1", "pickle"),
+    (SnapshotStore.MAGIC, "jdb"),
+    (b"SQLite format 3\x00", "sqlite"),
+    (b'{"next_id":', "json-compact"),
+    (b'{\n  "next_id":', "json"),
+    (RecordStore.MAGIC, "jsonl"),
+    # 没有格式标记的旧 .jsonl 文件，第一条记录未被删除时仍可识别
+    (b'{"id": ', "jsonl"),
+    (b'{"op": ', "jdlog"),
+]
+
+
+def sniff_codec(filepath: Path) -> Optional[str]:
+    """按文件开头的魔数识别编解码器
+
+    Returns:
+        编解码器名（CODECS 的键）；文件不存在、为空或无法识别时为 None
+    """
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        head = os.read(fd, 32)
+    finally:
+        os.close(fd)
+    for magic, codec in MAGICS:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def open_store(filepath: Path, codec: Optional[str] = None):
+    """创建存储后端
+
+    已存在的文件按开头的魔数识别格式（见 sniff_codec）；新文件或无法
+    识别时使用 codec 指定的格式，未指定时按扩展名选择，未知扩展名按 JSON 处理。
+
+    最后一个扩展名是压缩格式时（如 todo.json.gz），按前一个扩展名选择
+    后端并压缩存储；只有整体读写的 JSON 存储支持压缩。
+
+    Args:
+        filepath: 数据文件路径
+        codec: 新文件使用的格式（CODECS 的键，如 "json-compact"）
+
+    Returns:
+        存储后端实例
+
+    Raises:
+        ValueError: codec 未知，对不支持压缩的格式指定了压缩，或压缩格式不可用时
+    """
+    if codec is not None and codec not in CODECS:
+        raise ValueError(f"未知的格式: {codec}（可选 {', '.join(CODECS)}）")
+    filepath = Path(filepath)
+    suffix = filepath.suffix.lower()
+    if suffix in COMPRESSIONS:
+        inner = Path(filepath.stem).suffix.lower()
+        if STORES.get(inner, JsonStore) is not JsonStore:
+            raise ValueError(f"{inner} 格式不支持压缩存储，只有 .json 可以压缩")
+        return JsonStore(filepath, compression=suffix)
+    codec = sniff_codec(filepath) or codec
+    if codec is not None:
+        return CODECS[codec](filepath)
+    store_class = STORES.get(suffix, JsonStore)
+    return store_class(filepath)
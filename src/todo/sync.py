@@ -0,0 +1,427 @@
+"""同步
+
+jd sync <路径> 在两个数据文件（如笔记本与共享服务器上的任务列表）之间
+交换上次同步以来的修改，不必整体复制文件。
+
+每个数据文件旁有同步状态 <数据文件>.sync（SQLite），第一次同步时创建：
+
+- items：每个任务（包括已删除的）一行：全局唯一的 uid、本地 ID、文本、
+  优先级、状态（未完成 / 已完成 / 已删除）、版本号 rev、修改时间，
+  以及本地修改序号 seq（每次修改取新的序号，按 seq 建索引）
+- peers：每个同步过的对端，记录上次同步结束时本地的 seq
+- meta：本副本的 ID（replica）、对应的数据文件版本戳
+
+同步状态存在时，TodoManager 每次提交后增量更新（与搜索索引相同）；
+数据文件被其他程序改写过（版本戳不一致）时，同步前与全部任务对比一次，
+找出增删与完成的任务。
+
+同步时双方各自取出 seq 大于上次同步的行，交换与合并的开销只与修改数
+成正比。合并是确定性的：任务的状态只会前进（未完成 -> 已完成 -> 已删除），
+同一任务取 (状态, rev, 修改时间) 较大的一方，双方同步后结果相同。
+已删除的任务保留一行（墓碑），避免被对端重新加回。
+墓碑只在同步状态存在后才会记下：jd export --sync 导出时为源文件与导出的
+文件建立同步状态（普通导出不建立）；直接复制的文件在第一次同步前删除的任务会被对端重新加回，
+同步结果中的 untracked 列出这种情况，由 CLI 给出警告。
+
+任务 ID 只在本地有效：对端新增的任务在本地按本地的 ID 序列分配新 ID，
+两边各自分配的 ID 相同也不会冲突，同一任务在两边的 ID 可以不同。
+第一次同步时，已有任务的 uid 由 (ID, 文本, 优先级) 计算，从同一文件
+复制出的两份列表中相同的任务会被识别为同一任务。
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from .models import TodoItem
+
+if TYPE_CHECKING:
+    import sqlite3
+    from .manager import TodoManager
+
+# 任务状态，只会增大
+OPEN, DONE, DELETED = 0, 1, 2
+
+# SQLite 单条语句的参数个数上限（保守值）
+_MAX_PARAMS = 900
+
+
+@dataclass
+class Change:
+    """一个任务的同步状态"""
+
+    uid: str
+    text: str
+    priority: str
+    state: int
+    rev: int
+    modified: float
+
+    @property
+    def key(self) -> Tuple[int, int, float]:
+        """合并时的比较键：较大的一方胜出"""
+        return (self.state, self.rev, self.modified)
+
+
+@dataclass
+class SyncStats:
+    """一次同步的统计信息"""
+
+    # 发给对端、对端采纳的修改数
+    sent: int
+    # 从对端收到、本地采纳的修改数
+    received: int
+    # 双方交换的修改记录数（上次同步以来的修改）
+    exchanged: int
+    elapsed: float
+    # 同步前没有同步状态的数据文件（此前删除的任务可能被对端重新加回）
+    untracked: List[str] = field(default_factory=list)
+
+
+class SyncState:
+    """数据文件的同步状态（<数据文件>.sync）"""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS items (
+            uid TEXT PRIMARY KEY,
+            id INTEGER UNIQUE,
+            text TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            state INTEGER NOT NULL,
+            rev INTEGER NOT NULL,
+            modified REAL NOT NULL,
+            seq INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS items_seq ON items (seq);
+        CREATE TABLE IF NOT EXISTS peers (
+            replica TEXT PRIMARY KEY,
+            sent INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, filepath: Path):
+        self.filepath = Path(filepath)
+        self._conn: Optional["sqlite3.Connection"] = None
+        # 下一个修改序号，事务开始时读取
+        self._seq = 0
+
+    @property
+    def conn(self) -> "sqlite3.Connection":
+        """数据库连接（首次使用时打开并建表）"""
+        if self._conn is None:
+            import sqlite3
+
+            self._conn = sqlite3.connect(str(self.filepath))
+            self._conn.executescript(self._SCHEMA)
+        return self._conn
+
+    def exists(self) -> bool:
+        """同步状态文件是否已建立"""
+        return os.path.exists(self.filepath)
+
+    @property
+    def replica(self) -> str:
+        """本副本的 ID（第一次使用时生成）"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'replica'").fetchone()
+        if row is not None:
+            return row[0]
+        replica = uuid.uuid4().hex
+        with self.conn:
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('replica', ?)", (replica,))
+        return replica
+
+    def is_fresh(self, stamp) -> bool:
+        """同步状态是否对应版本戳为 stamp 的数据文件"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'stamp'").fetchone()
+        return row is not None and row[0] == json.dumps(stamp)
+
+    def apply(self, ops: List[tuple], before, after) -> None:
+        """把一次提交的修改记入同步状态
+
+        同步状态与提交前的数据文件不一致时（已经过期）不做修改，
+        留待下次同步前与全部任务对比。
+
+        Args:
+            ops: 修改操作，格式同 Store.commit
+            before: 提交前数据文件的版本戳
+            after: 提交后数据文件的版本戳
+        """
+        if not self.is_fresh(before):
+            return
+        with self.conn:
+            self._begin()
+            for op in ops:
+                kind = op[0]
+                if kind == "add":
+                    self._insert(uuid.uuid4().hex, op[1])
+                elif kind == "done":
+                    self._advance("id = ? AND state = ?", (op[1], OPEN), DONE)
+                elif kind == "delete":
+                    self._advance("id = ? AND state < ?", (op[1], DELETED), DELETED)
+                elif kind == "clear":
+                    self._advance("state = ?", (DONE,), DELETED)
+            self._set_stamp(after)
+
+    def reconcile(self, todos: Iterable[TodoItem], stamp) -> None:
+        """与全部任务对比，记下同步状态之外的修改（数据文件被其他程序改写过时）
+
+        文本或优先级不同的任务视为删除后新增；新任务的 uid 由
+        (ID, 文本, 优先级) 计算。
+
+        Args:
+            todos: 全部任务
+            stamp: 数据文件当前的版本戳
+        """
+        with self.conn:
+            self._begin()
+            known = {
+                row[0]: row[1:]
+                for row in self.conn.execute(
+                    "SELECT id, uid, text, priority, state FROM items WHERE id IS NOT NULL"
+                )
+            }
+            for todo in todos:
+                row = known.pop(todo.id, None)
+                if row is not None:
+                    uid, text, priority, state = row
+                    # 状态只会前进，已完成的任务变回未完成同样视为替换
+                    reopened = state == DONE and not todo.done
+                    if (text, priority) == (todo.text, todo.priority) and not reopened:
+                        if todo.done and state == OPEN:
+                            self._advance("uid = ?", (uid,), DONE)
+                        continue
+                    self._advance("uid = ?", (uid,), DELETED)
+                # 修改时间未知，记为 0：同一文件的两份副本得到相同的同步状态
+                self._insert(self._content_uid(todo), todo, modified=0.0)
+            for uid, _, _, _ in known.values():
+                self._advance("uid = ?", (uid,), DELETED)
+            self._set_stamp(stamp)
+
+    def changes(self, since: int) -> List[Change]:
+        """本地修改序号大于 since 的任务（走 seq 索引）"""
+        rows = self.conn.execute(
+            "SELECT uid, text, priority, state, rev, modified FROM items "
+            "WHERE seq > ? ORDER BY seq",
+            (since,),
+        )
+        return [Change(*row) for row in rows]
+
+    def lookup(self, uids: List[str]) -> Dict[str, Tuple[Change, Optional[int]]]:
+        """按 uid 读取任务的同步状态与本地 ID"""
+        found = {}
+        for start in range(0, len(uids), _MAX_PARAMS):
+            chunk = uids[start:start + _MAX_PARAMS]
+            rows = self.conn.execute(
+                "SELECT uid, text, priority, state, rev, modified, id FROM items "
+                f"WHERE uid IN ({','.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in rows:
+                found[row[0]] = (Change(*row[:6]), row[6])
+        return found
+
+    def adopt(self, changes: List[Tuple[Change, Optional[int]]], stamp) -> None:
+        """记下从对端采纳的任务状态
+
+        Args:
+            changes: (胜出的状态, 本地 ID) 列表；本地 ID 为 None 表示任务已删除
+            stamp: 写入后数据文件的版本戳
+        """
+        with self.conn:
+            self._begin()
+            for change, todo_id in changes:
+                if todo_id is not None:
+                    # 本地新增时 apply 以随机 uid 记下的行，换成对端的 uid
+                    self.conn.execute(
+                        "DELETE FROM items WHERE id = ? AND uid != ?", (todo_id, change.uid)
+                    )
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO items "
+                    "(uid, id, text, priority, state, rev, modified, seq) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (change.uid, todo_id, change.text, change.priority, change.state,
+                     change.rev, change.modified, self._next_seq()),
+                )
+            self._set_stamp(stamp)
+
+    def sent(self, replica: str) -> int:
+        """上次与 replica 同步结束时的本地修改序号，从未同步过时为 0"""
+        row = self.conn.execute("SELECT sent FROM peers WHERE replica = ?", (replica,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def mark_synced(self, replica: str) -> None:
+        """记录与 replica 的同步已完成（之前的修改都已交换）"""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO peers (replica, sent) "
+                "VALUES (?, (SELECT COALESCE(MAX(seq), 0) FROM items))",
+                (replica,),
+            )
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _begin(self) -> None:
+        self._seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM items").fetchone()[0]
+
+    def _next_seq(self) -> int:
+        self._seq += 1
+        return self._seq
+
+    def _insert(self, uid: str, todo: TodoItem, modified: Optional[float] = None) -> None:
+        state = DONE if todo.done else OPEN
+        self.conn.execute(
+            "INSERT OR REPLACE INTO items (uid, id, text, priority, state, rev, modified, seq) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (uid, todo.id, todo.text, todo.priority, state, state + 1,
+             time.time() if modified is None else modified,
+             self._next_seq()),
+        )
+
+    def _advance(self, where: str, params: tuple, state: int) -> None:
+        """把符合条件的任务推进到 state，版本号加一；删除时释放本地 ID"""
+        rows = self.conn.execute(f"SELECT uid FROM items WHERE {where}", params).fetchall()
+        now = time.time()
+        for (uid,) in rows:
+            self.conn.execute(
+                "UPDATE items SET state = ?, rev = rev + 1, modified = ?, seq = ?"
+                + (", id = NULL" if state == DELETED else "")
+                + " WHERE uid = ?",
+                (state, now, self._next_seq(), uid),
+            )
+
+    def _content_uid(self, todo: TodoItem) -> str:
+        """由 (ID, 文本, 优先级) 计算 uid；已被占用（如 ID 被复用）时改用随机 uid"""
+        digest = hashlib.sha1(f"{todo.id}\0{todo.text}\0{todo.priority}".encode("utf-8"))
+        uid = digest.hexdigest()[:32]
+        taken = self.conn.execute("SELECT 1 FROM items WHERE uid = ?", (uid,)).fetchone()
+        return uuid.uuid4().hex if taken else uid
+
+    def _set_stamp(self, stamp) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('stamp', ?)", (json.dumps(stamp),)
+        )
+
+
+def sync(local: "TodoManager", remote: "TodoManager") -> SyncStats:
+    """在两个数据文件之间交换上次同步以来的修改
+
+    同步期间持有双方的文件锁（按路径排序获取，避免反向同步时死锁）。
+
+    Args:
+        local: 本地的任务管理器
+        remote: 对端的任务管理器
+
+    Returns:
+        同步统计信息
+
+    Raises:
+        ValueError: 双方是同一个数据文件时
+    """
+    start = time.perf_counter()
+    if local.filepath.resolve() == remote.filepath.resolve():
+        raise ValueError("不能与自身同步")
+    sides = [local, remote]
+    with ExitStack() as stack:
+        for manager in sorted(sides, key=lambda m: str(m.filepath.resolve())):
+            # 与 TodoManager 的写入相同：先持有组提交的互斥锁，再持有文件锁
+            stack.enter_context(manager._guard())
+            stack.enter_context(manager._store.lock())
+        untracked = [str(m.filepath) for m in sides if not m._sync_state().exists()]
+        states = [_prepare(manager) for manager in sides]
+        replicas = [state.replica for state in states]
+        outgoing = [
+            states[0].changes(states[0].sent(replicas[1])),
+            states[1].changes(states[1].sent(replicas[0])),
+        ]
+        uids = list(dict.fromkeys(c.uid for changes in outgoing for c in changes))
+        current = [state.lookup(uids) for state in states]
+
+        applied = []
+        for side, (manager, state) in enumerate(zip(sides, states)):
+            other = current[1 - side]
+            winners = []
+            for uid in uids:
+                mine = current[side].get(uid, (None, None))
+                theirs = other.get(uid)
+                if theirs is not None and (mine[0] is None or theirs[0].key > mine[0].key):
+                    winners.append((theirs[0], *mine))
+            _apply(manager, state, winners)
+            applied.append(len(winners))
+
+        for side, state in enumerate(states):
+            state.mark_synced(replicas[1 - side])
+    return SyncStats(
+        sent=applied[1], received=applied[0],
+        exchanged=len(outgoing[0]) + len(outgoing[1]),
+        elapsed=time.perf_counter() - start,
+        untracked=untracked,
+    )
+
+
+def track(manager: "TodoManager") -> None:
+    """为数据文件建立同步状态，此后的删除都留下墓碑
+
+    Args:
+        manager: 数据文件的任务管理器
+    """
+    with manager._guard(), manager._store.lock():
+        _prepare(manager)
+
+
+def _prepare(manager: "TodoManager") -> SyncState:
+    """取得最新的同步状态：第一次同步时建立，数据文件被其他程序改写过时对比全部任务"""
+    state = manager._sync_state()
+    manager._refresh()
+    if not state.is_fresh(manager._stamp):
+        state.reconcile(manager.iter_todos(), manager._stamp)
+    return state
+
+
+def _apply(
+    manager: "TodoManager",
+    state: SyncState,
+    winners: List[Tuple[Change, Optional[Change], Optional[int]]],
+) -> None:
+    """把对端胜出的任务状态写入本地数据文件与同步状态
+
+    Args:
+        winners: (对端的状态, 本地的状态, 本地 ID) 列表；本地没有该任务时
+            后两项为 None，本地已删除时本地 ID 为 None
+    """
+    if not winners:
+        return
+    adopted: List[Tuple[Change, Optional[int]]] = []
+    added: List[Tuple[Change, TodoItem]] = []
+    with manager.batch():
+        for theirs, mine, todo_id in winners:
+            if mine is None:
+                if theirs.state == DELETED:
+                    adopted.append((theirs, None))
+                else:
+                    added.append((theirs, manager.add(theirs.text, priority=theirs.priority)))
+                continue
+            if theirs.state == DELETED and todo_id is not None:
+                manager.delete(todo_id)
+            elif theirs.state == DONE and mine.state == OPEN:
+                manager.mark_done(todo_id)
+            adopted.append((theirs, None if theirs.state == DELETED else todo_id))
+    # 新增的任务提交后才能在按需查询的后端中找到，完成状态单独提交
+    done = [todo.id for change, todo in added if change.state == DONE]
+    if done:
+        manager.mark_done_many(done)
+    manager.flush()
+    adopted.extend((change, todo.id) for change, todo in added)
+    state.adopt(adopted, manager._stamp)
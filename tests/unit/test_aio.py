@@ -0,0 +1,164 @@
+"""单元测试：asyncio 接口
+
+测试 AsyncTodoManager 的协程接口、写入合并与 flush/close
+"""
+
+import asyncio
+import pytest
+from unittest.mock import patch
+from todo.aio import AsyncTodoManager
+from todo.manager import TodoManager
+from todo.storage import JsonStore
+
+
+def run(coro):
+    """在新的事件循环中运行协程"""
+    return asyncio.run(coro)
+
+
+class TestAsyncTodoManager:
+    """测试协程接口"""
+
+    def test_add_list_and_persist(self, tmp_path):
+        """测试：修改在 close 后写入文件"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+
+        async def scenario():
+            async with AsyncTodoManager(path) as todos:
+                first = await todos.add("任务 A", priority="high")
+                await todos.add("任务 B")
+                await todos.mark_done(first.id)
+                return await todos.list(sort="p")
+
+        # Act
+        listed = run(scenario())
+
+        # Assert
+        assert [(t.text, t.done) for t in listed] == [("任务 A", True), ("任务 B", False)]
+        reloaded = TodoManager(filepath=path)
+        assert [(t.text, t.done) for t in reloaded.todos] == [("任务 A", True), ("任务 B", False)]
+
+    def test_mutations_within_window_written_once(self, tmp_path):
+        """测试：延迟窗口内的多次修改只写入一次"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+
+        async def scenario():
+            async with AsyncTodoManager(path, flush_delay=10) as todos:
+                await asyncio.gather(*(todos.add(f"任务 {i}") for i in range(20)))
+                await todos.delete(3)
+                await todos.clear()
+
+        # Act
+        with patch.object(JsonStore, "commit", autospec=True, side_effect=JsonStore.commit) as commit:
+            run(scenario())
+
+        # Assert
+        assert commit.call_count == 1
+        assert len(TodoManager(filepath=path).todos) == 19
+
+    def test_flush_writes_before_delay(self, tmp_path):
+        """测试：await flush() 后其他读者立即可见"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+
+        async def scenario():
+            async with AsyncTodoManager(path, flush_delay=10) as todos:
+                await todos.add("任务")
+                before = len(TodoManager(filepath=path).todos)
+                await todos.flush()
+                after = len(TodoManager(filepath=path).todos)
+                return before, after
+
+        # Act & Assert
+        assert run(scenario()) == (0, 1)
+
+    def test_delayed_flush_runs_automatically(self, tmp_path):
+        """测试：不调用 flush 时，延迟到期后自动写入"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+
+        async def scenario():
+            todos = AsyncTodoManager(path, flush_delay=0.01)
+            await todos.add("任务")
+            await asyncio.sleep(0.2)
+            written = len(TodoManager(filepath=path).todos)
+            await todos.close()
+            return written
+
+        # Act & Assert
+        assert run(scenario()) == 1
+
+    def test_failed_flush_keeps_changes(self, tmp_path):
+        """测试：写入失败时 flush 抛出异常，修改保留，下次 flush 时写入"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+
+        async def scenario():
+            async with AsyncTodoManager(path, flush_delay=10) as todos:
+                await todos.add("任务 A")
+                await todos.add("任务 B")
+                with patch.object(JsonStore, "commit", side_effect=OSError("磁盘已满")):
+                    with pytest.raises(OSError):
+                        await todos.flush()
+                await todos.flush()
+                return [t.text for t in TodoManager(filepath=path).todos]
+
+        # Act & Assert
+        assert run(scenario()) == ["任务 A", "任务 B"]
+
+    def test_failed_delayed_flush_keeps_changes(self, tmp_path):
+        """测试：延迟写入失败时修改保留，异常在下次 flush 时抛出，之后重试写入"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+
+        async def scenario():
+            todos = AsyncTodoManager(path, flush_delay=0.01)
+            with patch.object(JsonStore, "commit", side_effect=OSError("磁盘已满")):
+                await todos.add("任务")
+                await asyncio.sleep(0.2)
+            with pytest.raises(OSError):
+                await todos.flush()
+            await todos.close()
+
+        # Act
+        run(scenario())
+
+        # Assert
+        assert [t.text for t in TodoManager(filepath=path).todos] == ["任务"]
+
+    def test_lazy_store_sees_pending_changes(self, tmp_path):
+        """测试：SQLite 存储在写入前也能读取和修改刚添加的任务"""
+        # Arrange
+        path = str(tmp_path / "todo.db")
+
+        async def scenario():
+            async with AsyncTodoManager(path, flush_delay=10) as todos:
+                todo = await todos.add("任务")
+                await todos.mark_done(todo.id)
+                return await todos.count(status="done")
+
+        # Act & Assert
+        assert run(scenario()) == 1
+        assert TodoManager(filepath=path).get(1).done is True
+
+    def test_missing_task_raises(self, tmp_path):
+        """测试：任务不存在时抛出 ValueError"""
+        async def scenario():
+            async with AsyncTodoManager(str(tmp_path / "todo.json")) as todos:
+                await todos.mark_done(99)
+
+        with pytest.raises(ValueError, match="任务不存在"):
+            run(scenario())
+
+    def test_closed_manager_raises(self, tmp_path):
+        """测试：关闭后再操作抛出 ValueError，重复关闭无效果"""
+        async def scenario():
+            todos = AsyncTodoManager(str(tmp_path / "todo.json"))
+            await todos.close()
+            await todos.close()
+            await todos.add("任务")
+
+        with pytest.raises(ValueError, match="已关闭"):
+            run(scenario())
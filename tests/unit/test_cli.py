@@ -3,10 +3,15 @@
 测试命令行参数解析和输出
 """
 
+import os
+import subprocess
+import sys
 import pytest
 from unittest.mock import patch, MagicMock
 from io import StringIO
 from todo.cli import main
+from todo.manager import TodoManager
+from todo.models import TodoItem
 
 
 class TestCLIAddCommand:
@@ -115,6 +120,147 @@ class TestCLIListCommand:
         assert "暂无任务" in output or "empty" in output.lower()
 
 
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "list", "-s", "p", "--head", "3"])
+    def test_list_head_uses_limit(self, mock_manager_class):
+        """测试：list --head N 应只取前 N 个"""
+        # Arrange
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_manager.list.return_value = []
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO):
+            main()
+
+        # Assert
+        mock_manager.list.assert_called_once_with(
+            sort="p", limit=3, offset=0, status=None, priorities=None
+        )
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "list", "--limit", "10", "--offset", "20"])
+    def test_list_limit_and_offset(self, mock_manager_class):
+        """测试：list --limit/--offset 应传给 manager.list()"""
+        # Arrange
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_manager.list.return_value = []
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO):
+            main()
+
+        # Assert
+        mock_manager.list.assert_called_once_with(
+            sort="i", limit=10, offset=20, status=None, priorities=None
+        )
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "list", "--status", "open", "--priority", "high,medium"])
+    def test_list_filters(self, mock_manager_class):
+        """测试：list --status/--priority 应传给 manager.list()"""
+        # Arrange
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_manager.list.return_value = []
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO):
+            main()
+
+        # Assert
+        mock_manager.list.assert_called_once_with(
+            sort="i", limit=None, offset=0, status="open", priorities=["high", "medium"]
+        )
+
+    @patch("sys.argv", ["todo.py", "list", "--priority", "urgent"])
+    def test_list_invalid_priority_exits(self):
+        """测试：无效的优先级应报错退出"""
+        with patch("sys.stderr", new_callable=StringIO):
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+        assert exc_info.value.code == 2
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "count", "--status", "done"])
+    def test_count_prints_number(self, mock_manager_class):
+        """测试：count 只输出任务数"""
+        # Arrange
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_manager.count.return_value = 7
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            main()
+
+        # Assert
+        mock_manager.count.assert_called_once_with(status="done", priorities=None)
+        assert mock_stdout.getvalue() == "7\n"
+
+    def test_list_piped_to_closed_reader_exits_quietly(self, tmp_path):
+        """测试：下游提前关闭管道时不输出异常堆栈"""
+        # Arrange
+        (tmp_path / ".jd").mkdir()
+        manager = TodoManager(filepath=str(tmp_path / ".jd" / "todo.json"))
+        manager.add_many([f"任务 {i}" for i in range(20000)])
+        env = dict(os.environ, HOME=str(tmp_path))
+
+        # Act
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "todo.cli", "list"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env,
+        )
+        first_line = proc.stdout.readline()
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode("utf-8")
+        proc.wait()
+
+        # Assert
+        assert "任务 0" in first_line.decode("utf-8")
+        assert "Traceback" not in stderr
+
+
+class TestCLISearchCommand:
+    """测试 search 命令"""
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "search", "学习", "python", "-n", "5"])
+    def test_search_joins_terms(self, mock_manager_class):
+        """测试：多个查询词合并后传给 manager.search()"""
+        # Arrange
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_manager.search.return_value = [MagicMock(
+            id=1, done=False, priority_emoji="🟡", text="学习 Python"
+        )]
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            main()
+
+        # Assert
+        mock_manager.search.assert_called_once_with("学习 python", limit=5)
+        assert "[1]" in mock_stdout.getvalue()
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "search", "不存在"])
+    def test_search_without_matches(self, mock_manager_class):
+        """测试：没有匹配时给出提示"""
+        # Arrange
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_manager.search.return_value = []
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            main()
+
+        # Assert
+        assert "没有匹配的任务" in mock_stdout.getvalue()
+
+
 class TestCLIDoneCommand:
     """测试 done 命令"""
 
@@ -147,6 +293,86 @@ class TestCLIDoneCommand:
                 main()
 
 
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "done", "1", "3", "5-7"])
+    def test_done_multiple_ids_and_range(self, mock_manager_class):
+        """测试：done 支持多个 ID 和范围，批量调用 manager.mark_done_many()"""
+        # Arrange
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_manager.mark_done_many.return_value = []
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO):
+            main()
+
+        # Assert
+        mock_manager.mark_done_many.assert_called_once_with([1, 3, 5, 6, 7], missing_ok=True)
+        mock_manager.mark_done.assert_not_called()
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "done", "-"])
+    def test_done_reads_ids_from_stdin(self, mock_manager_class):
+        """测试：done - 应从标准输入读取 ID"""
+        # Arrange
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_manager.mark_done_many.return_value = []
+
+        # Act
+        with patch("sys.stdin", StringIO("2\n4 8-9\n")):
+            with patch("sys.stdout", new_callable=StringIO):
+                main()
+
+        # Assert
+        mock_manager.mark_done_many.assert_called_once_with([2, 4, 8, 9], missing_ok=True)
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "done", "9-3"])
+    def test_done_with_reversed_range_shows_error(self, mock_manager_class):
+        """测试：起点大于终点的范围应报错（argparse 处理）"""
+        with pytest.raises(SystemExit):
+            with patch("sys.stderr", new_callable=StringIO):
+                main()
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "done", "4-9000000"])
+    def test_done_with_huge_range_rejected(self, mock_manager_class):
+        """测试：过大的 ID 范围在展开前报错"""
+        # Act
+        with pytest.raises(SystemExit) as exc_info:
+            with patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+                main()
+
+        # Assert
+        assert exc_info.value.code == 2
+        assert "ID 范围过大: 4-9000000" in mock_stderr.getvalue()
+        mock_manager_class.return_value.mark_done_many.assert_not_called()
+
+    def test_done_range_skips_missing_ids(self, tmp_path, monkeypatch):
+        """测试：范围中有不存在的任务时其余照常标记，报告跳过的 ID 并返回 1"""
+        # Arrange
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.delenv("JD_SOCKET", raising=False)
+        from todo.manager import TodoManager
+        manager = TodoManager()
+        manager.add_many(["任务 1", "任务 2", "任务 3"])
+        manager.delete(2)
+
+        # Act
+        with patch("sys.argv", ["todo.py", "done", "1-4"]):
+            with pytest.raises(SystemExit) as exc_info:
+                with patch("sys.stdout", new_callable=StringIO) as mock_stdout, \
+                        patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+                    main()
+
+        # Assert
+        assert exc_info.value.code == 1
+        assert "✓ 已将 2 个任务标记为完成" in mock_stdout.getvalue()
+        assert "错误: 任务不存在: ID 2, 4" in mock_stderr.getvalue()
+        assert [(t.id, t.done) for t in TodoManager().todos] == [(1, True), (3, True)]
+
+
 class TestCLIDeleteCommand:
     """测试 delete 命令"""
 
@@ -182,6 +408,23 @@ class TestCLIDeleteCommand:
                 assert "错误" in output
 
 
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "delete", "4-6"])
+    def test_delete_range_calls_delete_many(self, mock_manager_class):
+        """测试：delete 范围应调用 manager.delete_many()"""
+        # Arrange
+        mock_manager = MagicMock()
+        mock_manager_class.return_value = mock_manager
+        mock_manager.delete_many.return_value = []
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO):
+            main()
+
+        # Assert
+        mock_manager.delete_many.assert_called_once_with([4, 5, 6], missing_ok=True)
+
+
 class TestCLIClearCommand:
     """测试 clear 命令"""
 
@@ -211,3 +454,412 @@ class TestCLIInvalidCommand:
         with pytest.raises(SystemExit):
             with patch("sys.stdout", new_callable=StringIO):
                 main()
+
+
+class TestCLIProfile:
+    """测试 --profile 性能剖析"""
+
+    @pytest.fixture(autouse=True)
+    def home(self, tmp_path, monkeypatch):
+        """数据文件放在临时目录，不连接常驻服务"""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.delenv("JD_SOCKET", raising=False)
+        monkeypatch.delenv("JD_PROFILE", raising=False)
+        return tmp_path
+
+    def test_profile_reports_phases(self):
+        """测试：--profile 在标准错误输出各阶段耗时，命令照常执行"""
+        # Arrange
+        with patch("sys.argv", ["todo.py", "--profile", "add", "剖析任务"]):
+            # Act
+            with patch("sys.stdout", new_callable=StringIO) as mock_stdout, \
+                    patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+                main()
+
+        # Assert
+        assert "✓ 已添加任务 [1]" in mock_stdout.getvalue()
+        report = mock_stderr.getvalue()
+        for phase in ("import", "parse", "command", "save", "output", "total"):
+            assert phase in report
+        assert "1 个修改" in report
+
+    def test_profile_after_list_option(self):
+        """测试：--profile 位于 -L NAME 之后时不会吞掉子命令"""
+        # Arrange
+        with patch("sys.argv", ["todo.py", "-L", "ops", "--profile", "list"]):
+            # Act
+            with patch("sys.stdout", new_callable=StringIO) as mock_stdout, \
+                    patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+                main()
+
+        # Assert
+        assert "暂无任务" in mock_stdout.getvalue()
+        assert "total" in mock_stderr.getvalue()
+
+    def test_profile_env_dumps_cprofile(self, home, monkeypatch):
+        """测试：JD_PROFILE=FILE 同时保存 cProfile 数据"""
+        # Arrange
+        import pstats
+        dump = home / "jd.prof"
+        monkeypatch.setenv("JD_PROFILE", str(dump))
+
+        # Act
+        with patch("sys.argv", ["todo.py", "list"]):
+            with patch("sys.stdout", new_callable=StringIO), \
+                    patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+                main()
+
+        # Assert
+        assert str(dump) in mock_stderr.getvalue()
+        assert pstats.Stats(str(dump)).total_calls > 0
+
+    @pytest.mark.parametrize("argv, expected", [
+        (["list"], (["list"], None)),
+        (["--profile", "list"], (["list"], "")),
+        (["--profile=out.prof", "add", "x"], (["add", "x"], "out.prof")),
+        (["--profiled", "list"], (["--profiled", "list"], None)),
+        (["-L", "ops", "--profile", "list"], (["-L", "ops", "list"], "")),
+        (["--list=ops", "--profile=a.prof", "list"], (["--list=ops", "list"], "a.prof")),
+        (["-L", "--profile", "list"], (["-L", "--profile", "list"], None)),
+        (["add", "--profile"], (["add", "--profile"], None)),
+    ])
+    def test_pop_profile_option(self, argv, expected):
+        """测试：只取出子命令前的 --profile[=FILE]，不取选项的值与子命令的参数"""
+        from todo.cli import pop_profile_option
+        assert pop_profile_option(argv) == expected
+
+    @pytest.mark.parametrize("value, expected", [
+        ("1", ""), ("true", ""), ("ON", ""),
+        ("", None), ("0", None), ("false", None), ("No", None), ("off", None),
+        ("jd.prof", "jd.prof"),
+    ])
+    def test_profile_env_values(self, monkeypatch, value, expected):
+        """测试：JD_PROFILE 的布尔值表示开关，其他值才作为数据文件路径"""
+        from todo.cli import pop_profile_option
+        monkeypatch.setenv("JD_PROFILE", value)
+        assert pop_profile_option(["list"]) == (["list"], expected)
+
+
+class TestCLINextCommand:
+    """测试 next 命令"""
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "next", "-n", "2"])
+    def test_next_shows_top_tasks(self, mock_manager_class):
+        """测试：显示最重要的 K 个未完成任务"""
+        # Arrange
+        mock_manager = mock_manager_class.return_value
+        mock_manager.peek_next.return_value = [
+            TodoItem(4, "修复线上故障", priority="high"),
+            TodoItem(1, "写周报", priority="medium"),
+        ]
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            main()
+
+        # Assert
+        mock_manager.peek_next.assert_called_once_with(limit=2)
+        output = mock_stdout.getvalue()
+        assert output.index("修复线上故障") < output.index("写周报")
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "next"])
+    def test_next_without_open_tasks(self, mock_manager_class):
+        """测试：没有未完成任务时给出提示，默认只取 1 个"""
+        # Arrange
+        mock_manager = mock_manager_class.return_value
+        mock_manager.peek_next.return_value = []
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            main()
+
+        # Assert
+        mock_manager.peek_next.assert_called_once_with(limit=1)
+        assert mock_stdout.getvalue() == "没有未完成的任务\n"
+
+    @pytest.mark.parametrize("value", ["0", "-1", "x"])
+    @patch("todo.cli.TodoManager")
+    def test_next_rejects_limit_below_one(self, mock_manager_class, value):
+        """测试：-n 必须是正整数，否则由 argparse 报错"""
+        # Act
+        with patch("sys.argv", ["todo.py", "next", "-n", value]):
+            with pytest.raises(SystemExit) as exc_info:
+                with patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+                    main()
+
+        # Assert
+        assert exc_info.value.code == 2
+        assert "必须是正整数" in mock_stderr.getvalue()
+        mock_manager_class.return_value.peek_next.assert_not_called()
+
+
+class TestCLICheckCommand:
+    """测试 check 命令"""
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "check"])
+    def test_check_ok(self, mock_manager_class):
+        """测试：数据文件完好时输出任务数"""
+        # Arrange
+        from todo.manager import CheckReport
+        mock_manager_class.return_value.check.return_value = CheckReport(items=5, checksum=True)
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            main()
+
+        # Assert
+        assert mock_stdout.getvalue() == "✓ 数据文件完好：5 个任务\n"
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "check"])
+    def test_check_problems_exit_nonzero(self, mock_manager_class):
+        """测试：发现问题时逐条输出错误并以 1 退出"""
+        # Arrange
+        from todo.manager import CheckReport
+        report = CheckReport(items=2, problems=["任务 ID 3 重复"])
+        mock_manager_class.return_value.check.return_value = report
+
+        # Act
+        with patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+            with pytest.raises(SystemExit) as exc_info:
+                main()
+
+        # Assert
+        assert exc_info.value.code == 1
+        assert "错误: 任务 ID 3 重复" in mock_stderr.getvalue()
+
+
+class TestCLIDataFile:
+    """测试 --file / JD_FILE 选择数据文件与存储后端"""
+
+    @pytest.fixture(autouse=True)
+    def home(self, tmp_path, monkeypatch):
+        """数据文件放在临时目录，不连接常驻服务"""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.delenv("JD_SOCKET", raising=False)
+        monkeypatch.delenv("JD_FILE", raising=False)
+        monkeypatch.delenv("JD_PROFILE", raising=False)
+        return tmp_path
+
+    def _run(self, *argv):
+        """执行一条 jd 命令，返回 (退出码, 标准输出)"""
+        with patch("sys.argv", ["todo.py", *argv]):
+            with patch("sys.stdout", new_callable=StringIO) as mock_stdout, \
+                    patch("sys.stderr", new_callable=StringIO):
+                try:
+                    main()
+                    code = 0
+                except SystemExit as e:
+                    code = e.code
+        return code, mock_stdout.getvalue()
+
+    @pytest.mark.parametrize("suffix, store_class", [
+        (".json", "JsonStore"),
+        (".jsonl", "RecordStore"),
+        (".jdlog", "JournalStore"),
+        (".jdb", "SnapshotStore"),
+        (".db", "SqliteStore"),
+    ])
+    def test_file_option_selects_backend(self, home, suffix, store_class):
+        """测试：--file 按扩展名选择存储后端，add/done/list/compact 作用于该文件"""
+        # Arrange
+        path = str(home / f"work{suffix}")
+
+        # Act
+        self._run("--file", path, "add", "任务 A")
+        self._run("--file", path, "add", "任务 B")
+        self._run("--file", path, "done", "1")
+        compact_code, _ = self._run("--file", path, "compact")
+        code, listed = self._run("--file", path, "list", "--head", "5")
+
+        # Assert
+        assert (compact_code, code) == (0, 0)
+        manager = TodoManager(filepath=path)
+        assert type(manager._store).__name__ == store_class
+        assert [(t.text, t.done) for t in manager.todos] == [("任务 A", True), ("任务 B", False)]
+        assert "任务 A" in listed and "任务 B" in listed
+        assert not (home / ".jd" / "todo.json").exists()
+
+    def test_env_selects_file(self, home, monkeypatch):
+        """测试：环境变量 JD_FILE 与 --file 相同；-L 指定列表时不使用 JD_FILE"""
+        # Arrange
+        path = home / "env.jdlog"
+        monkeypatch.setenv("JD_FILE", str(path))
+
+        # Act
+        self._run("add", "环境变量任务")
+        self._run("-L", "ops", "add", "运维任务")
+
+        # Assert
+        assert [t.text for t in TodoManager(filepath=str(path)).todos] == ["环境变量任务"]
+        ops = TodoManager(filepath=str(home / ".jd" / "lists" / "ops.json"))
+        assert [t.text for t in ops.todos] == ["运维任务"]
+
+    def test_file_and_list_conflict(self, home):
+        """测试：同时指定 --file 与 -L 时报错"""
+        code, _ = self._run("--file", str(home / "a.json"), "-L", "ops", "list")
+        assert code == 2
+
+
+class TestCLIExportCommand:
+    """测试 export 命令"""
+
+    @pytest.mark.parametrize("argv, sync", [
+        (["export", "backup.json"], False),
+        (["export", "copy.json", "--sync"], True),
+    ])
+    @patch("todo.cli.TodoManager")
+    def test_export_tracks_only_with_sync_flag(self, mock_manager_class, argv, sync):
+        """测试：只有 --sync 时导出才建立同步状态"""
+        # Act
+        with patch("sys.argv", ["todo.py", *argv]):
+            with patch("sys.stdout", new_callable=StringIO):
+                main()
+
+        # Assert
+        mock_manager_class.return_value.export_to.assert_called_once_with(argv[1], sync=sync)
+
+
+class TestCLISyncCommand:
+    """测试 sync 命令"""
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "sync", "/mnt/share/todo.json"])
+    def test_sync_prints_stats(self, mock_manager_class):
+        """测试：同步后输出收发的修改数"""
+        # Arrange
+        from todo.sync import SyncStats
+        mock_manager = mock_manager_class.return_value
+        mock_manager.sync_with.return_value = SyncStats(
+            sent=2, received=3, exchanged=5, elapsed=0.0123
+        )
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            main()
+
+        # Assert
+        mock_manager.sync_with.assert_called_once_with("/mnt/share/todo.json")
+        assert mock_stdout.getvalue() == (
+            "✓ 已与 /mnt/share/todo.json 同步：收到 3 个修改，发出 2 个修改，耗时 12.3 ms\n"
+        )
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "sync", "/mnt/share/todo.json"])
+    def test_sync_warns_about_untracked_side(self, mock_manager_class):
+        """测试：一方此前没有同步状态时输出警告"""
+        # Arrange
+        from todo.sync import SyncStats
+        mock_manager_class.return_value.sync_with.return_value = SyncStats(
+            sent=0, received=1, exchanged=1, elapsed=0.001,
+            untracked=["/mnt/share/todo.json"],
+        )
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO), \
+                patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+            main()
+
+        # Assert
+        assert "警告: /mnt/share/todo.json 此前没有同步状态" in mock_stderr.getvalue()
+
+
+class TestCLIServeCommand:
+    """测试 serve 命令"""
+
+    @patch("todo.server.serve")
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "serve"])
+    def test_serve_keeps_tasks_in_memory(self, mock_manager_class, mock_serve):
+        """测试：常驻服务的管理器预先加载任务（不是按需模式）"""
+        # Act
+        main()
+
+        # Assert
+        mock_manager_class.assert_called_once_with(lazy=False)
+        mock_serve.assert_called_once_with(mock_manager_class.return_value, list_name=None, filepath=None)
+
+    @patch("todo.cli.TodoManager")
+    @patch("sys.argv", ["todo.py", "list"])
+    def test_single_command_is_lazy(self, mock_manager_class):
+        """测试：单次命令按需加载"""
+        mock_manager_class.return_value.list.return_value = []
+
+        with patch("sys.stdout", new_callable=StringIO):
+            main()
+
+        mock_manager_class.assert_called_once_with(lazy=True)
+
+
+class TestCLINamedLists:
+    """测试 -L 命名列表与 --all"""
+
+    @pytest.fixture(autouse=True)
+    def home(self, tmp_path, monkeypatch):
+        """数据文件放在临时目录，不连接常驻服务"""
+        monkeypatch.setenv("HOME", str(tmp_path))
+        monkeypatch.delenv("JD_SOCKET", raising=False)
+        monkeypatch.delenv("JD_PROFILE", raising=False)
+        return tmp_path
+
+    def _run(self, *argv):
+        with patch("sys.argv", ["todo.py", *argv]):
+            with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+                main()
+        return mock_stdout.getvalue()
+
+    def test_list_option_writes_own_shard(self, home):
+        """测试：-L NAME 只读写该列表的数据文件，ID 从 1 开始"""
+        # Arrange
+        self._run("add", "默认任务")
+
+        # Act
+        output = self._run("-L", "ops", "add", "重启服务")
+
+        # Assert
+        assert "[1]" in output
+        assert (home / ".jd" / "lists" / "ops.json").exists()
+        assert "重启服务" not in self._run("list")
+        assert "重启服务" in self._run("-L", "ops", "list")
+
+    def test_list_all_labels_tasks_with_list_name(self):
+        """测试：list --all 合并所有列表，每行带列表名"""
+        # Arrange
+        self._run("add", "默认任务")
+        self._run("--list", "ops", "add", "重启服务", "-l", "1")
+
+        # Act
+        output = self._run("list", "--all", "-s", "p")
+
+        # Assert
+        assert output.splitlines() == [
+            "ops:[1] [ ] 🔴 重启服务",
+            "default:[1] [ ] 🟡 默认任务",
+        ]
+        assert self._run("count", "-a") == "2\n"
+
+    def test_invalid_list_name_is_usage_error(self):
+        """测试：无效的列表名是参数错误"""
+        with patch("sys.argv", ["todo.py", "-L", "../x", "list"]):
+            with patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+                with pytest.raises(SystemExit) as exc_info:
+                    main()
+
+        assert exc_info.value.code == 2
+        assert "无效的列表名" in mock_stderr.getvalue()
+
+    @pytest.mark.parametrize("argv, expected", [
+        (["add", "x"], "add"),
+        (["-L", "ops", "add", "x"], "add"),
+        (["--list", "ops", "list"], "list"),
+        (["--list=ops", "list"], "list"),
+        (["--version"], None),
+    ])
+    def test_command_name_skips_options(self, argv, expected):
+        """测试：查找子命令名时跳过命令前的选项"""
+        from todo.cli import command_name
+
+        assert command_name(argv) == expected
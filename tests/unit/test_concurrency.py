@@ -0,0 +1,173 @@
+"""单元测试：多进程、多线程并发写入
+
+测试文件锁与过期检测：多个进程同时写同一数据文件时不丢失修改；
+组提交的后台写入线程与修改互斥
+"""
+
+import multiprocessing
+import threading
+import time
+import pytest
+from todo.manager import TodoManager
+from todo import storage
+
+PROCESSES = 4
+ADDS_PER_PROCESS = 25
+
+pytestmark = pytest.mark.skipif(storage.fcntl is None, reason="平台不支持 fcntl 文件锁")
+
+
+def _add_worker(filepath: str, worker: int) -> None:
+    """在独立进程中反复添加任务"""
+    manager = TodoManager(filepath=filepath)
+    for i in range(ADDS_PER_PROCESS):
+        manager.add(f"进程 {worker} 任务 {i}")
+
+
+def _run_workers(filepath: str) -> None:
+    """启动多个进程并等待全部结束"""
+    ctx = multiprocessing.get_context("fork")
+    workers = [
+        ctx.Process(target=_add_worker, args=(filepath, n)) for n in range(PROCESSES)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+
+class TestConcurrentWriters:
+    """测试并发写入"""
+
+    @pytest.mark.parametrize("filename", ["todo.json", "todo.jdlog", "todo.jsonl", "todo.jdb", "todo.db", "todo.marshal"])
+    def test_concurrent_adds_lose_nothing(self, tmp_path, filename):
+        """测试：多进程并发 add 后任务不丢失、ID 不重复"""
+        # Arrange
+        filepath = str(tmp_path / filename)
+
+        # Act
+        _run_workers(filepath)
+
+        # Assert
+        todos = TodoManager(filepath=filepath).todos
+        ids = [t.id for t in todos]
+        assert len(todos) == PROCESSES * ADDS_PER_PROCESS
+        assert len(set(ids)) == len(ids)
+        assert sorted(ids) == list(range(1, len(ids) + 1))
+
+    def test_stale_manager_merges_instead_of_overwriting(self, tmp_path):
+        """测试：内存数据过期的 manager 写入时合并其他进程的修改"""
+        # Arrange
+        filepath = str(tmp_path / "todo.json")
+        first = TodoManager(filepath=filepath)
+        second = TodoManager(filepath=filepath)
+        first.add("任务 A")
+
+        # Act - second 加载时文件为空，分配的 ID 与 A 冲突
+        todo = second.add("任务 B")
+
+        # Assert
+        assert todo.id == 2
+        reloaded = TodoManager(filepath=filepath)
+        assert [(t.id, t.text) for t in reloaded.todos] == [(1, "任务 A"), (2, "任务 B")]
+
+    def test_stale_manager_sees_new_tasks(self, tmp_path):
+        """测试：其他进程新增的任务可以直接标记完成"""
+        # Arrange
+        filepath = str(tmp_path / "todo.json")
+        first = TodoManager(filepath=filepath)
+        second = TodoManager(filepath=filepath)
+        first.add("任务 A")
+
+        # Act
+        second.mark_done(1)
+
+        # Assert
+        assert TodoManager(filepath=filepath).get(1).done is True
+
+    def test_save_leaves_no_temp_files(self, tmp_path):
+        """测试：原子写入后不残留临时文件"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+
+        # Act
+        manager.add("任务")
+
+        # Assert
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["todo.json", "todo.json.lock"]
+
+
+class TestThreads:
+    """测试线程之间的互斥"""
+
+    def test_background_flush_during_adds(self, tmp_path, monkeypatch):
+        """测试：后台线程频繁写入时持续添加任务，写入线程不出错、不丢失修改"""
+        # Arrange
+        errors = []
+        monkeypatch.setattr(threading, "excepthook", lambda args: errors.append(args.exc_value))
+        # JSON 存储写入时遍历全部任务
+        path = str(tmp_path / "todo.json")
+        manager = TodoManager(filepath=path, flush_interval=0.001, durable=False)
+
+        # Act
+        for i in range(30000):
+            manager.add(f"任务 {i}")
+        manager.flush()
+
+        # Assert
+        assert errors == []
+        assert len(TodoManager(filepath=path).todos) == 30000
+
+    def test_store_lock_excludes_other_threads(self, tmp_path):
+        """测试：存储锁在同一线程内可重入，其他线程需等待"""
+        # Arrange
+        store = storage.open_store(tmp_path / "todo.json")
+        entered = threading.Event()
+        order = []
+
+        def other():
+            entered.wait()
+            with store.lock():
+                order.append("other")
+
+        thread = threading.Thread(target=other)
+        thread.start()
+
+        # Act
+        with store.lock():
+            with store.lock():
+                entered.set()
+                time.sleep(0.05)
+                order.append("owner")
+        thread.join()
+
+        # Assert
+        assert order == ["owner", "other"]
+
+    def test_failed_background_flush_is_rescheduled(self, tmp_path, monkeypatch):
+        """测试：后台写入失败后重新安排，不必等到下一次修改"""
+        # Arrange
+        monkeypatch.setattr(threading, "excepthook", lambda args: None)
+        path = tmp_path / "todo.json"
+        manager = TodoManager(filepath=str(path), flush_interval=0.01)
+        commit = manager._store.commit
+        failures = []
+
+        def flaky_commit(ops, todos):
+            if not failures:
+                failures.append(ops)
+                raise OSError("磁盘暂时不可用")
+            commit(ops, todos)
+
+        monkeypatch.setattr(manager._store, "commit", flaky_commit)
+
+        # Act
+        manager.add("任务")
+        deadline = time.monotonic() + 5
+        while not path.exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Assert
+        assert failures
+        assert [t.text for t in TodoManager(filepath=str(path)).todos] == ["任务"]
@@ -0,0 +1,112 @@
+"""单元测试：命名列表（分片）
+
+测试列表的数据文件、清单登记与跨列表查询
+"""
+
+import json
+import pytest
+from todo.lists import DEFAULT_LIST, TodoLists, check_list_name
+
+
+@pytest.fixture
+def lists(tmp_path):
+    return TodoLists(tmp_path)
+
+
+class TestListPaths:
+    """测试列表名与数据文件"""
+
+    def test_default_list_uses_todo_json(self, lists, tmp_path):
+        """测试：默认列表仍是 todo.json"""
+        assert lists.path(DEFAULT_LIST) == tmp_path / "todo.json"
+
+    def test_named_list_gets_own_shard(self, lists, tmp_path):
+        """测试：命名列表保存在 lists/<名称>.json"""
+        assert lists.path("ops") == tmp_path / "lists" / "ops.json"
+
+    @pytest.mark.parametrize("name", ["", "../x", "a/b", ".hidden", "a b", "ops\n"])
+    def test_invalid_names_rejected(self, name):
+        """测试：列表名只能包含字母、数字、下划线和连字符"""
+        with pytest.raises(ValueError, match="无效的列表名"):
+            check_list_name(name)
+
+    def test_unicode_name_allowed(self):
+        """测试：列表名可以是中文"""
+        assert check_list_name("工作-2") == "工作-2"
+
+
+class TestListManifest:
+    """测试清单登记"""
+
+    def test_list_registered_on_first_write(self, lists, tmp_path):
+        """测试：新列表在第一次写入后登记到清单"""
+        # Arrange
+        manager = lists.manager("ops", lazy=True)
+        assert lists.names() == [DEFAULT_LIST]
+
+        # Act
+        manager.add("重启服务")
+
+        # Assert
+        assert lists.names() == [DEFAULT_LIST, "ops"]
+        manifest = json.loads((tmp_path / "lists.json").read_text(encoding="utf-8"))
+        assert manifest == {"lists": {"ops": "lists/ops.json"}}
+
+    def test_reading_does_not_register(self, lists):
+        """测试：只读取不存在的列表不会登记"""
+        lists.manager("typo", lazy=True).list()
+
+        assert lists.names() == [DEFAULT_LIST]
+
+    def test_each_list_has_own_id_space(self, lists):
+        """测试：每个列表有各自的 ID"""
+        # Act
+        first = lists.manager(DEFAULT_LIST).add("默认任务")
+        second = lists.manager("ops").add("运维任务")
+
+        # Assert
+        assert first.id == second.id == 1
+        assert [t.text for t in lists.manager("ops").todos] == ["运维任务"]
+
+
+class TestListAll:
+    """测试跨列表查询"""
+
+    @pytest.fixture
+    def filled(self, lists):
+        lists.manager(DEFAULT_LIST).add_many(["d1", "d2", "d3"], priority="low")
+        ops = lists.manager("ops")
+        ops.add("o1", priority="high")
+        ops.add("o2")
+        ops.mark_done(2)
+        lists.manager("home").add("h1", priority="high")
+        return lists
+
+    def test_merge_by_id(self, filled):
+        """测试：按 ID 归并各列表，ID 相同时按列表顺序"""
+        entries = filled.list_all(sort="i")
+
+        assert [(name, t.text) for name, t in entries] == [
+            ("default", "d1"), ("home", "h1"), ("ops", "o1"),
+            ("default", "d2"), ("ops", "o2"), ("default", "d3"),
+        ]
+
+    def test_merge_by_priority_with_paging(self, filled):
+        """测试：按优先级归并并分页"""
+        entries = filled.list_all(sort="p", offset=1, limit=2)
+
+        assert [t.text for _, t in entries] == ["o1", "o2"]
+
+    def test_default_order_concatenates_lists(self, filled):
+        """测试：不排序时按列表顺序依次列出"""
+        entries = filled.list_all()
+
+        assert [t.text for _, t in entries] == ["d1", "d2", "d3", "h1", "o1", "o2"]
+
+    def test_filters_and_count(self, filled):
+        """测试：筛选条件作用于每个列表，count_all 汇总"""
+        entries = filled.list_all(sort="i", status="open", priorities=["high"])
+
+        assert [t.text for _, t in entries] == ["h1", "o1"]
+        assert filled.count_all() == 6
+        assert filled.count_all(status="done") == 1
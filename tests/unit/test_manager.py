@@ -144,6 +144,22 @@ class TestTodoManagerList:
                 assert result[0].text == "任务 1"
                 assert result[1].text == "任务 2"
 
+    def test_list_sorted_by_priority(self):
+        """测试：list(sort="p") 应按优先级从高到低、同级按 ID 排序"""
+        # Arrange
+        with patch("pathlib.Path.exists", return_value=False):
+            with patch("pathlib.Path.open", mock_open()):
+                manager = TodoManager(filepath="todo.json")
+                manager.add("低", priority="low")
+                manager.add("高", priority="high")
+                manager.add("中")
+
+                # Act
+                result = manager.list(sort="p")
+
+                # Assert
+                assert [t.id for t in result] == [2, 3, 1]
+
     def test_list_empty_manager_returns_empty_list(self):
         """测试：空管理器的 list 应返回空列表"""
         # Arrange
@@ -266,7 +282,570 @@ class TestTodoManagerSave:
                 manager.add("测试任务")
 
         # Act & Assert - 验证 save 能被调用且不抛出异常
-        with patch("builtins.open", mock_open()) as mock_file_obj:
+        # （先写临时文件再原子替换，替换与落盘也一并 mock）
+        with patch("builtins.open", mock_open()) as mock_file_obj, \
+                patch("os.fsync"), patch("os.replace"):
             manager.save()
             # 确保文件被打开用于写入
             mock_file_obj.assert_called_once()
+
+
+class TestTodoManagerIndex:
+    """测试 ID 索引"""
+
+    def test_get_returns_todo_by_id(self, tmp_path):
+        """测试：get 应按 ID 返回任务"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        manager.add("任务 1")
+        todo = manager.add("任务 2")
+
+        # Act & Assert
+        assert manager.get(2) is todo
+
+    def test_get_nonexistent_id_raises_error(self, tmp_path):
+        """测试：get 不存在的 ID 应抛出异常"""
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        with pytest.raises(ValueError, match="任务不存在"):
+            manager.get(1)
+
+    def test_index_consistent_after_delete_and_clear(self, tmp_path):
+        """测试：删除和清空后索引与任务列表一致"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        for i in range(1, 6):
+            manager.add(f"任务 {i}")
+        manager.mark_done(2)
+        manager.mark_done(4)
+        manager.delete(5)
+
+        # Act
+        manager.clear()
+
+        # Assert
+        assert [t.id for t in manager.todos] == [1, 3]
+        assert all(manager.get(t.id) is t for t in manager.todos)
+        for todo_id in (2, 4, 5):
+            with pytest.raises(ValueError, match="任务不存在"):
+                manager.get(todo_id)
+
+    def test_index_consistent_after_reload(self, tmp_path):
+        """测试：重新加载后索引与文件内容一致"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+        manager = TodoManager(filepath=path)
+        for i in range(1, 4):
+            manager.add(f"任务 {i}")
+        manager.delete(2)
+
+        # Act
+        reloaded = TodoManager(filepath=path)
+
+        # Assert
+        assert [t.id for t in reloaded.todos] == [1, 3]
+        assert reloaded.get(3).text == "任务 3"
+        reloaded.mark_done(3)
+        assert reloaded.get(3).done is True
+        assert reloaded.add("任务 4").id == 4
+
+
+class TestTodoManagerBatch:
+    """测试批量修改"""
+
+    def test_batch_commits_once(self, tmp_path):
+        """测试：batch 内的修改只提交一次"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        manager.add("任务 1")
+
+        # Act
+        with patch.object(manager._store, "commit", wraps=manager._store.commit) as commit:
+            with manager.batch():
+                manager.add("任务 2")
+                manager.mark_done(1)
+                with manager.batch():
+                    manager.delete(2)
+
+        # Assert
+        commit.assert_called_once()
+        assert [op[0] for op in commit.call_args[0][0]] == ["add", "done", "delete"]
+        reloaded = TodoManager(filepath=str(tmp_path / "todo.json"))
+        assert [(t.id, t.done) for t in reloaded.todos] == [(1, True)]
+
+    def test_add_many_assigns_sequential_ids(self, tmp_path):
+        """测试：add_many 应分配递增 ID 并持久化"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+
+        # Act
+        todos = manager.add_many(["任务 1", "任务 2", "任务 3"], priority="high")
+
+        # Assert
+        assert [t.id for t in todos] == [1, 2, 3]
+        reloaded = TodoManager(filepath=str(tmp_path / "todo.json"))
+        assert [t.priority for t in reloaded.todos] == ["high"] * 3
+
+    def test_add_many_with_empty_text_adds_nothing(self, tmp_path):
+        """测试：add_many 中有空文本时不添加任何任务"""
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        with pytest.raises(ValueError, match="文本不能为空"):
+            manager.add_many(["任务 1", "  "])
+        assert manager.todos == []
+
+    def test_mark_done_many_and_delete_many(self, tmp_path):
+        """测试：批量标记完成与批量删除"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.jdlog"))
+        manager.add_many([f"任务 {i}" for i in range(1, 7)])
+
+        # Act
+        manager.mark_done_many([1, 2, 2, 3])
+        manager.delete_many([4, 5])
+
+        # Assert
+        reloaded = TodoManager(filepath=str(tmp_path / "todo.jdlog"))
+        assert [(t.id, t.done) for t in reloaded.todos] == [
+            (1, True), (2, True), (3, True), (6, False)
+        ]
+
+    def test_mark_done_many_with_missing_id_changes_nothing(self, tmp_path):
+        """测试：有 ID 不存在时整批都不修改"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        manager.add_many(["任务 1", "任务 2"])
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="任务不存在: ID 9"):
+            manager.mark_done_many([1, 9])
+        assert all(not t.done for t in manager.todos)
+
+    def test_many_with_missing_ok_skips_missing_ids(self, tmp_path):
+        """测试：missing_ok=True 时跳过不存在的任务，返回跳过的 ID"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        manager.add_many(["任务 1", "任务 2", "任务 3"])
+
+        # Act
+        skipped_done = manager.mark_done_many([1, 9, 1], missing_ok=True)
+        skipped_deleted = manager.delete_many([3, 8, 7], missing_ok=True)
+
+        # Assert
+        assert skipped_done == [9]
+        assert skipped_deleted == [8, 7]
+        reloaded = TodoManager(filepath=str(tmp_path / "todo.json"))
+        assert [(t.id, t.done) for t in reloaded.todos] == [(1, True), (2, False)]
+
+    def test_failed_batch_commit_kept_for_retry(self, tmp_path):
+        """测试：batch 退出时提交失败，修改保留在暂存中，flush() 时重试写入"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+        manager = TodoManager(filepath=path)
+        manager.add("任务 1")
+        commit = manager._store.commit
+
+        # Act
+        with patch.object(manager._store, "commit", side_effect=OSError("磁盘已满")):
+            with pytest.raises(OSError):
+                with manager.batch():
+                    manager.add("任务 2")
+                    manager.mark_done(1)
+        unchanged = [(t.id, t.done) for t in TodoManager(filepath=path).todos]
+        with patch.object(manager._store, "commit", wraps=commit):
+            manager.flush()
+
+        # Assert
+        assert unchanged == [(1, False)]
+        reloaded = TodoManager(filepath=path)
+        assert [(t.id, t.done) for t in reloaded.todos] == [(1, True), (2, False)]
+
+    def test_failed_commit_retried_with_next_change(self, tmp_path):
+        """测试：单次修改提交失败后，下一次修改连同它一起写入（操作日志只追加新操作）"""
+        # Arrange
+        path = str(tmp_path / "todo.jdlog")
+        manager = TodoManager(filepath=path)
+        with patch.object(manager._store, "commit", side_effect=OSError("磁盘已满")):
+            with pytest.raises(OSError):
+                manager.add("任务 1")
+
+        # Act
+        manager.add("任务 2")
+
+        # Assert
+        assert [t.text for t in TodoManager(filepath=path).todos] == ["任务 1", "任务 2"]
+
+
+class TestTodoManagerPaging:
+    """测试分页与前 k 个"""
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        priorities = ["low", "high", "medium", "high", "low", "medium"]
+        for i, priority in enumerate(priorities, start=1):
+            manager.add(f"任务 {i}", priority=priority)
+        return manager
+
+    def test_limit_and_offset_by_id(self, manager):
+        """测试：按 ID 分页"""
+        assert [t.id for t in manager.list(sort="i", limit=2, offset=1)] == [2, 3]
+
+    def test_top_k_by_priority(self, manager):
+        """测试：按优先级取前 k 个应与完整排序的前 k 个一致"""
+        full = [t.id for t in manager.list(sort="p")]
+        for offset in range(4):
+            result = manager.list(sort="p", limit=2, offset=offset)
+            assert [t.id for t in result] == full[offset:offset + 2]
+
+    def test_limit_without_sort_keeps_storage_order(self, manager):
+        """测试：不排序时按存储顺序截取"""
+        assert [t.id for t in manager.list(limit=3)] == [1, 2, 3]
+
+    def test_offset_beyond_end_returns_empty(self, manager):
+        """测试：offset 超出范围返回空列表"""
+        assert manager.list(sort="p", limit=5, offset=10) == []
+
+
+class TestTodoManagerFilter:
+    """测试按状态、优先级筛选与计数"""
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        priorities = ["low", "high", "medium", "high", "low", "medium"]
+        for i, priority in enumerate(priorities, start=1):
+            manager.add(f"任务 {i}", priority=priority)
+        manager.mark_done_many([2, 5])
+        return manager
+
+    def test_filter_by_status(self, manager):
+        """测试：按完成状态筛选"""
+        assert [t.id for t in manager.list(status="open")] == [1, 3, 4, 6]
+        assert [t.id for t in manager.list(status="done")] == [2, 5]
+
+    def test_filter_by_priority_sorted(self, manager):
+        """测试：按优先级筛选并按优先级排序"""
+        result = manager.list(sort="p", priorities=["low", "high"])
+        assert [t.id for t in result] == [2, 4, 1, 5]
+
+    def test_filter_with_paging(self, manager):
+        """测试：筛选结果分页"""
+        result = manager.list(sort="i", limit=2, offset=1, status="open")
+        assert [t.id for t in result] == [3, 4]
+
+    def test_invalid_filter_raises_error(self, manager):
+        """测试：无效的状态或优先级应抛出异常"""
+        with pytest.raises(ValueError, match="状态"):
+            manager.list(status="pending")
+        with pytest.raises(ValueError, match="优先级"):
+            manager.count(priorities=["urgent"])
+
+    def test_count(self, manager):
+        """测试：按条件计数"""
+        assert manager.count() == 6
+        assert manager.count(status="open") == 4
+        assert manager.count(status="done", priorities=["low"]) == 1
+
+    def test_index_follows_mutations(self, manager):
+        """测试：修改后二级索引与全部任务一致"""
+        # Act
+        manager.mark_done(3)
+        manager.delete(4)
+        manager.clear()
+        manager.add("任务 7", priority="high")
+
+        # Assert
+        expected = [t.id for t in manager.todos if not t.done and t.priority == "high"]
+        assert [t.id for t in manager.list(status="open", priorities=["high"])] == expected
+        assert manager.count(status="done") == 0
+        assert manager.count() == len(manager.todos)
+
+    @pytest.mark.parametrize("filename", ["todo.json", "todo.jdlog", "todo.jsonl", "todo.jdb", "todo.db", "todo.marshal"])
+    def test_lazy_filter_and_count_match_loaded(self, manager, tmp_path, filename):
+        """测试：未加载时筛选与计数的结果与已加载时一致"""
+        # Arrange
+        path = str(tmp_path / "other" / filename)
+        (tmp_path / "other").mkdir()
+        manager.export_to(path)
+
+        # Act
+        lazy = TodoManager(filepath=path, lazy=True)
+        listed = [t.id for t in lazy.list(sort="p", status="open", priorities=["high", "low"])]
+        counts = [lazy.count(), lazy.count(status="done"), lazy.count(priorities=["medium"])]
+
+        # Assert
+        assert lazy._items is None
+        assert listed == [4, 1]
+        assert counts == [6, 2, 2]
+
+
+class TestTodoManagerPeekNext:
+    """测试优先级队列（peek_next）"""
+
+    @pytest.fixture
+    def manager(self, tmp_path):
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        priorities = ["low", "high", "medium", "high", "low", "medium"]
+        for i, priority in enumerate(priorities, start=1):
+            manager.add(f"任务 {i}", priority=priority)
+        return manager
+
+    def test_highest_priority_then_lowest_id(self, manager):
+        """测试：优先级最高的在前，同级按 ID"""
+        assert [t.id for t in manager.peek_next()] == [2]
+        assert [t.id for t in manager.peek_next(limit=4)] == [2, 4, 3, 6]
+
+    def test_queue_follows_changes(self, manager):
+        """测试：添加、完成、删除后队列随之更新"""
+        # Act
+        manager.mark_done(2)
+        manager.delete(4)
+        manager.add("新的紧急任务", priority="high")
+
+        # Assert
+        assert [t.id for t in manager.peek_next(limit=3)] == [7, 3, 6]
+
+    def test_empty_and_all_done(self, manager):
+        """测试：没有未完成任务时返回空列表"""
+        manager.mark_done_many(range(1, 7))
+
+        assert manager.peek_next() == []
+        assert manager.peek_next(limit=0) == []
+
+    def test_matches_sorted_list_after_many_changes(self, manager):
+        """测试：大量完成、删除（触发堆重建）后结果与排序列出一致"""
+        # Arrange
+        manager.add_many([f"批量 {i}" for i in range(300)], priority="high")
+
+        # Act
+        manager.mark_done_many(range(7, 200))
+        manager.delete_many(range(200, 280, 3))
+
+        # Assert
+        expected = manager.list(sort="p", status="open", limit=20)
+        assert manager.peek_next(limit=20) == expected
+
+    @pytest.mark.parametrize("filename", ["todo.jdb", "todo.db"])
+    def test_lazy_backends(self, manager, tmp_path, filename):
+        """测试：按需查询的后端由索引给出相同的结果"""
+        # Arrange
+        manager.mark_done(2)
+        manager.export_to(str(tmp_path / filename))
+
+        # Act
+        todos = TodoManager(filepath=str(tmp_path / filename), lazy=True).peek_next(limit=3)
+
+        # Assert
+        assert [t.id for t in todos] == [4, 3, 6]
+
+
+class TestTodoManagerGroupCommit:
+    """测试组提交"""
+
+    def test_flush_every_writes_in_groups(self, tmp_path):
+        """测试：累计 flush_every 个修改才写入一次"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+        manager = TodoManager(filepath=path, flush_every=4)
+
+        # Act
+        with patch.object(manager._store, "commit", wraps=manager._store.commit) as commit:
+            for i in range(10):
+                manager.add(f"任务 {i}")
+
+        # Assert
+        assert commit.call_count == 2
+        assert len(TodoManager(filepath=path).todos) == 8
+        assert len(manager.todos) == 10
+
+    def test_explicit_flush(self, tmp_path):
+        """测试：flush() 立即写入暂存的修改"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+        manager = TodoManager(filepath=path, flush_every=1000)
+        manager.add("任务 A")
+        manager.mark_done(1)
+
+        # Act
+        before = TodoManager(filepath=path).todos
+        manager.flush()
+
+        # Assert
+        assert before == []
+        assert [(t.text, t.done) for t in TodoManager(filepath=path).todos] == [("任务 A", True)]
+
+    def test_flush_interval_writes_in_background(self, tmp_path):
+        """测试：flush_interval 到期后由后台线程写入"""
+        # Arrange
+        import time
+        path = str(tmp_path / "todo.json")
+        manager = TodoManager(filepath=path, flush_interval=0.02)
+
+        # Act
+        manager.add_many(["任务 A", "任务 B"])
+        deadline = time.monotonic() + 5
+        while not Path(path).exists() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        # Assert
+        assert len(TodoManager(filepath=path).todos) == 2
+
+    def test_lazy_store_reads_buffered_changes(self, tmp_path):
+        """测试：SQLite 存储在写入前也能读取和修改暂存的任务"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.db"), flush_every=1000)
+
+        # Act
+        todo = manager.add("任务")
+        manager.mark_done(todo.id)
+
+        # Assert
+        assert manager.count(status="done") == 1
+
+    def test_external_change_keeps_buffered_changes(self, tmp_path):
+        """测试：暂存期间文件被其他进程修改，重新加载后暂存的修改不丢失"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+        manager = TodoManager(filepath=path, flush_every=1000)
+        manager.add("暂存任务")
+
+        # Act
+        TodoManager(filepath=path).add("其他进程的任务")
+        listed = [t.text for t in manager.list()]
+        manager.flush()
+
+        # Assert
+        assert sorted(listed) == ["其他进程的任务", "暂存任务"]
+        assert sorted(t.text for t in TodoManager(filepath=path).todos) == listed
+
+    def test_flush_at_interpreter_exit(self, tmp_path):
+        """测试：解释器退出前自动写入暂存的修改"""
+        # Arrange
+        import subprocess
+        import sys
+        path = tmp_path / "todo.json"
+        code = (
+            "from todo.manager import TodoManager\n"
+            f"m = TodoManager(filepath={str(path)!r}, flush_every=1000)\n"
+            "for i in range(3): m.add(f'任务 {i}')\n"
+        )
+
+        # Act
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+        # Assert
+        assert len(TodoManager(filepath=str(path)).todos) == 3
+
+    def test_invalid_flush_every_raises(self, tmp_path):
+        """测试：flush_every 不是正整数时抛出 ValueError"""
+        with pytest.raises(ValueError, match="flush_every"):
+            TodoManager(filepath=str(tmp_path / "todo.json"), flush_every=0)
+
+    @pytest.mark.parametrize("filename", ["todo.json", "todo.jdlog", "todo.jsonl", "todo.jdb"])
+    def test_durable_false_skips_fsync(self, tmp_path, filename):
+        """测试：durable=False 时写入不调用 fsync"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / filename), durable=False)
+
+        # Act
+        with patch("os.fsync") as fsync:
+            manager.add("任务")
+            manager.mark_done(1)
+
+        # Assert
+        fsync.assert_not_called()
+        assert TodoManager(filepath=str(tmp_path / filename)).get(1).done is True
+
+
+class TestTodoManagerHooks:
+    """测试事件订阅"""
+
+    def test_subscribe_receives_load_and_commit(self, tmp_path):
+        """测试：订阅者收到加载与提交事件及其统计信息"""
+        # Arrange
+        path = str(tmp_path / "todo.json")
+        TodoManager(filepath=path).add("任务 A")
+        manager = TodoManager(filepath=path, lazy=True)
+        events = []
+        manager.subscribe(lambda event, info: events.append((event, info)))
+
+        # Act
+        manager.clear()
+        manager.add("任务 B")
+
+        # Assert
+        assert [event for event, _ in events] == ["load", "commit", "commit"]
+        load = events[0][1]
+        assert load["items"] == 1
+        assert load["bytes"] > 0
+        assert events[2][1]["ops"] == 1
+        assert all(info["elapsed"] >= 0 for _, info in events)
+
+    def test_unsubscribe_stops_events(self, tmp_path):
+        """测试：取消订阅后不再收到事件"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        events = []
+        unsubscribe = manager.subscribe(lambda event, info: events.append(event))
+
+        # Act
+        manager.add("任务 A")
+        unsubscribe()
+        manager.add("任务 B")
+
+        # Assert
+        assert events == ["commit"]
+
+
+class TestTodoManagerCheck:
+    """测试完整验证"""
+
+    @pytest.mark.parametrize(
+        "filename", ["todo.json", "todo.jsonl", "todo.jdlog", "todo.jdb", "todo.db", "todo.pickle"]
+    )
+    def test_check_intact_file(self, tmp_path, filename):
+        """测试：本程序写入的文件验证通过"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / filename))
+        manager.add_many(["任务 A", "任务 B", "任务 C"])
+        manager.mark_done(2)
+
+        # Act
+        report = TodoManager(filepath=str(tmp_path / filename), lazy=True).check()
+
+        # Assert
+        assert report.ok
+        assert report.items == 3
+        assert report.checksum is (True if filename == "todo.json" else None)
+
+    def test_check_reports_invalid_task(self, tmp_path):
+        """测试：无效的任务报告为问题，而不是抛出异常"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        path.write_text(json.dumps({"todos": [{"id": 1, "text": "任务", "priority": "urgent"}]}))
+
+        # Act
+        report = TodoManager(filepath=str(path), lazy=True).check()
+
+        # Assert
+        assert not report.ok
+        assert "第 1 个任务无效" in report.problems[0]
+        assert report.checksum is None or report.checksum is False
+
+    def test_check_reports_duplicates_and_stale_header(self, tmp_path):
+        """测试：ID 重复、文件头的最大 ID 与计数不符时报告问题"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        todos = [{"id": 3, "text": "任务", "done": False, "priority": "medium"}] * 2
+        counts = {"open": {"medium": 1}, "done": {}}
+        path.write_text(json.dumps({"next_id": 2, "counts": counts, "todos": todos}))
+
+        # Act
+        report = TodoManager(filepath=str(path), lazy=True).check()
+
+        # Assert
+        assert report.checksum is False
+        assert report.problems == [
+            "任务 ID 3 重复",
+            "记录的最大 ID 小于实际的最大 ID，新任务的 ID 会重复",
+            "记录的任务数与实际不符",
+        ]
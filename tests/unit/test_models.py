@@ -3,8 +3,9 @@
 测试 TodoItem 数据模型的创建和序列化
 """
 
+import sys
 import pytest
-from todo.models import TodoItem
+from todo.models import Priority, TodoItem, TodoTable, trusted_item, trusted_items
 
 
 class TestTodoItemCreation:
@@ -160,3 +161,81 @@ class TestTodoItemPriority:
 
         # Assert
         assert todo.priority == "medium", "缺少 priority 时应默认为 'medium'"
+
+
+class TestTodoItemCompact:
+    """测试紧凑的 TodoItem 表示"""
+
+    @pytest.mark.skipif(sys.version_info < (3, 10), reason="slots 需要 Python 3.10+")
+    def test_todo_item_has_no_instance_dict(self):
+        """测试：TodoItem 使用 __slots__，没有实例 __dict__"""
+        todo = TodoItem(id=1, text="测试")
+        assert not hasattr(todo, "__dict__")
+
+    def test_priority_strings_are_shared(self):
+        """测试：不同来源的优先级字符串被替换为同一对象"""
+        # Arrange
+        name = "".join(["hi", "gh"])
+
+        # Act
+        todo = TodoItem.from_dict({"id": 1, "text": "测试", "priority": name})
+
+        # Assert
+        assert todo.priority is TodoItem(id=2, text="测试", priority="high").priority
+
+    def test_trusted_items_skip_validation(self):
+        """测试：可信记录直接创建任务，与 from_dict 结果相同，优先级字符串共用"""
+        # Arrange
+        records = [{"id": 1, "text": "测试", "done": True, "priority": "".join(["lo", "w"])}]
+
+        # Act
+        todos = trusted_items(records)
+
+        # Assert
+        assert todos == [TodoItem.from_dict(records[0])]
+        assert todos[0].priority is TodoItem(id=2, text="测试", priority="low").priority
+        assert trusted_item(0, "", False, "high").id == 0
+
+    def test_priority_enum_weights(self):
+        """测试：Priority 的值即排序权重"""
+        assert TodoItem(id=1, text="测试", priority="high").priority_weight == Priority.HIGH
+        assert Priority.LOW < Priority.MEDIUM < Priority.HIGH
+        assert Priority.MEDIUM.label == "medium"
+
+
+class TestTodoTable:
+    """测试列式任务表"""
+
+    @pytest.fixture
+    def table(self):
+        todos = [
+            TodoItem(id=3, text="三", priority="high"),
+            TodoItem(id=1, text="一", priority="low", done=True),
+            TodoItem(id=2, text="二", priority="medium"),
+            TodoItem(id=4, text="四", priority="high", done=True),
+        ]
+        return TodoTable.from_items(todos)
+
+    def test_from_items_sorts_by_id_and_round_trips(self, table):
+        """测试：按 ID 排序保存，取出的任务与原任务一致"""
+        assert list(table.ids) == [1, 2, 3, 4]
+        assert table.row(0) == TodoItem(id=1, text="一", priority="low", done=True)
+        assert [t.text for t in table] == ["一", "二", "三", "四"]
+
+    def test_append_requires_increasing_id(self, table):
+        """测试：追加的 ID 必须递增"""
+        with pytest.raises(ValueError, match="ID 必须递增"):
+            table.append(TodoItem(id=2, text="重复"))
+
+    def test_select_by_done_and_priority(self, table):
+        """测试：按完成状态与优先级筛选"""
+        assert table.select(done=False) == [1, 2]
+        assert table.select(priorities=["high"]) == [2, 3]
+        assert table.select(done=True, priorities=["high", "low"]) == [0, 3]
+
+    def test_order_by_priority(self, table):
+        """测试：按优先级排序（高在前，同级按 ID）"""
+        ids = [table.ids[i] for i in table.order("p")]
+        assert ids == [3, 4, 2, 1]
+        open_ids = [table.ids[i] for i in table.order("p", table.select(done=False))]
+        assert open_ids == [3, 2]
@@ -0,0 +1,142 @@
+"""单元测试：全文搜索
+
+测试分词与倒排索引的建立、查询和增量更新
+"""
+
+from unittest.mock import patch
+from todo.manager import TodoManager
+from todo.search import SearchIndex, tokenize
+from todo.storage import JsonStore
+from todo.models import TodoItem
+
+
+class TestTokenize:
+    """测试分词"""
+
+    def test_cjk_text_split_into_bigrams(self):
+        """测试：中文按二元组切分，并补上末尾单字"""
+        assert tokenize("学习计划") == ["学习", "习计", "计划", "划"]
+
+    def test_words_lowercased(self):
+        """测试：其他文字按单词切分并转为小写"""
+        assert tokenize("Review the PR") == ["review", "the", "pr"]
+
+    def test_mixed_text(self):
+        """测试：中英文混排分别切分，标点作为分隔"""
+        assert tokenize("学Python，写代码") == ["学", "python", "写代", "代码", "码"]
+
+    def test_query_skips_trailing_single_char(self):
+        """测试：查询时连续的中文只取二元组"""
+        assert tokenize("学习计划", query=True) == ["学习", "习计", "计划"]
+        assert tokenize("学", query=True) == ["学"]
+
+
+class TestManagerSearch:
+    """测试 TodoManager.search"""
+
+    def _make(self, tmp_path, filename="todo.json"):
+        manager = TodoManager(filepath=str(tmp_path / filename))
+        manager.add_many([
+            "学习 Python 编程",
+            "周末去超市买菜",
+            "写季度总结报告",
+            "京大学生在北京",
+        ])
+        return manager
+
+    def test_search_chinese_substring(self, tmp_path):
+        """测试：中文子串可以搜索到"""
+        manager = self._make(tmp_path)
+        assert [t.id for t in manager.search("买菜")] == [2]
+        assert [t.id for t in manager.search("总结")] == [3]
+
+    def test_search_single_char(self, tmp_path):
+        """测试：单个汉字也能命中"""
+        manager = self._make(tmp_path)
+        assert [t.id for t in manager.search("菜")] == [2]
+        assert [t.id for t in manager.search("学")] == [1, 4]
+
+    def test_search_words_case_insensitive(self, tmp_path):
+        """测试：英文单词不区分大小写"""
+        manager = self._make(tmp_path)
+        assert [t.id for t in manager.search("python")] == [1]
+
+    def test_all_terms_required(self, tmp_path):
+        """测试：任务需包含全部查询词"""
+        manager = self._make(tmp_path)
+        assert [t.id for t in manager.search("学习 编程")] == [1]
+        assert manager.search("学习 买菜") == []
+
+    def test_bigrams_must_be_adjacent(self, tmp_path):
+        """测试：二元组都出现但不相邻时不算匹配"""
+        manager = self._make(tmp_path)
+        assert manager.search("北京大学") == []
+
+    def test_limit(self, tmp_path):
+        """测试：limit 限制返回数量"""
+        manager = self._make(tmp_path)
+        assert [t.id for t in manager.search("学", limit=1)] == [1]
+
+    def test_index_created_on_first_search(self, tmp_path):
+        """测试：第一次搜索前不建立索引"""
+        # Arrange
+        manager = self._make(tmp_path)
+        index_path = tmp_path / "todo.json.idx"
+        assert not index_path.exists()
+
+        # Act
+        manager.search("学习")
+
+        # Assert
+        assert index_path.exists()
+
+    def test_mutations_update_index_incrementally(self, tmp_path):
+        """测试：建立索引后，修改增量同步到索引，不再重建"""
+        # Arrange
+        manager = self._make(tmp_path, "todo.jsonl")
+        manager.search("学习")
+
+        # Act
+        manager.add("学习 Rust")
+        manager.delete(1)
+        manager.mark_done(3)
+        with patch.object(SearchIndex, "rebuild") as mock_rebuild:
+            added = manager.search("学习")
+            done = manager.search("报告")
+            manager.clear()
+            cleared = manager.search("报告")
+
+        # Assert
+        mock_rebuild.assert_not_called()
+        assert [t.text for t in added] == ["学习 Rust"]
+        assert [t.done for t in done] == [True]
+        assert cleared == []
+
+    def test_search_from_another_manager_uses_index(self, tmp_path):
+        """测试：其他 manager 的修改同样更新索引"""
+        # Arrange
+        path = str(tmp_path / "todo.jdlog")
+        self._make(tmp_path, "todo.jdlog").search("学习")
+        TodoManager(filepath=path, lazy=True).add("新的报告")
+
+        # Act
+        with patch.object(SearchIndex, "rebuild") as mock_rebuild:
+            result = TodoManager(filepath=path, lazy=True).search("报告")
+
+        # Assert
+        mock_rebuild.assert_not_called()
+        assert [t.id for t in result] == [3, 5]
+
+    def test_stale_index_rebuilt(self, tmp_path):
+        """测试：数据文件被直接改写后，搜索前重建索引"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        manager = self._make(tmp_path)
+        manager.search("学习")
+
+        # Act
+        JsonStore(path).save([TodoItem(id=9, text="外部写入的报告")])
+        result = TodoManager(filepath=str(path)).search("报告")
+
+        # Assert
+        assert [t.id for t in result] == [9]
@@ -0,0 +1,205 @@
+"""单元测试：常驻服务
+
+测试命令经 Unix 套接字转发给常驻 TodoManager 执行
+"""
+
+import threading
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from todo.cli import main
+from todo.manager import TodoManager
+from todo import server
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(server, "TodoServer"), reason="平台不支持 Unix 域套接字"
+)
+
+
+@pytest.fixture
+def running_server(tmp_path):
+    """在后台线程中启动服务"""
+    manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+    path = tmp_path / "jd.sock"
+    srv = server.TodoServer(path, manager)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield path, manager
+    srv.shutdown()
+    srv.server_close()
+
+
+class TestForward:
+    """测试命令转发"""
+
+    def test_forward_executes_on_resident_manager(self, running_server):
+        """测试：转发的命令在常驻 manager 上执行"""
+        # Arrange
+        path, manager = running_server
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO) as mock_stdout:
+            code = server.forward(["add", "常驻任务", "-l", "1"], path)
+
+        # Assert
+        assert code == 0
+        assert "常驻任务" in mock_stdout.getvalue()
+        assert [t.text for t in manager.todos] == ["常驻任务"]
+
+    def test_forward_returns_error_code(self, running_server):
+        """测试：命令出错时返回非零退出码和错误信息"""
+        # Arrange
+        path, _ = running_server
+
+        # Act
+        with patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+            code = server.forward(["done", "99"], path)
+
+        # Assert
+        assert code == 1
+        assert "错误" in mock_stderr.getvalue()
+
+    def test_forward_named_list_uses_own_manager(self, running_server, tmp_path, monkeypatch):
+        """测试：-L 指定的列表由服务中单独的常驻 manager 执行"""
+        # Arrange
+        path, manager = running_server
+        monkeypatch.setenv("HOME", str(tmp_path))
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO):
+            code = server.forward(["-L", "ops", "add", "运维任务"], path)
+
+        # Assert
+        assert code == 0
+        assert manager.todos == []
+        assert (tmp_path / ".jd" / "lists" / "ops.json").exists()
+
+    def test_named_list_server_keeps_default_list_for_plain_commands(self, tmp_path, monkeypatch):
+        """测试：jd -L ops serve 启动的服务，不带 -L 的命令仍作用于默认列表"""
+        # Arrange
+        monkeypatch.setenv("HOME", str(tmp_path))
+        from todo.lists import TodoLists
+        ops = TodoLists().manager("ops")
+        path = tmp_path / "jd.sock"
+        srv = server.TodoServer(path, ops, "ops")
+        thread = threading.Thread(target=srv.serve_forever, daemon=True)
+        thread.start()
+
+        # Act
+        try:
+            with patch("sys.stdout", new_callable=StringIO):
+                plain = server.forward(["add", "默认任务"], path)
+                named = server.forward(["-L", "ops", "add", "运维任务"], path)
+        finally:
+            srv.shutdown()
+            srv.server_close()
+
+        # Assert
+        assert (plain, named) == (0, 0)
+        assert [t.text for t in ops.todos] == ["运维任务"]
+        assert [t.text for t in TodoLists().manager().todos] == ["默认任务"]
+
+    def test_forward_file_option_and_env(self, running_server, tmp_path, monkeypatch):
+        """测试：--file 的相对路径按客户端工作目录解析，JD_FILE 随请求转发"""
+        # Arrange
+        path, manager = running_server
+        workdir = tmp_path / "work"
+        workdir.mkdir()
+        monkeypatch.chdir(workdir)
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO):
+            by_option = server.forward(["--file", "a.jdlog", "add", "选项任务"], path)
+            monkeypatch.setenv("JD_FILE", str(workdir / "b.db"))
+            by_env = server.forward(["add", "环境变量任务"], path)
+
+        # Assert
+        assert (by_option, by_env) == (0, 0)
+        assert manager.todos == []
+        assert [t.text for t in TodoManager(filepath=str(workdir / "a.jdlog")).todos] == ["选项任务"]
+        assert [t.text for t in TodoManager(filepath=str(workdir / "b.db")).todos] == ["环境变量任务"]
+
+    def test_forward_sends_stdin(self, running_server):
+        """测试：done - 应把标准输入一并转发"""
+        # Arrange
+        path, manager = running_server
+        manager.add_many(["任务 1", "任务 2", "任务 3"])
+
+        # Act
+        with patch("sys.stdin", StringIO("1 3")):
+            with patch("sys.stdout", new_callable=StringIO):
+                code = server.forward(["done", "-"], path)
+
+        # Assert
+        assert code == 0
+        assert [t.done for t in manager.todos] == [True, False, True]
+
+    def test_forward_without_server_returns_none(self, tmp_path):
+        """测试：套接字不存在时返回 None（回退为直接访问）"""
+        assert server.forward(["list"], tmp_path / "missing.sock") is None
+
+    def test_forward_with_stale_socket_returns_none(self, tmp_path):
+        """测试：套接字文件残留但服务未运行时返回 None"""
+        path = tmp_path / "stale.sock"
+        path.touch()
+        assert server.forward(["list"], path) is None
+
+    def test_relative_path_resolved_against_client_cwd(self, running_server, tmp_path, monkeypatch):
+        """测试：命令中的相对路径按客户端的工作目录解析"""
+        # Arrange
+        path, manager = running_server
+        manager.add("要导出的任务")
+        workdir = tmp_path / "client"
+        workdir.mkdir()
+        monkeypatch.chdir(workdir)
+
+        # Act
+        with patch("sys.stdout", new_callable=StringIO):
+            code = server.forward(["export", "backup.json"], path)
+
+        # Assert
+        assert code == 0
+        assert (workdir / "backup.json").exists()
+
+    def test_connection_lost_after_send_does_not_fall_back(self, tmp_path):
+        """测试：请求发出后连接中断时报错，不回退为本地执行（避免执行两次）"""
+        # Arrange
+        import socket
+        path = tmp_path / "broken.sock"
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(str(path))
+        listener.listen(1)
+
+        def accept_and_close():
+            conn, _ = listener.accept()
+            conn.recv(65536)
+            conn.close()
+
+        thread = threading.Thread(target=accept_and_close, daemon=True)
+        thread.start()
+
+        # Act
+        with patch("sys.stderr", new_callable=StringIO) as mock_stderr:
+            code = server.forward(["add", "任务"], path)
+        thread.join()
+        listener.close()
+
+        # Assert
+        assert code == 1
+        assert "连接中断" in mock_stderr.getvalue()
+
+    def test_main_forwards_when_socket_present(self, running_server, monkeypatch):
+        """测试：main 在服务运行时转发命令，不直接创建 TodoManager"""
+        # Arrange
+        path, manager = running_server
+        monkeypatch.setenv(server.SOCKET_ENV, str(path))
+
+        # Act
+        with patch("sys.argv", ["jd", "add", "转发任务"]):
+            with patch("todo.cli.TodoManager") as mock_manager_class:
+                with patch("sys.stdout", new_callable=StringIO):
+                    main()
+
+        # Assert
+        mock_manager_class.assert_not_called()
+        assert [t.text for t in manager.todos] == ["转发任务"]
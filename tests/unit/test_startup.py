@@ -0,0 +1,94 @@
+"""单元测试：CLI 启动开销
+
+在独立进程中检查 jd 启动时导入的模块和导入耗时（python -X importtime）
+"""
+
+import os
+import subprocess
+import sys
+import pytest
+
+# jd 命令导入总耗时的上限（微秒），取多次运行中最快的一次比较。
+# 实测约 70–100 ms，机器负载下波动较大；个别模块的多余导入由
+# test_add_skips_absent_sidecars 等按模块名检查
+IMPORT_BUDGET_US = 150_000
+IMPORT_RUNS = 3
+
+
+def _run_python(args, tmp_path):
+    """以独立进程运行 python（HOME 指向临时目录，不连接常驻服务）"""
+    env = dict(os.environ, HOME=str(tmp_path))
+    env.pop("JD_SOCKET", None)
+    return subprocess.run(
+        [sys.executable, *args], env=env, capture_output=True, text=True, check=True
+    )
+
+
+def _imported_modules(code, tmp_path):
+    """执行代码后已导入的模块名"""
+    proc = _run_python(["-c", f"{code}\nimport sys; print(' '.join(sys.modules))"], tmp_path)
+    return set(proc.stdout.split())
+
+
+def _import_times(args, tmp_path):
+    """解析 -X importtime 输出，返回 {模块名: 累计耗时(微秒)} 与顶层导入总耗时"""
+    proc = _run_python(["-X", "importtime", *args], tmp_path)
+    times = {}
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return times, total
+
+
+class TestLazyImports:
+    """测试按需导入"""
+
+    def test_import_package_loads_no_submodules(self, tmp_path):
+        """测试：import todo 不导入任何子模块"""
+        modules = _imported_modules("import todo", tmp_path)
+        assert not [m for m in modules if m.startswith("todo.")]
+
+    def test_package_attributes_resolve_lazily(self):
+        """测试：包级名称在首次访问时导入"""
+        import todo
+        from todo.manager import TodoManager
+        assert todo.TodoManager is TodoManager
+        assert "TodoItem" in dir(todo)
+
+    def test_import_cli_defers_manager_and_argparse(self, tmp_path):
+        """测试：导入 CLI 模块不导入 TodoManager 与 argparse"""
+        modules = _imported_modules("import todo.cli", tmp_path)
+        assert "todo.manager" not in modules
+        assert "argparse" not in modules
+
+
+class TestStartupCost:
+    """测试 jd 命令的启动开销"""
+
+    def test_add_skips_unused_backends(self, tmp_path):
+        """测试：jd add 不导入常驻服务与 SQLite 模块"""
+        times, _ = _import_times(["-m", "todo.cli", "add", "任务"], tmp_path)
+        assert "todo.manager" in times
+        assert "todo.server" not in times
+        assert "sqlite3" not in times
+
+    def test_add_skips_absent_sidecars(self, tmp_path):
+        """测试：没有索引与同步状态文件时，jd add 不导入 search/sync 及其依赖"""
+        times, _ = _import_times(["-m", "todo.cli", "add", "任务"], tmp_path)
+        for module in ("todo.search", "todo.sync", "uuid", "hashlib"):
+            assert module not in times
+
+    @pytest.mark.parametrize("command", [["add", "任务"], ["list"]])
+    def test_import_time_within_budget(self, tmp_path, command):
+        """测试：jd 命令的导入总耗时不超过上限"""
+        totals = [
+            _import_times(["-m", "todo.cli", *command], tmp_path)[1]
+            for _ in range(IMPORT_RUNS)
+        ]
+
+        assert min(totals) < IMPORT_BUDGET_US
@@ -0,0 +1,1168 @@
+"""单元测试：存储后端
+
+测试 JSON 存储与追加式日志存储的读写
+"""
+
+import json
+import sqlite3
+import pytest
+from io import StringIO
+from unittest.mock import patch
+from todo.manager import TodoManager
+from todo.models import TodoItem
+from todo.storage import (
+    JournalStore, JsonStore, MarshalStore, PickleStore, RecordStore, SnapshotStore,
+    SqliteStore, iter_json_array, open_store, sniff_codec,
+)
+
+
+class TestOpenStore:
+    """测试按扩展名选择后端"""
+
+    def test_json_suffix_uses_json_store(self, tmp_path):
+        """测试：.json 文件使用 JsonStore"""
+        assert isinstance(open_store(tmp_path / "todo.json"), JsonStore)
+
+    def test_jdlog_suffix_uses_journal_store(self, tmp_path):
+        """测试：.jdlog 文件使用 JournalStore"""
+        assert isinstance(open_store(tmp_path / "todo.jdlog"), JournalStore)
+
+    def test_jsonl_suffix_uses_record_store(self, tmp_path):
+        """测试：.jsonl 文件使用 RecordStore"""
+        assert isinstance(open_store(tmp_path / "todo.jsonl"), RecordStore)
+
+    def test_jdb_suffix_uses_snapshot_store(self, tmp_path):
+        """测试：.jdb 文件使用 SnapshotStore"""
+        assert isinstance(open_store(tmp_path / "todo.jdb"), SnapshotStore)
+
+    def test_db_suffix_uses_sqlite_store(self, tmp_path):
+        """测试：.db 文件使用 SqliteStore"""
+        assert isinstance(open_store(tmp_path / "todo.db"), SqliteStore)
+
+    def test_unknown_suffix_defaults_to_json(self, tmp_path):
+        """测试：未知扩展名默认使用 JsonStore"""
+        assert isinstance(open_store(tmp_path / "todo.txt"), JsonStore)
+
+
+class TestJournalStore:
+    """测试追加式日志存储"""
+
+    def test_mutations_append_records(self, tmp_path):
+        """测试：每次修改只追加一行记录"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        manager = TodoManager(filepath=str(path))
+
+        # Act
+        manager.add("任务 1")
+        manager.add("任务 2")
+        manager.mark_done(1)
+        manager.delete(2)
+
+        # Assert
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [r["op"] for r in records] == ["add", "add", "done", "delete"]
+
+    def test_reload_replays_journal(self, tmp_path):
+        """测试：重新加载应重放日志得到相同状态"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        manager = TodoManager(filepath=str(path))
+        manager.add("任务 1", priority="high")
+        manager.add("任务 2")
+        manager.add("任务 3")
+        manager.mark_done(1)
+        manager.mark_done(2)
+        manager.delete(3)
+        manager.clear()
+        manager.add("任务 4")
+
+        # Act
+        reloaded = TodoManager(filepath=str(path))
+
+        # Assert
+        assert [t.to_dict() for t in reloaded.todos] == [t.to_dict() for t in manager.todos]
+        assert reloaded.add("任务 5").id == manager._next_id
+
+    def test_truncated_last_record_is_ignored(self, tmp_path):
+        """测试：写入中断留下的残缺末行应被忽略"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        manager = TodoManager(filepath=str(path))
+        manager.add("任务 1")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"op": "add", "todo": {"id": 2, "te')
+
+        # Act
+        reloaded = TodoManager(filepath=str(path))
+
+        # Assert
+        assert [t.text for t in reloaded.todos] == ["任务 1"]
+
+
+    def test_append_after_torn_tail_keeps_later_records(self, tmp_path):
+        """测试：残缺末行之后继续追加，新记录不丢失"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        TodoManager(filepath=str(path)).add_many(["a", "b"])
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"op": "add", "todo": {"id": 3, "te')
+
+        # Act
+        manager = TodoManager(filepath=str(path))
+        manager.add("c")
+        manager.mark_done(1)
+
+        # Assert
+        reloaded = TodoManager(filepath=str(path))
+        assert [(t.id, t.done) for t in reloaded.todos] == [(1, True), (2, False), (3, False)]
+        assert all(json.loads(line) for line in path.read_text(encoding="utf-8").splitlines())
+
+    def test_corrupt_middle_line_skipped(self, tmp_path):
+        """测试：旧版本留在中间的损坏行被跳过，之后的记录照常重放；jd check 报告"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        path.write_text(
+            '{"op": "add", "todo": {"id": 1, "text": "a", "done": false, "priority": "medium"}}\n'
+            '{"op": "add", "todo": {"id": 2, "te\n'
+            '{"op": "done", "id": 1}\n',
+            encoding="utf-8",
+        )
+
+        # Act
+        reloaded = TodoManager(filepath=str(path))
+        report = TodoManager(filepath=str(path), lazy=True).check()
+
+        # Assert
+        assert [(t.id, t.done) for t in reloaded.todos] == [(1, True)]
+        assert not report.ok
+        assert "日志第 2 行已损坏" in report.problems[0]
+
+class TestImportExport:
+    """测试导入导出"""
+
+    def test_export_journal_to_json(self, tmp_path):
+        """测试：日志存储可导出为 JSON 文件"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.jdlog"))
+        manager.add("任务 1")
+        manager.add("任务 2", priority="low")
+
+        # Act
+        manager.export_to(str(tmp_path / "out.json"))
+
+        # Assert
+        data = json.loads((tmp_path / "out.json").read_text(encoding="utf-8"))
+        assert [t["text"] for t in data["todos"]] == ["任务 1", "任务 2"]
+
+    def test_import_json_into_journal(self, tmp_path):
+        """测试：JSON 文件可导入到日志存储"""
+        # Arrange
+        source = TodoManager(filepath=str(tmp_path / "todo.json"))
+        source.add("任务 1")
+        source.add("任务 2")
+        target = TodoManager(filepath=str(tmp_path / "todo.jdlog"))
+
+        # Act
+        count = target.import_from(str(tmp_path / "todo.json"))
+
+        # Assert
+        assert count == 2
+        reloaded = TodoManager(filepath=str(tmp_path / "todo.jdlog"))
+        assert [t.text for t in reloaded.todos] == ["任务 1", "任务 2"]
+        assert reloaded.add("任务 3").id == 3
+
+
+class TestJournalCompaction:
+    """测试日志压缩"""
+
+    def test_compact_folds_log_into_snapshot(self, tmp_path):
+        """测试：压缩后日志只剩一条快照记录，且状态不变"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        manager = TodoManager(filepath=str(path))
+        for i in range(10):
+            manager.add(f"任务 {i}")
+        for i in range(1, 6):
+            manager.delete(i)
+
+        # Act
+        stats = manager.compact()
+
+        # Assert
+        assert stats.records_folded == 15
+        assert stats.bytes_reclaimed > 0
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["op"] == "snapshot"
+        reloaded = TodoManager(filepath=str(path))
+        assert [t.id for t in reloaded.todos] == [6, 7, 8, 9, 10]
+
+    def test_tail_after_snapshot_is_replayed(self, tmp_path):
+        """测试：快照之后追加的记录应在加载时重放"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        manager = TodoManager(filepath=str(path))
+        manager.add("任务 1")
+        manager.compact()
+        manager.add("任务 2")
+        manager.mark_done(1)
+
+        # Act
+        reloaded = TodoManager(filepath=str(path))
+
+        # Assert
+        assert [(t.id, t.done) for t in reloaded.todos] == [(1, True), (2, False)]
+        assert reloaded._store._tail_records == 2
+
+    def test_auto_compaction_when_threshold_exceeded(self, tmp_path):
+        """测试：增量记录超过阈值时自动压缩"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        store = JournalStore(path, compact_min_records=10, compact_ratio=2.0)
+        manager = TodoManager(filepath=str(path), store=store)
+        manager.add("保留任务")
+
+        # Act - 反复添加删除，制造大量无效记录
+        for _ in range(5):
+            todo = manager.add("临时任务")
+            manager.delete(todo.id)
+
+        # Assert
+        assert len(path.read_text(encoding="utf-8").splitlines()) < 11
+        reloaded = TodoManager(filepath=str(path))
+        assert [t.text for t in reloaded.todos] == ["保留任务"]
+
+    def test_json_store_needs_no_compaction(self, tmp_path):
+        """测试：JSON 存储的压缩返回 None"""
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        assert manager.compact() is None
+
+
+class TestRecordStore:
+    """测试按记录原地修改的存储"""
+
+    def _make(self, tmp_path, count=3):
+        path = tmp_path / "todo.jsonl"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many([f"任务 {i}" for i in range(1, count + 1)])
+        return path, manager
+
+    def test_add_appends_record(self, tmp_path):
+        """测试：add 只在文件末尾追加一行"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        before = path.read_bytes()
+
+        # Act
+        manager.add("任务 4", priority="high")
+
+        # Assert
+        after = path.read_bytes()
+        assert after.startswith(before)
+        assert json.loads(after[len(before):]) == {
+            "id": 4, "done": False, "priority": "high", "text": "任务 4"
+        }
+
+    def test_mark_done_patches_in_place(self, tmp_path):
+        """测试：mark_done 原地改写 done 字段，文件大小不变"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        before = path.read_bytes()
+
+        # Act
+        manager.mark_done(2)
+
+        # Assert
+        after = path.read_bytes()
+        assert len(after) == len(before)
+        assert after.splitlines()[1] == before.splitlines()[1]
+        assert after.splitlines()[3] == before.splitlines()[3]
+        assert json.loads(after.splitlines()[2])["done"] is True
+
+    def test_delete_blanks_record(self, tmp_path):
+        """测试：delete 用空白覆盖记录，重新加载时跳过"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        size = path.stat().st_size
+
+        # Act
+        manager.delete(1)
+
+        # Assert
+        lines = path.read_bytes().splitlines()
+        assert path.stat().st_size == size
+        assert lines[1].strip() == b""
+        reloaded = TodoManager(filepath=str(path))
+        assert [t.id for t in reloaded.todos] == [2, 3]
+
+    def test_clear_rewrites_without_done_and_blank_records(self, tmp_path):
+        """测试：clear 整体重写，去掉已完成任务与空白行"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        manager.mark_done(2)
+        manager.delete(3)
+
+        # Act
+        manager.clear()
+
+        # Assert
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["id"] for line in lines[1:]] == [1]
+
+    def test_compact_removes_blank_records(self, tmp_path):
+        """测试：压缩去掉已删除记录留下的空白行"""
+        # Arrange
+        path, manager = self._make(tmp_path, count=5)
+        manager.delete_many([1, 2])
+
+        # Act
+        stats = manager.compact()
+
+        # Assert
+        assert stats.records_folded == 2
+        assert stats.bytes_reclaimed > 0
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert [json.loads(line)["id"] for line in lines[1:]] == [3, 4, 5]
+
+    def test_auto_compaction_when_threshold_exceeded(self, tmp_path):
+        """测试：空白行超过阈值时自动压缩"""
+        # Arrange
+        path = tmp_path / "todo.jsonl"
+        store = RecordStore(path, compact_min_records=3, compact_ratio=1.0)
+        manager = TodoManager(filepath=str(path), store=store)
+        manager.add_many([f"任务 {i}" for i in range(1, 6)])
+
+        # Act
+        manager.delete_many([1, 2, 3])
+
+        # Assert
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 3
+
+    def test_format_header_first_line(self, tmp_path):
+        """测试：首行是格式标记，删除第一个任务后仍按 jsonl 识别"""
+        # Arrange
+        path = tmp_path / "t.json"
+        TodoManager(filepath=str(path), codec="jsonl").add_many(["任务 1", "任务 2"])
+
+        # Act
+        TodoManager(filepath=str(path)).delete(1)
+
+        # Assert
+        assert path.read_text(encoding="utf-8").splitlines()[0] == (
+            '{"format": "jd-jsonl", "version": 1}'
+        )
+        assert sniff_codec(path) == "jsonl"
+        assert [t.text for t in TodoManager(filepath=str(path)).todos] == ["任务 2"]
+
+    def test_legacy_file_gets_header_on_first_write(self, tmp_path):
+        """测试：没有格式标记的旧文件在第一次写入时补上标记"""
+        # Arrange
+        path = tmp_path / "todo.jsonl"
+        path.write_text(
+            '{"id": 1, "done": false, "priority": "medium", "text": "旧任务"}\n', encoding="utf-8"
+        )
+
+        # Act
+        TodoManager(filepath=str(path), lazy=True).add("新任务")
+
+        # Assert
+        assert path.read_bytes().startswith(RecordStore.MAGIC)
+        assert [t.text for t in TodoManager(filepath=str(path)).todos] == ["旧任务", "新任务"]
+
+    def test_lazy_add_does_not_load_todos(self, tmp_path):
+        """测试：按需模式下添加任务只扫描行首获取最大 ID"""
+        # Arrange
+        path, _ = self._make(tmp_path)
+
+        # Act
+        lazy = TodoManager(filepath=str(path), lazy=True)
+        todo = lazy.add("任务 4")
+
+        # Assert
+        assert lazy._items is None
+        assert todo.id == 4
+
+    def test_stale_index_is_rescanned(self, tmp_path):
+        """测试：其他进程删除记录后，原地修改不会写错位置"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        store = RecordStore(path)
+        store.load()
+        TodoManager(filepath=str(path)).delete(2)
+        store._index_stamp = store.stamp()  # 模拟修改时间未变化
+
+        # Act
+        store.commit([("done", 2), ("done", 3)], None)
+
+        # Assert
+        reloaded = TodoManager(filepath=str(path))
+        assert [(t.id, t.done) for t in reloaded.todos] == [(1, False), (3, True)]
+
+    def test_truncated_last_line_is_ignored(self, tmp_path):
+        """测试：写入中途崩溃留下的半行被忽略，并在下次追加时覆盖"""
+        # Arrange
+        path, _ = self._make(tmp_path)
+        with open(path, "ab") as f:
+            f.write(b'{"id": 4, "do')
+
+        # Act
+        manager = TodoManager(filepath=str(path))
+        todo = manager.add("任务 4")
+
+        # Assert
+        assert todo.id == 4
+        reloaded = TodoManager(filepath=str(path))
+        assert [t.text for t in reloaded.todos] == ["任务 1", "任务 2", "任务 3", "任务 4"]
+
+    def test_hand_edited_middle_record_kept(self, tmp_path):
+        """测试：中间一行被手工改写（字段顺序不同）后再添加任务，后面的记录不丢失"""
+        # Arrange
+        path, _ = self._make(tmp_path)
+        lines = path.read_bytes().splitlines(keepends=True)
+        lines[2] = b'{"text": "\xe6\x94\xb9\xe8\xbf\x87", "priority": "high", "id": 2, "done": true}\n'
+        path.write_bytes(b"".join(lines))
+
+        # Act
+        manager = TodoManager(filepath=str(path))
+        todo = manager.add("任务 4")
+
+        # Assert
+        assert todo.id == 4
+        reloaded = TodoManager(filepath=str(path))
+        assert [(t.id, t.text, t.done) for t in reloaded.todos] == [
+            (1, "任务 1", False), (2, "改过", True), (3, "任务 3", False), (4, "任务 4", False)
+        ]
+        assert path.read_bytes().splitlines()[2].startswith(b'{"id": 2, "done": true, ')
+
+    def test_hand_edited_record_reported_by_check(self, tmp_path):
+        """测试：jd check 报告不是规范格式的行，计数照常"""
+        # Arrange
+        path, _ = self._make(tmp_path)
+        lines = path.read_bytes().splitlines(keepends=True)
+        lines[3] = b'{"id":3,"done":false,"priority":"low","text":"x"}\n'
+        path.write_bytes(b"".join(lines))
+
+        # Act
+        report = TodoManager(filepath=str(path)).check()
+
+        # Assert
+        assert report.items == 3
+        assert report.problems == ["第 4 行不是规范格式（下次写入时整体重写）"]
+
+    def test_corrupt_middle_line_not_truncated(self, tmp_path):
+        """测试：中间一行无法解析时报错，不会把它之后的记录截掉"""
+        # Arrange
+        path, _ = self._make(tmp_path)
+        lines = path.read_bytes().splitlines(keepends=True)
+        lines[2] = b"garbage\n"
+        path.write_bytes(b"".join(lines))
+        before = path.read_bytes()
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="第 3 行已损坏"):
+            TodoManager(filepath=str(path)).add("任务 4")
+        assert path.read_bytes() == before
+
+
+class TestSnapshotStore:
+    """测试二进制快照存储"""
+
+    def _make(self, tmp_path):
+        path = tmp_path / "todo.jdb"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many([f"任务 {i}" for i in range(1, 4)])
+        manager.add("紧急任务", priority="high")
+        manager.add("以后再说", priority="low")
+        return path, manager
+
+    def test_roundtrip_preserves_todos(self, tmp_path):
+        """测试：写入后重新读取，任务内容不变"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        manager.mark_done(2)
+
+        # Act
+        loaded = SnapshotStore(path).load()
+
+        # Assert
+        assert [t.to_dict() for t in loaded] == [t.to_dict() for t in manager.todos]
+
+    def test_manager_does_not_preload(self, tmp_path):
+        """测试：TodoManager 打开 .jdb 文件时不加载全部任务"""
+        # Arrange
+        path, _ = self._make(tmp_path)
+
+        # Act
+        manager = TodoManager(filepath=str(path))
+        head = manager.list(sort="p", limit=2)
+
+        # Assert
+        assert manager._items is None
+        assert [t.id for t in head] == [4, 1]
+        assert manager.get(5).text == "以后再说"
+
+    def test_query_filters_and_pages(self, tmp_path):
+        """测试：query 支持筛选与分页"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        manager.mark_done(1)
+        store = SnapshotStore(path)
+
+        # Act
+        open_medium = store.query(done=False, priorities={"medium"})
+        page = store.query(sort="p", limit=2, offset=1)
+
+        # Assert
+        assert [t.id for t in open_medium] == [2, 3]
+        assert [t.id for t in page] == [1, 2]
+
+    def test_mark_done_patches_in_place(self, tmp_path):
+        """测试：mark_done 只改写标志位与文件头计数，文件大小不变"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        before = path.read_bytes()
+
+        # Act
+        manager.mark_done(2)
+
+        # Assert
+        after = path.read_bytes()
+        assert len(after) == len(before)
+        assert sum(a != b for a, b in zip(before, after)) <= 3
+        assert SnapshotStore(path).counts()[(True, "medium")] == 1
+
+    def test_delete_hides_record_until_compact(self, tmp_path):
+        """测试：delete 标记记录为已删除，compact 时去掉"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        size = path.stat().st_size
+
+        # Act
+        manager.delete(3)
+        stats = manager.compact()
+
+        # Assert
+        assert path.stat().st_size == stats.bytes_after < size
+        assert stats.records_folded == 1
+        assert [t.id for t in SnapshotStore(path).load()] == [1, 2, 4, 5]
+
+    def test_add_and_clear_rewrite(self, tmp_path):
+        """测试：add 与 clear 整体重写，计数与最大 ID 正确"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        manager.mark_done(1)
+        manager.mark_done(4)
+
+        # Act
+        manager.clear()
+        manager.add("新任务")
+
+        # Assert
+        store = SnapshotStore(path)
+        assert [t.id for t in store.load()] == [2, 3, 5, 6]
+        assert store.max_id() == 6
+        assert store.counts() == {(False, "medium"): 3, (False, "low"): 1}
+
+    def test_missing_file_is_empty(self, tmp_path):
+        """测试：文件不存在时没有任务"""
+        store = SnapshotStore(tmp_path / "todo.jdb")
+        assert store.load() == []
+        assert store.max_id() == 0
+        assert store.get(1) is None
+
+    def test_invalid_file_raises(self, tmp_path):
+        """测试：不是快照格式的文件抛出 ValueError"""
+        # Arrange
+        path = tmp_path / "todo.jdb"
+        path.write_text('{"todos": []}', encoding="utf-8")
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="不是有效的快照文件"):
+            SnapshotStore(path).load()
+
+    def test_convert_to_and_from_json(self, tmp_path):
+        """测试：通过 export/import 与 JSON 互相转换"""
+        # Arrange
+        path, manager = self._make(tmp_path)
+        manager.mark_done(5)
+        json_path = tmp_path / "todo.json"
+
+        # Act
+        manager.export_to(str(json_path))
+        restored = TodoManager(filepath=str(tmp_path / "restored.jdb"))
+        count = restored.import_from(str(json_path))
+
+        # Assert
+        assert count == 5
+        assert [t.to_dict() for t in SnapshotStore(tmp_path / "restored.jdb").load()] == [
+            t.to_dict() for t in JsonStore(json_path).load()
+        ]
+
+
+class TestTrustedLoad:
+    """测试带校验和的 JSON 文件跳过逐个验证"""
+
+    @pytest.fixture
+    def path(self, tmp_path):
+        path = tmp_path / "todo.json"
+        TodoManager(filepath=str(path)).add_many(["任务 A", "任务 B"])
+        return path
+
+    def test_checksum_written_at_end(self, path):
+        """测试：保存时在文件末尾写入校验和，文件仍是普通 JSON"""
+        data = json.loads(path.read_text(encoding="utf-8"))
+
+        assert isinstance(data["checksum"], int)
+        assert JsonStore(path).checksum_ok() is True
+
+    def test_trusted_file_skips_validation(self, path):
+        """测试：校验和一致时不调用 TodoItem.from_dict"""
+        with patch("todo.models.TodoItem.from_dict") as from_dict:
+            todos = JsonStore(path).load()
+
+        from_dict.assert_not_called()
+        assert [t.text for t in todos] == ["任务 A", "任务 B"]
+
+    def test_edited_file_is_validated(self, path):
+        """测试：文件被改动后校验和不一致，逐个验证并拒绝无效任务"""
+        # Arrange
+        text = path.read_text(encoding="utf-8")
+        path.write_text(text.replace('"任务 B"', '"  "'), encoding="utf-8")
+        store = JsonStore(path)
+
+        # Act / Assert
+        assert store.checksum_ok() is False
+        with pytest.raises(ValueError, match="文本不能为空"):
+            store.load()
+
+    def test_strict_names_invalid_record(self, path):
+        """测试：strict 模式下即使校验和一致也逐个验证，并指出第几个任务无效"""
+        # Arrange
+        store = JsonStore(path)
+        store.save([TodoItem(id=1, text="任务"), TodoItem(id=2, text="任务")])
+        text = path.read_text(encoding="utf-8").replace('"id": 2', '"id": 0')
+        path.write_text(text, encoding="utf-8")
+        store.strict = True
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="第 2 个任务无效"):
+            store.load()
+
+    def test_compressed_file_has_checksum(self, tmp_path):
+        """测试：压缩文件同样写入校验和"""
+        path = tmp_path / "todo.json.gz"
+        TodoManager(filepath=str(path)).add("任务")
+
+        assert JsonStore(path, compression=".gz").checksum_ok() is True
+
+
+    def test_object_without_todos_rejected(self, tmp_path):
+        """测试：顶层对象既没有 todos 也没有 next_id 时报错，而不是当作空列表"""
+        path = tmp_path / "todo.json"
+        path.write_text('{"id": 2, "done": false, "priority": "medium", "text": "x"}')
+
+        with pytest.raises(ValueError, match="不是 jd 的 JSON 数据文件"):
+            JsonStore(path).load()
+
+class TestCodecs:
+    """测试可选的编解码器与按魔数识别格式"""
+
+    @pytest.mark.parametrize("filename, store_class", [
+        ("todo.marshal", MarshalStore),
+        ("todo.pickle", PickleStore),
+    ])
+    def test_binary_roundtrip(self, tmp_path, filename, store_class):
+        """测试：marshal / pickle 存储读写后内容不变，文件头记录最大 ID 与计数"""
+        # Arrange
+        path = tmp_path / filename
+        manager = TodoManager(filepath=str(path))
+        manager.add_many(["任务 A", "任务 B", "任务 C"], priority="high")
+        manager.mark_done(2)
+
+        # Act
+        store = open_store(path)
+        todos = store.load()
+
+        # Assert
+        assert isinstance(store, store_class)
+        assert [t.to_dict() for t in todos] == [t.to_dict() for t in manager.todos]
+        assert store.max_id() == 3
+        assert store.counts() == {(False, "high"): 2, (True, "high"): 1}
+
+    def test_codec_selects_format_for_new_file(self, tmp_path):
+        """测试：codec 参数决定新文件的格式，之后按魔数识别，与扩展名无关"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        TodoManager(filepath=str(path), codec="marshal").add("任务")
+
+        # Act
+        store = open_store(path)
+
+        # Assert
+        assert path.read_bytes().startswith(b"JDM1")
+        assert sniff_codec(path) == "marshal"
+        assert isinstance(store, MarshalStore)
+        assert [t.text for t in TodoManager(filepath=str(path)).todos] == ["任务"]
+
+    def test_existing_format_wins_over_codec(self, tmp_path):
+        """测试：已存在的文件按其记录的格式读写"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        TodoManager(filepath=str(path)).add("任务")
+
+        # Act
+        store = open_store(path, codec="pickle")
+
+        # Assert
+        assert isinstance(store, JsonStore)
+
+    def test_compact_json_is_smaller_and_detected(self, tmp_path):
+        """测试：紧凑 JSON 比缩进格式小，重新打开后保持紧凑格式"""
+        # Arrange
+        pretty, compact = tmp_path / "pretty.json", tmp_path / "compact.json"
+        texts = [f"任务 {i}" for i in range(100)]
+        TodoManager(filepath=str(pretty)).add_many(texts)
+        TodoManager(filepath=str(compact), codec="json-compact").add_many(texts)
+
+        # Act
+        manager = TodoManager(filepath=str(compact))
+        manager.add("再加一个")
+
+        # Assert
+        assert sniff_codec(pretty) == "json"
+        assert sniff_codec(compact) == "json-compact"
+        assert compact.stat().st_size < pretty.stat().st_size
+        assert JsonStore(compact).checksum_ok() is True
+        assert len(TodoManager(filepath=str(compact)).todos) == 101
+
+    @pytest.mark.parametrize("filename, codec", [
+        ("todo.jsonl", "jsonl"), ("todo.jdlog", "jdlog"), ("todo.jdb", "jdb"), ("todo.db", "sqlite"),
+    ])
+    def test_sniff_existing_formats(self, tmp_path, filename, codec):
+        """测试：已有格式都能按魔数识别"""
+        path = tmp_path / filename
+        TodoManager(filepath=str(path)).add("任务")
+
+        assert sniff_codec(path) == codec
+
+    def test_sniff_unknown_or_missing(self, tmp_path):
+        """测试：旧格式 JSON、不存在的文件无法识别"""
+        path = tmp_path / "todo.json"
+        path.write_text('{"todos": []}')
+
+        assert sniff_codec(path) is None
+        assert sniff_codec(tmp_path / "missing.json") is None
+
+    def test_pickle_refuses_objects(self, tmp_path):
+        """测试：pickle 数据文件中的对象不会被加载"""
+        # Arrange
+        import pickle
+        path = tmp_path / "todo.pickle"
+        PickleStore(path).save([])
+        header = path.read_bytes()[:38]
+        path.write_bytes(header + pickle.dumps([(1, "任务", False, "medium", object())]))
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="不允许出现对象"):
+            PickleStore(path).load()
+
+    def test_unknown_codec_rejected(self, tmp_path):
+        """测试：未知的编解码器名抛出 ValueError"""
+        with pytest.raises(ValueError, match="未知的格式"):
+            open_store(tmp_path / "todo.json", codec="yaml")
+
+
+class TestCompressedStore:
+    """测试压缩的 JSON 存储"""
+
+    # 压缩扩展名 -> 文件开头的魔数
+    MAGIC = {".gz": b"\x1f\x8b", ".xz": b"\xfd7zXZ", ".bz2": b"BZh"}
+
+    @pytest.mark.parametrize("suffix", [".gz", ".xz", ".bz2"])
+    def test_roundtrip_is_compressed(self, tmp_path, suffix):
+        """测试：按压缩扩展名写入压缩文件，重新加载后内容不变"""
+        # Arrange
+        path = tmp_path / f"todo.json{suffix}"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many([f"任务 {i}" for i in range(1, 2501)])
+        manager.mark_done(7)
+
+        # Act
+        reloaded = TodoManager(filepath=str(path))
+
+        # Assert
+        assert path.read_bytes().startswith(self.MAGIC[suffix])
+        assert [t.to_dict() for t in reloaded.todos] == [t.to_dict() for t in manager.todos]
+
+    def test_lazy_reads_header(self, tmp_path):
+        """测试：未加载时从压缩文件的文件头读取最大 ID 与计数"""
+        # Arrange
+        path = tmp_path / "todo.json.gz"
+        TodoManager(filepath=str(path)).add_many(["任务 A", "任务 B"])
+
+        # Act
+        store = open_store(path)
+
+        # Assert
+        assert isinstance(store, JsonStore)
+        assert store.max_id() == 2
+        assert store.counts() == {(False, "medium"): 2}
+        assert [t.text for t in store.iter_todos()] == ["任务 A", "任务 B"]
+
+    def test_export_compressed(self, tmp_path):
+        """测试：导出到 .json.gz 后可以再导入"""
+        # Arrange
+        manager = TodoManager(filepath=str(tmp_path / "todo.json"))
+        manager.add("任务", priority="high")
+        target = tmp_path / "backup.json.gz"
+
+        # Act
+        manager.export_to(str(target))
+        other = TodoManager(filepath=str(tmp_path / "other.json"))
+        count = other.import_from(str(target))
+
+        # Assert
+        assert count == 1
+        assert other.todos[0].priority == "high"
+
+    def test_compression_requires_json(self, tmp_path):
+        """测试：非 JSON 格式指定压缩时抛出 ValueError"""
+        with pytest.raises(ValueError, match="不支持压缩"):
+            open_store(tmp_path / "todo.jsonl.gz")
+
+
+class TestSqliteStore:
+    """测试 SQLite 存储"""
+
+    def test_manager_does_not_preload_todos(self, tmp_path):
+        """测试：SQLite 后端不预先加载全部任务"""
+        # Arrange
+        path = tmp_path / "todo.db"
+        TodoManager(filepath=str(path)).add("任务 1")
+
+        # Act
+        manager = TodoManager(filepath=str(path))
+        manager.mark_done(1)
+        todo = manager.add("任务 2")
+
+        # Assert
+        assert manager._items is None
+        assert todo.id == 2
+
+    def test_mutations_persist_as_row_updates(self, tmp_path):
+        """测试：修改按行写入数据库"""
+        # Arrange
+        path = tmp_path / "todo.db"
+        manager = TodoManager(filepath=str(path))
+        manager.add("任务 1")
+        manager.add("任务 2")
+        manager.add("任务 3")
+
+        # Act
+        manager.mark_done(1)
+        manager.delete(2)
+
+        # Assert
+        rows = sqlite3.connect(str(path)).execute(
+            "SELECT id, done FROM todos ORDER BY id"
+        ).fetchall()
+        assert rows == [(1, 1), (3, 0)]
+
+    def test_missing_id_raises_error(self, tmp_path):
+        """测试：操作不存在的任务应抛出异常"""
+        manager = TodoManager(filepath=str(tmp_path / "todo.db"))
+        with pytest.raises(ValueError, match="任务不存在"):
+            manager.mark_done(42)
+        with pytest.raises(ValueError, match="任务不存在"):
+            manager.delete(42)
+
+    def test_list_sorted_by_priority_in_sql(self, tmp_path):
+        """测试：按优先级排序由 SQL 完成"""
+        # Arrange
+        path = tmp_path / "todo.db"
+        manager = TodoManager(filepath=str(path))
+        manager.add("低", priority="low")
+        manager.add("高", priority="high")
+        manager.add("中", priority="medium")
+        manager.add("高 2", priority="high")
+
+        # Act
+        result = TodoManager(filepath=str(path)).list(sort="p")
+
+        # Assert
+        assert [t.id for t in result] == [2, 4, 3, 1]
+
+    def test_query_with_limit_and_offset(self, tmp_path):
+        """测试：分页由 SQL 完成"""
+        # Arrange
+        path = tmp_path / "todo.db"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many([f"任务 {i}" for i in range(1, 6)])
+        manager.add("高", priority="high")
+
+        # Act
+        lazy = TodoManager(filepath=str(path))
+        first = lazy.list(sort="p", limit=2)
+        second = lazy.list(sort="p", limit=2, offset=2)
+
+        # Assert
+        assert [t.id for t in first] == [6, 1]
+        assert [t.id for t in second] == [2, 3]
+
+    def test_clear_removes_done_rows(self, tmp_path):
+        """测试：clear 删除已完成的行"""
+        # Arrange
+        path = tmp_path / "todo.db"
+        manager = TodoManager(filepath=str(path))
+        manager.add("任务 1")
+        manager.add("任务 2")
+        manager.mark_done(2)
+
+        # Act
+        manager.clear()
+
+        # Assert
+        assert [t.id for t in TodoManager(filepath=str(path)).list()] == [1]
+
+    def test_counts_maintained_by_triggers(self, tmp_path):
+        """测试：计数表随增删改更新"""
+        # Arrange
+        path = tmp_path / "todo.db"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many(["任务 1", "任务 2", "任务 3"])
+        manager.add("任务 4", priority="low")
+
+        # Act
+        manager.mark_done(1)
+        manager.delete(2)
+
+        # Assert
+        assert SqliteStore(path).counts() == {
+            (True, "medium"): 1, (False, "medium"): 1, (False, "low"): 1
+        }
+
+    def test_counts_initialized_for_existing_database(self, tmp_path):
+        """测试：旧数据库没有计数表时按现有数据初始化"""
+        # Arrange
+        path = tmp_path / "todo.db"
+        conn = sqlite3.connect(str(path))
+        conn.execute(
+            "CREATE TABLE todos (id INTEGER PRIMARY KEY, text TEXT NOT NULL, "
+            "done INTEGER NOT NULL DEFAULT 0, priority TEXT NOT NULL, weight INTEGER NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT INTO todos VALUES (?, ?, ?, ?, ?)",
+            [(1, "任务 1", 0, "high", 3), (2, "任务 2", 1, "high", 3)],
+        )
+        conn.commit()
+        conn.close()
+
+        # Act
+        counts = SqliteStore(path).counts()
+
+        # Assert
+        assert counts == {(False, "high"): 1, (True, "high"): 1}
+
+    def test_import_json_into_sqlite(self, tmp_path):
+        """测试：JSON 文件可导入 SQLite 存储"""
+        # Arrange
+        source = TodoManager(filepath=str(tmp_path / "todo.json"))
+        source.add("任务 1")
+        source.mark_done(1)
+        target = TodoManager(filepath=str(tmp_path / "todo.db"))
+
+        # Act
+        target.import_from(str(tmp_path / "todo.json"))
+
+        # Assert
+        reloaded = TodoManager(filepath=str(tmp_path / "todo.db"))
+        assert [t.to_dict() for t in reloaded.todos] == [t.to_dict() for t in source.todos]
+
+
+class TestLazyLoading:
+    """测试按需加载与增量解析"""
+
+    def test_json_file_starts_with_next_id_header(self, tmp_path):
+        """测试：JSON 文件开头写入 next_id"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many(["任务 1", "任务 2"])
+
+        # Act
+        content = path.read_text(encoding="utf-8")
+
+        # Assert
+        assert content.startswith('{\n  "next_id": 3,')
+        assert JsonStore(path).max_id() == 2
+
+    def test_json_header_contains_counts(self, tmp_path):
+        """测试：JSON 文件头记录各状态、优先级的任务数"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many(["任务 1", "任务 2"])
+        manager.add("任务 3", priority="high")
+        manager.mark_done(1)
+
+        # Act
+        header = json.loads(path.read_text(encoding="utf-8"))["counts"]
+        counts = JsonStore(path).counts()
+
+        # Assert
+        assert header["open"] == {"low": 0, "medium": 1, "high": 1}
+        assert counts == {(False, "medium"): 1, (False, "high"): 1, (True, "medium"): 1}
+
+    def test_json_counts_fall_back_for_legacy_file(self, tmp_path):
+        """测试：没有计数的旧格式文件回退为逐个统计"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        path.write_text(json.dumps({"todos": [{"id": 7, "text": "旧任务"}]}), encoding="utf-8")
+
+        # Act & Assert
+        assert JsonStore(path).counts() == {(False, "medium"): 1}
+
+    def test_json_counts_ignore_header_of_tampered_file(self, tmp_path):
+        """测试：手工删除任务后校验和不一致，不信任文件头的计数"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many(["任务 1", "任务 2", "任务 3"])
+        text = path.read_text(encoding="utf-8")
+        start = text.index('    {\n      "id": 1')
+        end = text.index('    {\n      "id": 3')
+        path.write_text(text[:start] + text[end:], encoding="utf-8")
+
+        # Act
+        counts = JsonStore(path).counts()
+        count = TodoManager(filepath=str(path), lazy=True).count()
+
+        # Assert
+        assert counts == {(False, "medium"): 1}
+        assert count == 1
+
+    def test_json_max_id_falls_back_for_legacy_file(self, tmp_path):
+        """测试：没有文件头的旧格式文件回退为扫描全部任务"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        path.write_text(json.dumps({"todos": [{"id": 7, "text": "旧任务"}]}), encoding="utf-8")
+
+        # Act & Assert
+        assert JsonStore(path).max_id() == 7
+
+    @pytest.mark.parametrize("chunk_size", [1, 7, 64, 65536])
+    def test_iter_json_array_across_chunk_boundaries(self, chunk_size):
+        """测试：元素跨越分块边界时仍能正确解析"""
+        # Arrange
+        items = [{"id": i, "text": f"任务 {i} ]}}{{,"} for i in range(1, 20)]
+        for indent in (None, 2):
+            text = json.dumps({"next_id": 20, "todos": items}, ensure_ascii=False, indent=indent)
+
+            # Act
+            result = list(iter_json_array(StringIO(text), "todos", chunk_size))
+
+            # Assert
+            assert result == items
+
+    def test_iter_json_array_empty_and_missing(self):
+        """测试：空数组与缺少键"""
+        assert list(iter_json_array(StringIO('{"todos": []}'), "todos", 3)) == []
+        assert list(iter_json_array(StringIO('{}'), "todos", 3)) == []
+
+    def test_iter_json_array_truncated_raises_error(self):
+        """测试：文件被截断时抛出异常"""
+        with pytest.raises(ValueError):
+            list(iter_json_array(StringIO('{"todos": [{"id": 1}, {"id'), "todos", 4))
+
+    def test_lazy_journal_add_reads_only_max_id(self, tmp_path):
+        """测试：日志存储按需模式下添加任务不加载全部任务"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many(["任务 1", "任务 2", "任务 3"])
+        manager.compact()
+        manager.add("任务 4")
+
+        # Act
+        lazy = TodoManager(filepath=str(path), lazy=True)
+        todo = lazy.add("任务 5")
+
+        # Assert
+        assert lazy._items is None
+        assert todo.id == 5
+        assert [t.id for t in TodoManager(filepath=str(path)).todos] == [1, 2, 3, 4, 5]
+
+    def test_journal_max_id_skips_snapshot(self, tmp_path):
+        """测试：最大 ID 只读取快照开头，按快照记录的字节数跳到增量记录"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        manager = TodoManager(filepath=str(path))
+        manager.add_many([f"任务 {i}" for i in range(1, 1001)])
+        manager.compact()
+        manager.add("快照之后的任务")
+        store = JournalStore(path)
+        snapshot = path.read_bytes().split(b"\n")[0] + b"\n"
+
+        # Act
+        with patch("todo.storage.json.loads", wraps=json.loads) as loads:
+            max_id = store.max_id()
+
+        # Assert
+        assert max_id == 1001
+        assert [len(call.args[0]) < 200 for call in loads.call_args_list] == [True]
+        assert json.loads(snapshot)["bytes"] == len(snapshot)
+
+    def test_journal_max_id_legacy_snapshot(self, tmp_path):
+        """测试：旧版本的快照记录没有字节数时逐行读取"""
+        path = tmp_path / "todo.jdlog"
+        path.write_text(
+            '{"op": "snapshot", "next_id": 3, "todos": []}\n'
+            '{"op": "add", "todo": {"id": 7, "text": "a", "done": false, "priority": "low"}}\n',
+            encoding="utf-8",
+        )
+
+        assert JournalStore(path).max_id() == 7
+
+    def test_lazy_first_write_reads_max_id_once(self, tmp_path):
+        """测试：按需模式下文件未被修改时，第一次写入只读取一次最大 ID"""
+        # Arrange
+        path = tmp_path / "todo.jdlog"
+        TodoManager(filepath=str(path)).add_many(["任务 1", "任务 2"])
+        lazy = TodoManager(filepath=str(path), lazy=True)
+
+        # Act
+        with patch.object(lazy._store, "max_id", wraps=lazy._store.max_id) as max_id:
+            lazy.add("任务 3")
+
+        # Assert
+        assert max_id.call_count == 1
+
+    def test_lazy_json_list_streams_without_index(self, tmp_path):
+        """测试：JSON 存储按需模式下 list 逐个读取，不建立索引"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        TodoManager(filepath=str(path)).add_many(["任务 1", "任务 2"])
+
+        # Act
+        lazy = TodoManager(filepath=str(path), lazy=True)
+        result = lazy.list(sort="i")
+
+        # Assert
+        assert [t.text for t in result] == ["任务 1", "任务 2"]
+        assert lazy._items is None
+
+    def test_lazy_json_mutations_load_on_demand(self, tmp_path):
+        """测试：JSON 存储按需模式下修改时才加载"""
+        # Arrange
+        path = tmp_path / "todo.json"
+        TodoManager(filepath=str(path)).add_many(["任务 1", "任务 2"])
+
+        # Act
+        lazy = TodoManager(filepath=str(path), lazy=True)
+        lazy.add("任务 3")
+        lazy.mark_done(1)
+
+        # Assert
+        reloaded = TodoManager(filepath=str(path))
+        assert [(t.id, t.done) for t in reloaded.todos] == [(1, True), (2, False), (3, False)]
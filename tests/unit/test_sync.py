@@ -0,0 +1,214 @@
+"""单元测试：同步
+
+测试两个数据文件之间的增量同步、合并规则与 ID 冲突处理
+"""
+
+import shutil
+import pytest
+from todo.manager import TodoManager
+from todo.storage import JsonStore
+from todo.models import TodoItem
+
+
+def _summary(manager):
+    """(文本, 是否完成) 集合，忽略两边可能不同的 ID"""
+    return sorted((t.text, t.done) for t in TodoManager(filepath=str(manager.filepath)).todos)
+
+
+@pytest.fixture
+def pair(tmp_path):
+    """从同一个文件复制出的两份列表"""
+    laptop = TodoManager(filepath=str(tmp_path / "laptop.json"))
+    laptop.add_many(["写周报", "买菜", "修自行车"])
+    shutil.copy(tmp_path / "laptop.json", tmp_path / "server.json")
+    return laptop, TodoManager(filepath=str(tmp_path / "server.json"))
+
+
+class TestSync:
+    """测试 TodoManager.sync_with"""
+
+    def test_first_sync_of_copies_adds_nothing(self, pair):
+        """测试：同一文件的两份副本第一次同步时识别为相同任务，不会重复"""
+        # Arrange
+        laptop, server = pair
+
+        # Act
+        stats = laptop.sync_with(str(server.filepath))
+
+        # Assert
+        assert (stats.sent, stats.received) == (0, 0)
+        assert len(TodoManager(filepath=str(laptop.filepath)).todos) == 3
+        assert len(TodoManager(filepath=str(server.filepath)).todos) == 3
+
+    def test_adds_on_both_sides_get_local_ids(self, pair):
+        """测试：两边各自新增、ID 相同的任务都保留，对端的任务分配本地的新 ID"""
+        # Arrange
+        laptop, server = pair
+        laptop.sync_with(str(server.filepath))
+        laptop.add("笔记本上的任务")
+        server.add("服务器上的任务")
+
+        # Act
+        stats = laptop.sync_with(str(server.filepath))
+
+        # Assert
+        assert (stats.sent, stats.received) == (1, 1)
+        local = {t.id: t.text for t in TodoManager(filepath=str(laptop.filepath)).todos}
+        remote = {t.id: t.text for t in TodoManager(filepath=str(server.filepath)).todos}
+        assert local[4] == "笔记本上的任务" and local[5] == "服务器上的任务"
+        assert remote[4] == "服务器上的任务" and remote[5] == "笔记本上的任务"
+
+    def test_done_and_delete_propagate(self, pair):
+        """测试：完成与删除传到对端，按文本而不是 ID 对应"""
+        # Arrange
+        laptop, server = pair
+        laptop.sync_with(str(server.filepath))
+        laptop.mark_done(1)
+        server.delete(2)
+
+        # Act
+        laptop.sync_with(str(server.filepath))
+
+        # Assert
+        expected = [("写周报", True), ("修自行车", False)]
+        assert _summary(laptop) == sorted(expected)
+        assert _summary(server) == sorted(expected)
+
+    def test_delete_wins_over_done(self, pair):
+        """测试：一边完成、另一边删除同一任务时，删除胜出"""
+        # Arrange
+        laptop, server = pair
+        laptop.sync_with(str(server.filepath))
+        laptop.mark_done(3)
+        server.delete(3)
+
+        # Act
+        server.sync_with(str(laptop.filepath))
+
+        # Assert
+        assert _summary(laptop) == _summary(server) == [("买菜", False), ("写周报", False)]
+
+    def test_deleted_task_not_resurrected(self, pair, tmp_path):
+        """测试：已删除的任务不会被第三个副本重新加回"""
+        # Arrange
+        laptop, server = pair
+        shutil.copy(laptop.filepath, tmp_path / "phone.json")
+        phone = TodoManager(filepath=str(tmp_path / "phone.json"))
+        laptop.sync_with(str(server.filepath))
+        laptop.sync_with(str(phone.filepath))
+        laptop.delete(2)
+        laptop.sync_with(str(server.filepath))
+
+        # Act
+        server.sync_with(str(phone.filepath))
+        laptop.sync_with(str(server.filepath))
+
+        # Assert
+        for manager in (laptop, server, phone):
+            assert "买菜" not in [text for text, _ in _summary(manager)]
+
+    def test_second_sync_exchanges_only_delta(self, pair):
+        """测试：再次同步只交换上次同步以来的修改"""
+        # Arrange
+        laptop, server = pair
+        laptop.add_many([f"任务 {i}" for i in range(50)])
+        laptop.sync_with(str(server.filepath))
+        server.mark_done(1)
+
+        # Act
+        stats = laptop.sync_with(str(server.filepath))
+        again = laptop.sync_with(str(server.filepath))
+
+        # Assert
+        assert (stats.exchanged, stats.received) == (1, 1)
+        assert again.exchanged == 0
+        assert TodoManager(filepath=str(laptop.filepath)).get(1).done is True
+
+    def test_external_edit_reconciled(self, pair):
+        """测试：数据文件被其他程序改写后，同步前对比全部任务找出修改"""
+        # Arrange
+        laptop, server = pair
+        laptop.sync_with(str(server.filepath))
+        store = JsonStore(server.filepath)
+        todos = store.load()
+        todos[0].done = True
+        store.save(todos + [TodoItem(4, "手工添加", priority="high")])
+
+        # Act
+        stats = laptop.sync_with(str(server.filepath))
+
+        # Assert
+        assert stats.received == 2
+        todos = {t.text: t for t in TodoManager(filepath=str(laptop.filepath)).todos}
+        assert todos["写周报"].done is True
+        assert todos["手工添加"].priority == "high"
+
+    def test_lazy_backend_receives_done_tasks(self, pair, tmp_path):
+        """测试：按需查询的后端收到对端已完成的新任务"""
+        # Arrange
+        laptop, _ = pair
+        laptop.mark_done(2)
+        db = TodoManager(filepath=str(tmp_path / "todo.jdb"), lazy=True)
+
+        # Act
+        stats = db.sync_with(str(laptop.filepath))
+
+        # Assert
+        assert stats.received == 3
+        assert _summary(db) == _summary(laptop)
+
+    def test_first_sync_reports_untracked_copies(self, pair):
+        """测试：直接复制的文件第一次同步时报告没有同步状态，之后不再报告"""
+        # Arrange
+        laptop, server = pair
+
+        # Act
+        first = laptop.sync_with(str(server.filepath))
+        second = laptop.sync_with(str(server.filepath))
+
+        # Assert
+        assert first.untracked == [str(laptop.filepath), str(server.filepath)]
+        assert second.untracked == []
+
+    def test_delete_on_exported_copy_before_first_sync(self, tmp_path):
+        """测试：导出的副本在第一次同步前删除的任务不会被加回"""
+        # Arrange
+        laptop = TodoManager(filepath=str(tmp_path / "laptop.json"))
+        laptop.add_many(["写周报", "买菜", "修自行车"])
+        laptop.export_to(str(tmp_path / "server.json"), sync=True)
+        server = TodoManager(filepath=str(tmp_path / "server.json"))
+        server.delete(2)
+        laptop.add("新任务")
+
+        # Act
+        stats = laptop.sync_with(str(server.filepath))
+
+        # Assert
+        assert stats.untracked == []
+        expected = [("修自行车", False), ("写周报", False), ("新任务", False)]
+        assert _summary(laptop) == _summary(server) == expected
+
+    def test_plain_export_does_not_track(self, tmp_path):
+        """测试：普通导出（备份）不建立同步状态"""
+        # Arrange
+        laptop = TodoManager(filepath=str(tmp_path / "laptop.json"))
+        laptop.add("写周报")
+
+        # Act
+        laptop.export_to(str(tmp_path / "backup.json"))
+
+        # Assert
+        assert not (tmp_path / "laptop.json.sync").exists()
+        assert not (tmp_path / "backup.json.sync").exists()
+
+    def test_sync_with_self_rejected(self, pair):
+        """测试：不能与自身同步"""
+        laptop, _ = pair
+        with pytest.raises(ValueError, match="不能与自身同步"):
+            laptop.sync_with(str(laptop.filepath))
+
+    def test_missing_peer_rejected(self, pair, tmp_path):
+        """测试：对端文件不存在时报错"""
+        laptop, _ = pair
+        with pytest.raises(ValueError, match="文件不存在"):
+            laptop.sync_with(str(tmp_path / "missing.json"))